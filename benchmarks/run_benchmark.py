@@ -0,0 +1,230 @@
+"""
+Benchmark de extremo a extremo del pipeline de calificación.
+
+Genera hojas sintéticas con resultado conocido (ver synthetic_sheets.py), las
+califica con el mismo pipeline que la aplicación (iter_page_results) y
+reporta:
+
+- Rendimiento: páginas/s, tiempo por etapa (promedio y máximo) y memoria máxima
+- Exactitud: matrículas y respuestas detectadas comparadas con las generadas
+
+El caché de detecciones se desactiva para medir siempre la detección
+completa. Las imágenes de resultado se escriben en la carpeta de trabajo.
+
+Uso:
+    python benchmarks/run_benchmark.py [opciones]
+
+Ejemplos:
+    python benchmarks/run_benchmark.py --hojas 50 --procesos 4
+    python benchmarks/run_benchmark.py --hojas 50 --estrategia-relleno integral
+    python benchmarks/run_benchmark.py --hojas 30 --paginas-por-pdf 10 --rotacion 3 --ruido 12 --salida bench.json
+
+Author: Gerson
+Date: 2025
+"""
+
+import argparse
+import json
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+PROJECT_DIR = BENCHMARK_DIR.parent
+for path in (PROJECT_DIR, BENCHMARK_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+from src.core.grading_pipeline import iter_page_results, resolve_num_workers
+from src.core.pipeline_stats import PipelineStats
+from src.utils.constants import DEFAULT_FILL_STRATEGY, FILL_STRATEGIES, MAX_QUESTIONS
+from synthetic_sheets import add_generator_arguments, generate_from_args
+
+
+def compare_results(ground_truth: List[Dict], results: List[Dict]) -> Dict:
+    """
+    Compara los resultados del pipeline con los valores generados.
+
+    Args:
+        ground_truth: Resultado esperado de cada página (mismo orden que results)
+        results: Resultados de GradingPipeline.process_page()
+
+    Returns:
+        Diccionario con:
+        - 'pages_ok': int - Páginas procesadas con éxito
+        - 'matricula_ok': int - Matrículas detectadas correctamente
+        - 'answers_total': int - Preguntas comparadas
+        - 'answers_ok': int - Preguntas detectadas correctamente
+        - 'needs_review': int - Páginas enviadas a revisión manual
+        - 'errors': list - Primeras diferencias encontradas (para depurar)
+    """
+    report = {
+        'pages_ok': 0,
+        'matricula_ok': 0,
+        'answers_total': 0,
+        'answers_ok': 0,
+        'needs_review': 0,
+        'errors': []
+    }
+
+    for expected, result in zip(ground_truth, results):
+        if not result.get('success'):
+            report['errors'].append(f"{result.get('filename')}: {result.get('message')}")
+            report['answers_total'] += MAX_QUESTIONS
+            continue
+
+        report['pages_ok'] += 1
+        if result.get('needs_review'):
+            report['needs_review'] += 1
+
+        if result.get('matricula') == expected['matricula']:
+            report['matricula_ok'] += 1
+        elif len(report['errors']) < 20:
+            report['errors'].append(f"{result['filename']}: matrícula {result.get('matricula')} "
+                                    f"(esperada {expected['matricula']})")
+
+        detected = result.get('respuestas') or {}
+        for pregunta, alternativa in expected['respuestas'].items():
+            report['answers_total'] += 1
+            found = detected.get(int(pregunta))
+            if found == alternativa:
+                report['answers_ok'] += 1
+            elif len(report['errors']) < 20:
+                report['errors'].append(f"{result['filename']}: pregunta {pregunta} = {found} "
+                                        f"(esperada {alternativa})")
+
+    return report
+
+
+def run_benchmark(args: argparse.Namespace, work_dir: Path) -> Tuple[Dict, PipelineStats]:
+    """
+    Genera las hojas, las califica y calcula las métricas.
+
+    Args:
+        args: Argumentos del script
+        work_dir: Carpeta de trabajo (PDFs e imágenes de resultado)
+
+    Returns:
+        Tupla (reporte serializable a JSON, mediciones de la ejecución)
+    """
+    print(f"🧪 Generando {args.hojas} hojas sintéticas...")
+    start = time.perf_counter()
+    ground_truth = generate_from_args(args, str(work_dir / "pdfs"))
+    generation_time = time.perf_counter() - start
+    print(f"   {generation_time:.1f} s")
+
+    # Pauta de referencia: solo afecta al cálculo de nota
+    settings = {
+        'answer_key': {pregunta: 'A' for pregunta in range(1, args.preguntas + 1)},
+        'num_questions': args.preguntas,
+        'passing_percentage': 60.0,
+        'min_grade': 1.0,
+        'max_grade': 7.0,
+        'passing_grade': 4.0,
+        'test_name': 'Benchmark',
+        'output_base_dir': str(work_dir),
+        'detection_cache': False,
+        'fill_strategy': args.estrategia_relleno
+    }
+
+    tasks = [(entry['pdf_path'], entry['page_number'],
+              sum(1 for e in ground_truth if e['pdf_path'] == entry['pdf_path']))
+             for entry in ground_truth]
+    workers = min(resolve_num_workers(args.procesos), len(tasks))
+
+    print(f"⚙️ Calificando {len(tasks)} páginas con {workers} proceso(s)...")
+    stats = PipelineStats()
+    results = [None] * len(tasks)
+    for index, result in iter_page_results(tasks, settings, num_workers=args.procesos,
+                                           calibration_file=args.calibracion):
+        stats.merge(result.pop('stats', None))
+        results[index] = result
+    stats.finish()
+
+    accuracy = compare_results(ground_truth, results)
+
+    return {
+        'parameters': {name: value for name, value in vars(args).items() if name != 'salida'},
+        'workers': workers,
+        'pages': len(tasks),
+        'generation_time': generation_time,
+        'pages_per_second': len(tasks) / stats.elapsed if stats.elapsed else None,
+        'accuracy': accuracy,
+        'stats': stats.to_dict()
+    }, stats
+
+
+def print_report(report: Dict, stats: PipelineStats):
+    """Imprime el resumen del benchmark."""
+    accuracy = report['accuracy']
+    pages = report['pages']
+    answers_total = accuracy['answers_total'] or 1
+
+    print(f"\n{'=' * 70}")
+    print("RENDIMIENTO")
+    print(f"{'=' * 70}")
+    for line in stats.summary_lines():
+        print(line)
+
+    print(f"\n{'=' * 70}")
+    print("EXACTITUD")
+    print(f"{'=' * 70}")
+    print(f"Páginas procesadas: {accuracy['pages_ok']}/{pages}")
+    print(f"Matrículas correctas: {accuracy['matricula_ok']}/{pages} "
+          f"({accuracy['matricula_ok'] / pages * 100:.1f}%)")
+    print(f"Respuestas correctas: {accuracy['answers_ok']}/{accuracy['answers_total']} "
+          f"({accuracy['answers_ok'] / answers_total * 100:.2f}%)")
+    print(f"Enviadas a revisión manual: {accuracy['needs_review']}")
+
+    if accuracy['errors']:
+        print("\nPrimeras diferencias:")
+        for error in accuracy['errors']:
+            print(f"  ✗ {error}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Función principal del script."""
+    parser = argparse.ArgumentParser(
+        description="Mide el rendimiento y la exactitud del pipeline con hojas sintéticas."
+    )
+    add_generator_arguments(parser)
+    parser.add_argument('--procesos', type=int, default=0,
+                        help="Procesos de trabajo (0 = automático)")
+    parser.add_argument('--estrategia-relleno', '--fill-strategy', choices=FILL_STRATEGIES,
+                        default=DEFAULT_FILL_STRATEGY,
+                        help=f"Medición del relleno de los círculos (default: {DEFAULT_FILL_STRATEGY})")
+    parser.add_argument('--salida', help="Archivo JSON donde guardar el reporte")
+    parser.add_argument('--conservar', metavar='CARPETA',
+                        help="Generar en esta carpeta y conservar PDFs e imágenes")
+    args = parser.parse_args(argv)
+
+    if args.hojas < 1 or args.paginas_por_pdf < 1:
+        parser.error("--hojas y --paginas-por-pdf deben ser mayores que 0")
+
+    if args.conservar:
+        work_dir = Path(args.conservar)
+        work_dir.mkdir(parents=True, exist_ok=True)
+    else:
+        work_dir = Path(tempfile.mkdtemp(prefix="test_scanner_bench_"))
+
+    try:
+        report, stats = run_benchmark(args, work_dir)
+    finally:
+        if not args.conservar:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    print_report(report, stats)
+
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Reporte guardado en: {args.salida}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,393 @@
+"""
+Generador de hojas de respuesta sintéticas con resultado conocido.
+
+Dibuja hojas a partir de config/calibration_data.json (círculos de matrícula y
+respuestas) y de los marcadores ArUco del sistema, marca una matrícula y unas
+respuestas elegidas al azar, y las guarda como PDFs escaneados (una imagen
+JPEG por página) junto con un archivo ground_truth.json con lo que cada
+página debería detectar.
+
+Permite simular defectos del escaneo: rotación, inclinación de perspectiva,
+ruido, marcas sueltas fuera de los círculos y PDFs con varias páginas.
+
+Uso:
+    python benchmarks/synthetic_sheets.py <carpeta_salida> [opciones]
+
+Ejemplo:
+    python benchmarks/synthetic_sheets.py hojas_sinteticas --hojas 40 --paginas-por-pdf 10 --rotacion 1.5
+
+Author: Gerson
+Date: 2025
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import cv2
+import fitz
+import numpy as np
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+if str(PROJECT_DIR) not in sys.path:
+    sys.path.insert(0, str(PROJECT_DIR))
+
+from src.core.circle_table import CircleTable
+from src.core.image_processor import ImageProcessor
+from src.utils.constants import ALTERNATIVES, ARUCO_DICT, MATRICULA_DIGITS, MAX_QUESTIONS
+
+
+DEFAULT_CALIBRATION_FILE = PROJECT_DIR / "config" / "calibration_data.json"
+
+
+class SyntheticSheetGenerator:
+    """
+    Genera páginas escaneadas sintéticas de la hoja de respuestas.
+
+    La hoja se dibuja en la resolución de trabajo de ImageProcessor
+    (1700x2200) y se ubica en una página carta a 300 DPI de modo que los
+    centros de los marcadores ArUco coincidan con las esquinas de la hoja,
+    igual que en la hoja impresa.
+    """
+
+    # Página carta a 300 DPI
+    PAGE_WIDTH = 2550
+    PAGE_HEIGHT = 3300
+
+    # Centro de los marcadores respecto al borde de la página y su tamaño (10 mm)
+    MARKER_MARGIN = 150
+    MARKER_SIZE = 118
+
+    # Tinta de las marcas del alumno (0 = negro)
+    INK_LEVEL = 40
+
+    def __init__(self, calibration_file: str = str(DEFAULT_CALIBRATION_FILE), seed: int = 0):
+        """
+        Inicializa el generador.
+
+        Args:
+            calibration_file: Archivo de calibración con las posiciones de los círculos
+            seed: Semilla para obtener siempre las mismas hojas
+        """
+        with open(calibration_file, 'r', encoding='utf-8') as f:
+            self.calibration_data = json.load(f)
+
+        self.circles = CircleTable(self.calibration_data)
+        self.rng = np.random.default_rng(seed)
+        self.aruco_dict = cv2.aruco.getPredefinedDictionary(getattr(cv2.aruco, ARUCO_DICT))
+
+        self.template = self._draw_template()
+
+    def _draw_template(self) -> np.ndarray:
+        """
+        Dibuja la hoja en blanco: contornos de los círculos y su rótulo.
+
+        Returns:
+            Imagen en escala de grises (OUTPUT_HEIGHT x OUTPUT_WIDTH)
+        """
+        template = np.full((ImageProcessor.OUTPUT_HEIGHT, ImageProcessor.OUTPUT_WIDTH), 255, np.uint8)
+        font = cv2.FONT_HERSHEY_SIMPLEX
+
+        labels = [str(c['digito']) for c in self.calibration_data['matricula']]
+        labels += [c['alternativa'] for c in self.calibration_data['respuestas']]
+
+        for index, label in enumerate(labels):
+            x, y, radius = self.circles.circle(index)
+            cv2.circle(template, (x, y), radius, 90, 2)
+            (text_w, text_h), _ = cv2.getTextSize(label, font, 0.45, 1)
+            cv2.putText(template, label, (x - text_w // 2, y + text_h // 2), font, 0.45, 140, 1,
+                        cv2.LINE_AA)
+
+        return template
+
+    def random_answers(self, num_questions: int = MAX_QUESTIONS, blank_rate: float = 0.05,
+                       multiple_rate: float = 0.02) -> Dict:
+        """
+        Elige al azar una matrícula y las respuestas de una hoja.
+
+        Args:
+            num_questions: Preguntas respondidas (las demás quedan en blanco)
+            blank_rate: Probabilidad de dejar una pregunta en blanco
+            multiple_rate: Probabilidad de marcar dos alternativas en una pregunta
+
+        Returns:
+            Diccionario con:
+            - 'matricula': str - Matrícula de 10 dígitos
+            - 'respuestas': dict - {pregunta: alternativa o None} (lo que se debe detectar)
+            - 'marcas': dict - {pregunta: [alternativas marcadas]}
+        """
+        matricula = ''.join(str(d) for d in self.rng.integers(0, 10, MATRICULA_DIGITS))
+
+        respuestas = {}
+        marcas = {}
+        for pregunta in range(1, MAX_QUESTIONS + 1):
+            roll = self.rng.random()
+            if pregunta > num_questions or roll < blank_rate:
+                respuestas[pregunta] = None
+                marcas[pregunta] = []
+            elif roll < blank_rate + multiple_rate:
+                respuestas[pregunta] = None  # Múltiple marca: respuesta inválida
+                marcas[pregunta] = sorted(self.rng.choice(ALTERNATIVES, 2, replace=False).tolist())
+            else:
+                alternativa = str(self.rng.choice(ALTERNATIVES))
+                respuestas[pregunta] = alternativa
+                marcas[pregunta] = [alternativa]
+
+        return {'matricula': matricula, 'respuestas': respuestas, 'marcas': marcas}
+
+    def draw_sheet(self, answers: Dict) -> np.ndarray:
+        """
+        Marca una hoja con la matrícula y las respuestas indicadas.
+
+        Args:
+            answers: Diccionario de random_answers()
+
+        Returns:
+            Hoja marcada en escala de grises (resolución de trabajo)
+        """
+        sheet = self.template.copy()
+
+        indices = [self.circles.matricula_circle(col, int(digit))
+                   for col, digit in enumerate(answers['matricula'], start=1)]
+        for pregunta, alternativas in answers['marcas'].items():
+            indices.extend(self.circles.respuesta_circle(pregunta, alt) for alt in alternativas)
+
+        for index in indices:
+            if index is None:
+                continue
+            x, y, radius = self.circles.circle(index)
+            # Relleno de lápiz: radio y tono varían un poco entre marcas
+            fill_radius = max(1, int(round(radius * self.rng.uniform(0.8, 1.0))))
+            ink = int(self.INK_LEVEL + self.rng.integers(-20, 21))
+            cv2.circle(sheet, (x, y), fill_radius, ink, -1, cv2.LINE_AA)
+
+        return sheet
+
+    def _add_stray_marks(self, sheet: np.ndarray, count: int):
+        """
+        Agrega trazos sueltos (rayas, puntos) lejos de los círculos.
+
+        Args:
+            sheet: Hoja marcada (se modifica en el lugar)
+            count: Cantidad de trazos
+        """
+        height, width = sheet.shape
+        min_distance = 3 * int(self.circles.radius.max())
+
+        added = 0
+        attempts = 0
+        while added < count and attempts < count * 50:
+            attempts += 1
+            x, y = int(self.rng.integers(40, width - 40)), int(self.rng.integers(40, height - 40))
+            distances = np.hypot(self.circles.x - x, self.circles.y - y)
+            if distances.min() < min_distance:
+                continue
+
+            ink = int(self.INK_LEVEL + self.rng.integers(0, 60))
+            if self.rng.random() < 0.5:
+                dx, dy = self.rng.integers(-min_distance // 2, min_distance // 2 + 1, 2)
+                cv2.line(sheet, (x, y), (x + int(dx), y + int(dy)), ink, 2, cv2.LINE_AA)
+            else:
+                cv2.circle(sheet, (x, y), int(self.rng.integers(2, 6)), ink, -1, cv2.LINE_AA)
+            added += 1
+
+    def draw_page(self, sheet: np.ndarray, rotation: float = 0.0, skew: float = 0.0,
+                  noise: float = 0.0, stray_marks: int = 0) -> np.ndarray:
+        """
+        Ubica la hoja en una página escaneada con marcadores ArUco y defectos.
+
+        Args:
+            sheet: Hoja marcada (resolución de trabajo)
+            rotation: Rotación máxima en grados (se elige al azar en ±rotation)
+            skew: Desplazamiento máximo en píxeles de cada esquina (inclinación de perspectiva)
+            noise: Desviación estándar del ruido gaussiano (0-255)
+            stray_marks: Cantidad de trazos sueltos fuera de los círculos
+
+        Returns:
+            Página en escala de grises (PAGE_HEIGHT x PAGE_WIDTH)
+        """
+        sheet = sheet.copy()
+        if stray_marks:
+            self._add_stray_marks(sheet, stray_marks)
+
+        # Hoja ubicada entre los centros de los marcadores
+        m = self.MARKER_MARGIN
+        centers = np.float32([[m, m], [self.PAGE_WIDTH - m, m],
+                              [self.PAGE_WIDTH - m, self.PAGE_HEIGHT - m], [m, self.PAGE_HEIGHT - m]])
+        sheet_corners = np.float32([[0, 0], [sheet.shape[1] - 1, 0],
+                                    [sheet.shape[1] - 1, sheet.shape[0] - 1], [0, sheet.shape[0] - 1]])
+        matrix = cv2.getPerspectiveTransform(sheet_corners, centers)
+        page = cv2.warpPerspective(sheet, matrix, (self.PAGE_WIDTH, self.PAGE_HEIGHT),
+                                   flags=cv2.INTER_LINEAR, borderValue=255)
+
+        # Marcadores ArUco con zona blanca alrededor (orden de IDs: ver ImageProcessor)
+        half = self.MARKER_SIZE // 2
+        quiet = 20
+        for marker_id, (cx, cy) in zip([0, 1, 3, 2], centers.astype(int)):
+            page[cy - half - quiet:cy + half + quiet, cx - half - quiet:cx + half + quiet] = 255
+            marker = cv2.aruco.generateImageMarker(self.aruco_dict, marker_id, self.MARKER_SIZE)
+            page[cy - half:cy - half + self.MARKER_SIZE, cx - half:cx - half + self.MARKER_SIZE] = marker
+
+        # Rotación e inclinación de toda la página
+        if rotation or skew:
+            page_corners = np.float32([[0, 0], [self.PAGE_WIDTH - 1, 0],
+                                       [self.PAGE_WIDTH - 1, self.PAGE_HEIGHT - 1],
+                                       [0, self.PAGE_HEIGHT - 1]])
+            center = np.float32([self.PAGE_WIDTH / 2, self.PAGE_HEIGHT / 2])
+            angle = np.deg2rad(self.rng.uniform(-rotation, rotation))
+            rot = np.float32([[np.cos(angle), -np.sin(angle)], [np.sin(angle), np.cos(angle)]])
+            moved = (page_corners - center) @ rot.T + center
+            moved += self.rng.uniform(-skew, skew, moved.shape).astype(np.float32)
+            matrix = cv2.getPerspectiveTransform(page_corners, moved.astype(np.float32))
+            page = cv2.warpPerspective(page, matrix, (self.PAGE_WIDTH, self.PAGE_HEIGHT),
+                                       flags=cv2.INTER_LINEAR, borderValue=255)
+
+        if noise:
+            noisy = page.astype(np.float32) + self.rng.normal(0, noise, page.shape).astype(np.float32)
+            page = np.clip(noisy, 0, 255).astype(np.uint8)
+
+        return page
+
+    @staticmethod
+    def write_pdf(path: str, pages: List[np.ndarray], jpeg_quality: int = 85):
+        """
+        Guarda páginas como un PDF escaneado (una imagen JPEG por página carta).
+
+        Args:
+            path: Ruta del PDF
+            pages: Páginas en escala de grises
+            jpeg_quality: Calidad JPEG (1-100)
+        """
+        doc = fitz.open()
+        try:
+            for page_image in pages:
+                ok, buffer = cv2.imencode('.jpg', page_image, [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality])
+                if not ok:
+                    raise ValueError("No se pudo codificar la página")
+                page = doc.new_page(width=612, height=792)
+                page.insert_image(page.rect, stream=buffer.tobytes())
+            doc.save(path)
+        finally:
+            doc.close()
+
+    def generate(self, output_dir: str, num_sheets: int, pages_per_pdf: int = 1,
+                 num_questions: int = MAX_QUESTIONS, blank_rate: float = 0.05,
+                 multiple_rate: float = 0.02, rotation: float = 0.0, skew: float = 0.0,
+                 noise: float = 0.0, stray_marks: int = 0, jpeg_quality: int = 85) -> List[Dict]:
+        """
+        Genera un conjunto de PDFs sintéticos y su ground_truth.json.
+
+        Args:
+            output_dir: Carpeta de salida
+            num_sheets: Cantidad total de hojas (páginas)
+            pages_per_pdf: Hojas por PDF (> 1 simula lotes escaneados en un solo archivo)
+            num_questions: Preguntas respondidas por hoja
+            blank_rate: Probabilidad de pregunta en blanco
+            multiple_rate: Probabilidad de múltiple marca
+            rotation: Rotación máxima en grados
+            skew: Inclinación máxima en píxeles por esquina
+            noise: Desviación estándar del ruido
+            stray_marks: Trazos sueltos por hoja
+            jpeg_quality: Calidad JPEG de las páginas
+
+        Returns:
+            Lista con el resultado esperado de cada página:
+            {'pdf_path', 'page_number', 'matricula', 'respuestas'}
+        """
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+        ground_truth = []
+        pdf_index = 0
+        for start in range(0, num_sheets, pages_per_pdf):
+            pdf_index += 1
+            pdf_path = output_dir / f"hojas_{pdf_index:04d}.pdf"
+            pages = []
+            for page_number in range(min(pages_per_pdf, num_sheets - start)):
+                answers = self.random_answers(num_questions, blank_rate, multiple_rate)
+                pages.append(self.draw_page(self.draw_sheet(answers), rotation, skew,
+                                            noise, stray_marks))
+                ground_truth.append({
+                    'pdf_path': str(pdf_path),
+                    'page_number': page_number,
+                    'matricula': answers['matricula'],
+                    'respuestas': answers['respuestas']
+                })
+            self.write_pdf(str(pdf_path), pages, jpeg_quality)
+
+        with open(output_dir / "ground_truth.json", 'w', encoding='utf-8') as f:
+            json.dump(ground_truth, f, ensure_ascii=False, indent=1)
+
+        return ground_truth
+
+
+def add_generator_arguments(parser: argparse.ArgumentParser):
+    """Agrega las opciones del generador a un parser de argumentos."""
+    parser.add_argument('--hojas', type=int, default=20, help="Cantidad de hojas (default: 20)")
+    parser.add_argument('--paginas-por-pdf', type=int, default=1,
+                        help="Hojas por PDF (default: 1)")
+    parser.add_argument('--preguntas', type=int, default=MAX_QUESTIONS,
+                        help=f"Preguntas respondidas por hoja (default: {MAX_QUESTIONS})")
+    parser.add_argument('--en-blanco', type=float, default=0.05,
+                        help="Probabilidad de pregunta en blanco (default: 0.05)")
+    parser.add_argument('--multiples', type=float, default=0.02,
+                        help="Probabilidad de múltiple marca (default: 0.02)")
+    parser.add_argument('--rotacion', type=float, default=1.0,
+                        help="Rotación máxima en grados (default: 1.0)")
+    parser.add_argument('--inclinacion', type=float, default=15.0,
+                        help="Desplazamiento máximo de cada esquina en píxeles (default: 15)")
+    parser.add_argument('--ruido', type=float, default=6.0,
+                        help="Desviación estándar del ruido gaussiano (default: 6)")
+    parser.add_argument('--marcas-sueltas', type=int, default=5,
+                        help="Trazos sueltos por hoja (default: 5)")
+    parser.add_argument('--calidad-jpeg', type=int, default=85,
+                        help="Calidad JPEG de las páginas (default: 85)")
+    parser.add_argument('--semilla', type=int, default=0, help="Semilla aleatoria (default: 0)")
+    parser.add_argument('--calibracion', default=str(DEFAULT_CALIBRATION_FILE),
+                        help="Archivo de calibración")
+
+
+def generate_from_args(args: argparse.Namespace, output_dir: str) -> List[Dict]:
+    """
+    Genera las hojas según las opciones de add_generator_arguments().
+
+    Args:
+        args: Argumentos procesados
+        output_dir: Carpeta de salida
+
+    Returns:
+        Ground truth de las páginas generadas
+    """
+    generator = SyntheticSheetGenerator(args.calibracion, seed=args.semilla)
+    return generator.generate(
+        output_dir,
+        num_sheets=args.hojas,
+        pages_per_pdf=args.paginas_por_pdf,
+        num_questions=args.preguntas,
+        blank_rate=args.en_blanco,
+        multiple_rate=args.multiples,
+        rotation=args.rotacion,
+        skew=args.inclinacion,
+        noise=args.ruido,
+        stray_marks=args.marcas_sueltas,
+        jpeg_quality=args.calidad_jpeg
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Función principal del script."""
+    parser = argparse.ArgumentParser(description="Genera hojas de respuesta sintéticas.")
+    parser.add_argument('salida', help="Carpeta donde guardar los PDFs y ground_truth.json")
+    add_generator_arguments(parser)
+    args = parser.parse_args(argv)
+
+    ground_truth = generate_from_args(args, args.salida)
+    pdfs = len({entry['pdf_path'] for entry in ground_truth})
+    print(f"✓ {len(ground_truth)} hojas en {pdfs} PDF(s): {args.salida}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
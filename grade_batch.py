@@ -0,0 +1,344 @@
+"""
+Script para calificar PDFs escaneados sin interfaz gráfica.
+
+Ejecuta el mismo pipeline que la pestaña de Calificación
+(PDFProcessor → ImageProcessor → OMRDetector → GradeCalculator → ExcelHandler)
+usando varios procesos, escribe un archivo JSON con el resultado de cada
+página e imprime un resumen de rendimiento. No importa ningún módulo de la
+interfaz, por lo que funciona en servidores sin pantalla (cron, etc.).
+
+Las hojas con confianza < 99% no se guardan en Excel: quedan marcadas con
+"needs_review" en el archivo de resultados para revisarlas en la aplicación.
+
+Las páginas terminadas se registran (ver JobLedger); si el lote se interrumpe,
+volver a ejecutar el mismo comando solo procesa las páginas que faltan. Al
+recalificar los mismos escaneos con otra pauta, la detección de cada página se
+toma del caché de detecciones (ver DetectionCache).
+
+Uso:
+    python grade_batch.py <pdf_o_carpeta> [...] --pauta <pauta> [opciones]
+
+Ejemplos:
+    python grade_batch.py escaneos/ --pauta pauta.json --excel curso.xlsx --prueba "Prueba 1"
+    python grade_batch.py hoja1.pdf hoja2.pdf --pauta ABCDEABCDE --salida resultados.json
+
+La pauta puede ser un archivo JSON ({"1": "A", "2": "C", ...}) o un texto con
+una letra por pregunta ("ABCDE...").
+
+Author: Gerson
+Date: 2025
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from src.core.excel_handler import ExcelHandler
+from src.core.grading_pipeline import (build_pipeline_settings, iter_page_results,
+                                       resolve_num_workers, save_result_to_excel)
+from src.core.job_ledger import JobLedger
+from src.core.pipeline_stats import PipelineStats
+from src.core.pdf_processor import PDFProcessor
+from src.utils.constants import (ALTERNATIVES, DEFAULT_FILL_STRATEGY, DEFAULT_IMAGE_FORMAT,
+                                 DEFAULT_IMAGE_QUALITY, DEFAULT_MAX_GRADE, DEFAULT_MIN_GRADE,
+                                 DEFAULT_NUM_WORKERS, DEFAULT_PASSING_GRADE,
+                                 DEFAULT_PASSING_PERCENTAGE, FILL_STRATEGIES, IMAGE_FORMATS,
+                                 MAX_QUESTIONS)
+
+
+# Calibración incluida en el repositorio (independiente del directorio actual)
+DEFAULT_CALIBRATION_FILE = Path(__file__).resolve().parent / "config" / "calibration_data.json"
+
+# Campos del resultado de cada página que se escriben en el archivo de salida
+RESULT_FIELDS = [
+    'filename', 'pdf_path', 'page_number', 'total_pages', 'success', 'matricula',
+    'respuestas', 'correctas', 'incorrectas', 'en_blanco', 'nota', 'confidence', 'needs_review',
+    'saved_to_excel', 'image_path', 'image_saved', 'render_path', 'from_detection_cache',
+    'from_ledger', 'message'
+]
+
+
+def load_answer_key(value: str) -> Dict[int, str]:
+    """
+    Carga la pauta desde un archivo JSON o desde un texto de letras.
+
+    Args:
+        value: Ruta a un JSON {pregunta: alternativa} o texto "ABCDE..."
+
+    Returns:
+        Diccionario {pregunta: alternativa}
+
+    Raises:
+        ValueError: Si la pauta no es válida
+    """
+    if Path(value).is_file():
+        with open(value, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        answer_key = {int(pregunta): str(alternativa).upper()
+                      for pregunta, alternativa in data.items()}
+    else:
+        answer_key = {i: letra for i, letra in enumerate(value.strip().upper(), start=1)}
+
+    if not answer_key:
+        raise ValueError("La pauta está vacía")
+
+    for pregunta, alternativa in answer_key.items():
+        if not 1 <= pregunta <= MAX_QUESTIONS:
+            raise ValueError(f"Pregunta fuera de rango en la pauta: {pregunta}")
+        if alternativa not in ALTERNATIVES:
+            raise ValueError(f"Alternativa inválida en la pauta (pregunta {pregunta}): {alternativa}")
+
+    return answer_key
+
+
+def collect_pdfs(inputs: List[str]) -> List[str]:
+    """
+    Expande carpetas y valida la lista de PDFs de entrada.
+
+    Args:
+        inputs: Rutas a PDFs o carpetas con PDFs
+
+    Returns:
+        Lista de rutas a PDFs (sin duplicados, en orden)
+    """
+    pdfs = []
+    for entry in inputs:
+        path = Path(entry)
+        if path.is_dir():
+            pdfs.extend(sorted(str(p) for p in path.iterdir() if p.suffix.lower() == '.pdf'))
+        elif path.is_file():
+            pdfs.append(str(path))
+        else:
+            print(f"⚠️ No se encontró: {entry}")
+
+    return list(dict.fromkeys(pdfs))
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Define y procesa los argumentos de línea de comandos."""
+    parser = argparse.ArgumentParser(
+        description="Califica PDFs escaneados de hojas de respuesta sin interfaz gráfica."
+    )
+    parser.add_argument('entradas', nargs='+', help="PDFs o carpetas con PDFs")
+    parser.add_argument('--pauta', required=True,
+                        help="Archivo JSON de pauta o texto con una letra por pregunta")
+    parser.add_argument('--preguntas', type=int, default=None,
+                        help="Cantidad de preguntas (default: largo de la pauta)")
+    parser.add_argument('--exigencia', type=float, default=DEFAULT_PASSING_PERCENTAGE,
+                        help=f"Porcentaje de exigencia (default: {DEFAULT_PASSING_PERCENTAGE})")
+    parser.add_argument('--nota-minima', type=float, default=DEFAULT_MIN_GRADE)
+    parser.add_argument('--nota-maxima', type=float, default=DEFAULT_MAX_GRADE)
+    parser.add_argument('--nota-aprobacion', type=float, default=DEFAULT_PASSING_GRADE)
+    parser.add_argument('--excel', help="Archivo Excel del curso donde guardar las notas")
+    parser.add_argument('--prueba', default='Prueba',
+                        help="Nombre de la prueba (columna de Excel y carpeta de overlays)")
+    parser.add_argument('--procesos', type=int, default=DEFAULT_NUM_WORKERS,
+                        help="Procesos en paralelo (0 = automático según núcleos)")
+    parser.add_argument('--salida', default=None,
+                        help="Archivo JSON de resultados (default: resultados_<prueba>.json)")
+    parser.add_argument('--calibracion', default=str(DEFAULT_CALIBRATION_FILE),
+                        help="Archivo de calibración")
+    parser.add_argument('--registro', default=None,
+                        help=f"Registro de páginas calificadas (default: {JobLedger.DEFAULT_PATH})")
+    parser.add_argument('--sin-registro', action='store_true',
+                        help="Procesar todas las páginas sin usar ni actualizar el registro")
+    parser.add_argument('--sin-cache', action='store_true',
+                        help="Detectar todas las páginas sin usar el caché de detecciones")
+    parser.add_argument('--reescribir-imagenes', action='store_true',
+                        help="Volver a generar las imágenes de resultado que ya existen "
+                             "(p. ej. para que reflejen una pauta corregida)")
+    parser.add_argument('--estrategia-relleno', '--fill-strategy', choices=FILL_STRATEGIES,
+                        default=DEFAULT_FILL_STRATEGY,
+                        help=f"Medición del relleno de los círculos (default: {DEFAULT_FILL_STRATEGY})")
+    parser.add_argument('--formato-imagen', choices=IMAGE_FORMATS, default=DEFAULT_IMAGE_FORMAT,
+                        help=f"Formato de las imágenes de resultado (default: {DEFAULT_IMAGE_FORMAT})")
+    parser.add_argument('--calidad-imagen', type=int, default=DEFAULT_IMAGE_QUALITY,
+                        help=f"Calidad JPEG/WebP de 1 a 100 (default: {DEFAULT_IMAGE_QUALITY})")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    """
+    Función principal del script.
+
+    Returns:
+        Código de salida: 0 si todas las páginas se procesaron, 1 si hubo errores
+    """
+    args = parse_args(argv)
+
+    if not 1 <= args.calidad_imagen <= 100:
+        print("❌ La calidad de imagen debe estar entre 1 y 100")
+        return 2
+
+    # Pauta y parámetros de calificación
+    try:
+        answer_key = load_answer_key(args.pauta)
+    except (ValueError, OSError) as e:
+        print(f"❌ Error en la pauta: {e}")
+        return 2
+
+    num_questions = args.preguntas or max(answer_key)
+
+    excel_handler = None
+    if args.excel:
+        try:
+            excel_handler = ExcelHandler(args.excel, write_behind=True)
+        except Exception as e:
+            print(f"❌ {e}")
+            return 2
+
+    app_data = {
+        'answer_key': answer_key,
+        'num_questions': num_questions,
+        'passing_percentage': args.exigencia,
+        'min_grade': args.nota_minima,
+        'max_grade': args.nota_maxima,
+        'passing_grade': args.nota_aprobacion,
+        'test_name': args.prueba,
+        'excel_handler': excel_handler,
+        'fill_strategy': args.estrategia_relleno,
+        'rewrite_overlays': args.reescribir_imagenes,
+        'image_format': args.formato_imagen,
+        'image_quality': args.calidad_imagen
+    }
+    settings = build_pipeline_settings(app_data)
+    settings['detection_cache'] = not args.sin_cache
+
+    # Páginas a procesar
+    pdf_processor = PDFProcessor()
+    tasks = []
+    for pdf_path in collect_pdfs(args.entradas):
+        page_count = pdf_processor.get_page_count(pdf_path)
+        if page_count == 0:
+            print(f"⚠️ PDF sin páginas o inválido: {pdf_path}")
+            continue
+        tasks.extend((pdf_path, page_number, page_count) for page_number in range(page_count))
+
+    if not tasks:
+        print("❌ No hay páginas para procesar")
+        return 2
+
+    # Páginas terminadas en ejecuciones anteriores
+    ledger = None
+    context = None
+    pdf_hashes = {}
+    restored = {}
+    if not args.sin_registro:
+        ledger = JobLedger(args.registro)
+        context = ledger.context_hash(settings, args.excel, str(args.calibracion))
+        pdf_hashes, restored = ledger.find_completed(tasks, context)
+
+    num_workers = min(resolve_num_workers(args.procesos), max(1, len(tasks) - len(restored)))
+    print(f"📄 {len(tasks)} páginas | {num_workers} proceso(s) | pauta de {num_questions} preguntas")
+    if restored:
+        print(f"♻️ {len(restored)} página(s) recuperadas de una ejecución anterior")
+    if excel_handler:
+        existing = excel_handler.check_existing_grades(list(excel_handler.students), args.prueba)
+        if existing:
+            print(f"ℹ️ {len(existing)} estudiante(s) ya tienen nota en '{args.prueba}' "
+                  "(no se sobrescriben)")
+
+    # Procesar (los resultados llegan en orden de finalización; Excel se
+    # escribe en el orden de entrada, igual que en la aplicación)
+    results = [None] * len(tasks)
+    next_index = 0
+    start_time = time.perf_counter()
+    run_stats = PipelineStats()
+
+    for index, result in iter_page_results(tasks, settings, num_workers, str(args.calibracion),
+                                           completed=restored):
+        page_stats = result.pop('stats', None)
+        if result.get('from_ledger'):
+            run_stats.count('pages_restored')
+        else:
+            run_stats.merge(page_stats)
+
+        results[index] = result
+        while next_index < len(results) and results[next_index] is not None:
+            current = results[next_index]
+            # Las páginas recuperadas del registro ya se guardaron en Excel
+            if not current.get('from_ledger'):
+                if excel_handler is not None:
+                    save_result_to_excel(current, excel_handler, args.prueba, run_stats)
+                if ledger is not None and current['pdf_path'] in pdf_hashes:
+                    ledger.record(pdf_hashes[current['pdf_path']], context, current)
+            status = "✅" if current['success'] and not current.get('needs_review') else (
+                "⚠️" if current['success'] else "❌")
+            if current.get('from_ledger'):
+                status = "♻️"
+            print(f"{status} [{next_index + 1}/{len(tasks)}] {current['filename']}: "
+                  f"{current.get('matricula')} | nota {current.get('nota', 0.0):.1f} | "
+                  f"{current['message']}")
+            next_index += 1
+
+    if excel_handler is not None:
+        with run_stats.stage('excel_flush'):
+            flush_result = excel_handler.flush()
+        if not flush_result['success']:
+            print(f"❌ {flush_result['message']}")
+        excel_handler.close()
+
+    if ledger is not None:
+        ledger.close()
+
+    elapsed = time.perf_counter() - start_time
+    run_stats.finish()
+
+    # Archivo de resultados
+    output_path = Path(args.salida or f"resultados_{args.prueba}.json")
+    successful = sum(1 for r in results if r['success'])
+    needs_review = sum(1 for r in results if r['success'] and r.get('needs_review'))
+    saved = sum(1 for r in results if r.get('saved_to_excel'))
+    embedded = sum(1 for r in results if r.get('render_path') == PDFProcessor.PATH_EMBEDDED)
+    from_cache = sum(1 for r in results if r.get('from_detection_cache') and not r.get('from_ledger'))
+
+    summary = {
+        'test_name': args.prueba,
+        'pages': len(results),
+        'successful': successful,
+        'failed': len(results) - successful,
+        'needs_review': needs_review,
+        'saved_to_excel': saved,
+        'from_ledger': len(restored),
+        'from_detection_cache': from_cache,
+        'workers': num_workers,
+        'elapsed_seconds': round(elapsed, 3),
+        'pages_per_second': round(len(results) / elapsed, 3) if elapsed > 0 else None
+    }
+    output = {
+        'summary': summary,
+        'stats': run_stats.to_dict(),
+        'results': [{field: r.get(field) for field in RESULT_FIELDS} for r in results]
+    }
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(output, f, ensure_ascii=False, indent=2)
+
+    # Resumen
+    print("\n" + "=" * 80)
+    print("RESUMEN")
+    print("=" * 80)
+    print(f"Páginas procesadas: {len(results)}")
+    print(f"Exitosas: {successful} | Con errores: {len(results) - successful}")
+    print(f"Requieren revisión manual: {needs_review}")
+    if restored:
+        print(f"Recuperadas de ejecuciones anteriores: {len(restored)}")
+    if excel_handler is not None:
+        print(f"Guardadas en Excel: {saved}")
+    print(f"Páginas leídas desde la imagen escaneada: {embedded}/{len(results)}")
+    if from_cache:
+        print(f"Detecciones recuperadas del caché: {from_cache}")
+    print(f"Tiempo total: {elapsed:.1f} s | {summary['pages_per_second']} páginas/s "
+          f"con {num_workers} proceso(s)")
+    print("\nTiempos por etapa (suma de todas las páginas):")
+    for line in run_stats.summary_lines():
+        print(f"  {line}")
+    print(f"Resultados: {output_path}")
+
+    return 0 if successful == len(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
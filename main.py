@@ -4,6 +4,7 @@ Punto de entrada principal de la aplicación
 """
 
 import sys
+import multiprocessing
 import customtkinter as ctk
 from src.ui.main_window import MainWindow
 
@@ -20,6 +21,9 @@ def main():
 
 
 if __name__ == "__main__":
+    # Necesario para el pool de procesos de calificación en ejecutables congelados (Windows)
+    multiprocessing.freeze_support()
+
     try:
         main()
     except KeyboardInterrupt:
@@ -0,0 +1,161 @@
+"""
+Script para medir el tiempo de inicio de la aplicación.
+
+Cada medición se hace en un intérprete nuevo (sin módulos en caché de
+memoria) y se repite varias veces para reportar la mediana:
+
+1. Importación de la interfaz (src.ui.main_window) y qué librerías pesadas
+   (OpenCV, PyMuPDF, openpyxl, numpy) quedan cargadas antes de mostrar la ventana
+2. Creación de la ventana principal hasta que se dibuja (requiere pantalla)
+3. Precalentamiento en segundo plano: importar el pipeline y cargar la calibración
+
+Uso:
+    python measure_startup.py [--repeticiones N] [--limite-ms MS]
+
+Con --limite-ms el script termina con código 1 si la importación de la
+interfaz supera ese tiempo (útil para detectar regresiones).
+
+Author: Gerson
+Date: 2025
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+PROJECT_DIR = Path(__file__).resolve().parent
+
+# Librerías que no deberían cargarse antes de mostrar la ventana
+HEAVY_MODULES = ['cv2', 'fitz', 'openpyxl', 'numpy']
+
+IMPORT_CODE = """
+import json, sys, time
+start = time.perf_counter()
+import customtkinter
+import src.ui.main_window
+elapsed = time.perf_counter() - start
+print(json.dumps({'seconds': elapsed,
+                  'heavy': [m for m in %r if m in sys.modules]}))
+""" % (HEAVY_MODULES,)
+
+WINDOW_CODE = """
+import json, time
+start = time.perf_counter()
+import customtkinter as ctk
+from src.ui.main_window import MainWindow
+app = MainWindow()
+app.update()
+elapsed = time.perf_counter() - start
+app.destroy()
+print(json.dumps({'seconds': elapsed}))
+"""
+
+WARM_UP_CODE = """
+import json, time
+start = time.perf_counter()
+from src.core.pdf_processor import PDFProcessor
+from src.core.omr_detector import OMRDetector
+import src.core.excel_handler
+import src.core.grading_pipeline
+PDFProcessor(dpi=300)
+OMRDetector()
+elapsed = time.perf_counter() - start
+print(json.dumps({'seconds': elapsed}))
+"""
+
+
+def run_measurement(code: str) -> Optional[Dict]:
+    """
+    Ejecuta un fragmento de código en un intérprete nuevo.
+
+    Args:
+        code: Código que imprime un JSON con la medición en la última línea
+
+    Returns:
+        Diccionario con la medición o None si falló
+    """
+    completed = subprocess.run(
+        [sys.executable, '-c', code],
+        cwd=PROJECT_DIR,
+        capture_output=True,
+        text=True
+    )
+    if completed.returncode != 0 or not completed.stdout.strip():
+        return None
+
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def measure(code: str, repetitions: int) -> Optional[List[Dict]]:
+    """Repite una medición; retorna None si alguna ejecución falla."""
+    results = []
+    for _ in range(repetitions):
+        result = run_measurement(code)
+        if result is None:
+            return None
+        results.append(result)
+    return results
+
+
+def median_ms(results: List[Dict]) -> float:
+    """Mediana en milisegundos de una serie de mediciones."""
+    return statistics.median(r['seconds'] for r in results) * 1000
+
+
+def main(argv=None) -> int:
+    """Función principal del script."""
+    parser = argparse.ArgumentParser(description="Mide el tiempo de inicio de Test Scanner.")
+    parser.add_argument('--repeticiones', type=int, default=5,
+                        help="Ejecuciones por medición (default: 5)")
+    parser.add_argument('--limite-ms', type=float, default=None,
+                        help="Tiempo máximo aceptable para importar la interfaz")
+    args = parser.parse_args(argv)
+
+    print("=" * 80)
+    print("TIEMPO DE INICIO")
+    print("=" * 80)
+
+    # 1. Importación de la interfaz
+    import_results = measure(IMPORT_CODE, args.repeticiones)
+    if import_results is None:
+        print("❌ No se pudo importar la interfaz")
+        return 1
+
+    import_ms = median_ms(import_results)
+    heavy = sorted(set(m for r in import_results for m in r['heavy']))
+    print(f"Importar interfaz:            {import_ms:8.1f} ms")
+    if heavy:
+        print(f"⚠️ Librerías pesadas cargadas antes de la ventana: {', '.join(heavy)}")
+    else:
+        print("✓ Ninguna librería pesada se carga antes de la ventana")
+
+    # 2. Ventana principal (solo si hay pantalla)
+    window_results = measure(WINDOW_CODE, args.repeticiones)
+    if window_results is None:
+        print("Ventana principal visible:    (omitido: sin pantalla disponible)")
+    else:
+        print(f"Ventana principal visible:    {median_ms(window_results):8.1f} ms")
+
+    # 3. Precalentamiento en segundo plano
+    warm_up_results = measure(WARM_UP_CODE, args.repeticiones)
+    if warm_up_results is None:
+        print("Precalentamiento:             (falló: ¿falta config/calibration_data.json?)")
+    else:
+        print(f"Precalentamiento (2º plano):  {median_ms(warm_up_results):8.1f} ms")
+
+    print(f"\n(mediana de {args.repeticiones} ejecuciones en intérpretes nuevos)")
+
+    if args.limite_ms is not None and import_ms > args.limite_ms:
+        print(f"❌ La importación de la interfaz supera el límite de {args.limite_ms:.0f} ms")
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,7 +2,16 @@
 Módulo de lógica central
 """
 
-from .grade_calculator import GradeCalculator
-from .excel_handler import ExcelHandler
+__all__ = ['GradeCalculator', 'ExcelHandler']
 
-__all__ = ['GradeCalculator', 'ExcelHandler']
\ No newline at end of file
+
+def __getattr__(name):
+    # Importación diferida: evita cargar openpyxl al importar cualquier
+    # submódulo de src.core (interfaz, procesos de trabajo, CLI)
+    if name == 'GradeCalculator':
+        from .grade_calculator import GradeCalculator
+        return GradeCalculator
+    if name == 'ExcelHandler':
+        from .excel_handler import ExcelHandler
+        return ExcelHandler
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
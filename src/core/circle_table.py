@@ -0,0 +1,298 @@
+"""
+Módulo con la tabla compilada de círculos de la hoja de respuestas.
+
+Convierte las listas de diccionarios de calibration_data.json en arrays
+de numpy e índices precalculados, para que la detección, el overlay y la
+revisión manual accedan a cada círculo sin recorrer listas.
+
+Author: Gerson
+Date: 2025
+"""
+
+import cv2
+import numpy as np
+from typing import Dict, Optional, Tuple
+from ..utils.constants import (
+    ALTERNATIVES,
+    MATRICULA_DIGITS,
+    MAX_QUESTIONS
+)
+
+
+class CircleTable:
+    """
+    Tabla de círculos compilada una sola vez a partir de los datos de calibración.
+
+    Los círculos se numeran en orden de calibración: primero los de matrícula
+    (índices 0..num_matricula-1) y luego los de respuestas.
+
+    Atributos principales:
+    - x, y, radius: arrays (N,) con centro y radio de cada círculo
+    - effective_radius: array (N,) con el radio analizado para medir el relleno
+    - matricula_index: array (10, 10) [columna - 1, dígito] -> índice de círculo (-1 si no existe)
+    - respuestas_index: array (100, 5) [pregunta - 1, alternativa] -> índice de círculo (-1 si no existe)
+    - stencils: {radio_efectivo: (dy, dx)} desplazamientos de los píxeles de cada disco
+    - spans: {radio_efectivo: (dy, x0, x1)} el mismo disco descrito como tramos horizontales
+    - buckets: {(columna, fila): índices} grilla de celdas para ubicar el círculo bajo un punto
+    """
+
+    # Distancia máxima (en radios) de un click al centro para seleccionar el círculo
+    HIT_RADIUS_RATIO = 1.5
+
+    def __init__(self, calibration_data: Dict, radius_ratio: float = 0.7):
+        """
+        Compila los datos de calibración.
+
+        Args:
+            calibration_data: Diccionario cargado desde calibration_data.json
+            radius_ratio: Fracción del radio calibrado que se analiza
+
+        Raises:
+            ValueError: Si la calibración contiene círculos duplicados o fuera de rango
+        """
+        matricula = calibration_data['matricula']
+        respuestas = calibration_data['respuestas']
+        circles = matricula + respuestas
+
+        self.num_matricula = len(matricula)
+        self.num_circles = len(circles)
+
+        self.x = np.array([c['x'] for c in circles], dtype=np.intp)
+        self.y = np.array([c['y'] for c in circles], dtype=np.intp)
+        self.radius = np.array([c['radius'] for c in circles], dtype=np.intp)
+        self.effective_radius = (self.radius * radius_ratio).astype(np.intp)
+
+        # Índice de matrícula: [columna - 1, dígito]
+        self.matricula_index = np.full((MATRICULA_DIGITS, 10), -1, dtype=np.intp)
+        for i, circle in enumerate(matricula):
+            self._set_index(self.matricula_index, circle['columna'] - 1, circle['digito'], i,
+                            f"matrícula columna {circle['columna']}, dígito {circle['digito']}")
+
+        # Índice de respuestas: [pregunta - 1, posición de la alternativa]
+        self.respuestas_index = np.full((MAX_QUESTIONS, len(ALTERNATIVES)), -1, dtype=np.intp)
+        for i, circle in enumerate(respuestas, start=self.num_matricula):
+            if circle['alternativa'] not in ALTERNATIVES:
+                raise ValueError(f"Alternativa inválida en calibración: {circle['alternativa']}")
+            self._set_index(self.respuestas_index, circle['pregunta'] - 1,
+                            ALTERNATIVES.index(circle['alternativa']), i,
+                            f"pregunta {circle['pregunta']}, alternativa {circle['alternativa']}")
+
+        # Stencils de disco por radio efectivo
+        self.stencils = {
+            int(r): self.disk_offsets(int(r)) for r in np.unique(self.effective_radius)
+        }
+        self.spans = {
+            r: self.disk_spans(r) for r in self.stencils
+        }
+
+        # Etiqueta de cada círculo: fila y columna en matricula_index o respuestas_index
+        self.label_row = np.array([c['columna'] - 1 for c in matricula] +
+                                  [c['pregunta'] - 1 for c in respuestas], dtype=np.intp)
+        self.label_col = np.array([c['digito'] for c in matricula] +
+                                  [ALTERNATIVES.index(c['alternativa']) for c in respuestas],
+                                  dtype=np.intp)
+
+        # Índice espacial para ubicar círculos por coordenadas (ver hit_test)
+        self.bucket_size, self.buckets = self._build_buckets()
+
+    @staticmethod
+    def _set_index(index: np.ndarray, row: int, col: int, value: int, label: str):
+        """Registra un círculo en un índice, validando rango y duplicados."""
+        if not (0 <= row < index.shape[0] and 0 <= col < index.shape[1]):
+            raise ValueError(f"Círculo fuera de rango en calibración: {label}")
+        if index[row, col] != -1:
+            raise ValueError(f"Círculo duplicado en calibración: {label}")
+        index[row, col] = value
+
+    @staticmethod
+    def disk_offsets(radius: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Calcula los desplazamientos (dy, dx) de los píxeles de un disco relleno.
+
+        El disco se rasteriza con cv2.circle, igual que una máscara dibujada sobre
+        la imagen completa, por lo que los píxeles considerados son los mismos.
+
+        Args:
+            radius: Radio del disco en píxeles
+
+        Returns:
+            Tupla (dy, dx) con los desplazamientos respecto al centro
+        """
+        size = 2 * radius + 1
+        patch = np.zeros((size, size), dtype=np.uint8)
+        cv2.circle(patch, (radius, radius), radius, 255, -1)
+        dy, dx = np.nonzero(patch)
+        return dy - radius, dx - radius
+
+    @staticmethod
+    def disk_spans(radius: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Describe un disco relleno como tramos horizontales, uno por fila.
+
+        Cada fila de un disco es contigua, por lo que su suma se obtiene con
+        cuatro accesos a una tabla de áreas acumuladas (integral image).
+
+        Args:
+            radius: Radio del disco en píxeles
+
+        Returns:
+            Tupla (dy, x0, x1): fila relativa al centro y columnas inicial y final
+            (inclusive) del tramo de esa fila
+        """
+        dy, dx = CircleTable.disk_offsets(radius)
+        rows = np.unique(dy)
+        x0 = np.array([dx[dy == row].min() for row in rows], dtype=np.intp)
+        x1 = np.array([dx[dy == row].max() for row in rows], dtype=np.intp)
+        return rows.astype(np.intp), x0, x1
+
+    def _build_buckets(self) -> Tuple[int, Dict[Tuple[int, int], np.ndarray]]:
+        """
+        Reparte los círculos en una grilla de celdas cuadradas.
+
+        Cada círculo se registra en todas las celdas que toca su zona de
+        selección (HIT_RADIUS_RATIO veces su radio), por lo que para un punto
+        basta revisar los pocos círculos de su celda.
+
+        Returns:
+            Tupla (tamaño de celda, {(columna, fila): índices de círculos})
+        """
+        if self.num_circles == 0:
+            return 1, {}
+
+        reach = np.ceil(self.radius * self.HIT_RADIUS_RATIO).astype(np.intp)
+        bucket_size = max(1, int(2 * reach.max()))
+
+        cells = {}
+        for index in range(self.num_circles):
+            x, y, r = self.x[index], self.y[index], reach[index]
+            for cell_y in range((y - r) // bucket_size, (y + r) // bucket_size + 1):
+                for cell_x in range((x - r) // bucket_size, (x + r) // bucket_size + 1):
+                    cells.setdefault((int(cell_x), int(cell_y)), []).append(index)
+
+        buckets = {cell: np.array(indices, dtype=np.intp) for cell, indices in cells.items()}
+        return bucket_size, buckets
+
+    def hit_test(self, x: float, y: float) -> Optional[int]:
+        """
+        Busca el círculo seleccionado por un punto (por ejemplo, un click).
+
+        Un círculo se selecciona si el punto está a menos de HIT_RADIUS_RATIO
+        veces su radio del centro. Si varios cumplen, gana un círculo de
+        matrícula sobre uno de respuestas y luego el más cercano.
+
+        Args:
+            x, y: Coordenadas del punto en la imagen corregida
+
+        Returns:
+            Índice del círculo o None si el punto no está sobre ninguno
+        """
+        candidates = self.buckets.get((int(x // self.bucket_size), int(y // self.bucket_size)))
+        if candidates is None:
+            return None
+
+        distances = np.hypot(self.x[candidates] - x, self.y[candidates] - y)
+        inside = distances <= self.radius[candidates] * self.HIT_RADIUS_RATIO
+        if not inside.any():
+            return None
+
+        candidates = candidates[inside]
+        distances = distances[inside]
+        is_respuesta = candidates >= self.num_matricula
+        best = np.lexsort((distances, is_respuesta))[0]
+        return int(candidates[best])
+
+    def is_matricula(self, index: int) -> bool:
+        """Indica si un círculo pertenece a la matrícula."""
+        return index < self.num_matricula
+
+    def matricula_label(self, index: int) -> Tuple[int, int]:
+        """
+        Obtiene la columna y el dígito de un círculo de matrícula.
+
+        Args:
+            index: Índice de un círculo de matrícula
+
+        Returns:
+            Tupla (columna 1-indexada, dígito)
+        """
+        return int(self.label_row[index]) + 1, int(self.label_col[index])
+
+    def respuesta_label(self, index: int) -> Tuple[int, str]:
+        """
+        Obtiene la pregunta y la alternativa de un círculo de respuestas.
+
+        Args:
+            index: Índice de un círculo de respuestas
+
+        Returns:
+            Tupla (pregunta, alternativa)
+        """
+        return int(self.label_row[index]) + 1, ALTERNATIVES[self.label_col[index]]
+
+    def matricula_circle(self, columna: int, digito: int) -> Optional[int]:
+        """
+        Obtiene el índice del círculo de matrícula.
+
+        Args:
+            columna: Columna de la matrícula (1-10)
+            digito: Dígito (0-9)
+
+        Returns:
+            Índice del círculo o None si no existe
+        """
+        if not (1 <= columna <= self.matricula_index.shape[0] and 0 <= digito <= 9):
+            return None
+        index = self.matricula_index[columna - 1, digito]
+        return int(index) if index >= 0 else None
+
+    def respuesta_circle(self, pregunta: int, alternativa: str) -> Optional[int]:
+        """
+        Obtiene el índice del círculo de una alternativa.
+
+        Args:
+            pregunta: Número de pregunta (1-100)
+            alternativa: Letra de la alternativa ('A'-'E')
+
+        Returns:
+            Índice del círculo o None si no existe
+        """
+        if not (1 <= pregunta <= self.respuestas_index.shape[0]) or alternativa not in ALTERNATIVES:
+            return None
+        index = self.respuestas_index[pregunta - 1, ALTERNATIVES.index(alternativa)]
+        return int(index) if index >= 0 else None
+
+    def question_bounds(self, pregunta: int, padding: int = 0) -> Optional[Tuple[int, int, int, int]]:
+        """
+        Obtiene el rectángulo que contiene todas las alternativas de una pregunta.
+
+        Args:
+            pregunta: Número de pregunta (1-100)
+            padding: Píxeles a agregar en cada borde
+
+        Returns:
+            Tupla (x0, y0, x1, y1) o None si la pregunta no tiene círculos
+        """
+        if not 1 <= pregunta <= self.respuestas_index.shape[0]:
+            return None
+        index = self.respuestas_index[pregunta - 1]
+        index = index[index >= 0]
+        if len(index) == 0:
+            return None
+
+        radius = self.radius[index]
+        return (int((self.x[index] - radius).min()) - padding,
+                int((self.y[index] - radius).min()) - padding,
+                int((self.x[index] + radius).max()) + padding,
+                int((self.y[index] + radius).max()) + padding)
+
+    def circle(self, index: int) -> Tuple[int, int, int]:
+        """
+        Obtiene centro y radio de un círculo.
+
+        Args:
+            index: Índice del círculo
+
+        Returns:
+            Tupla (x, y, radio)
+        """
+        return int(self.x[index]), int(self.y[index]), int(self.radius[index])
@@ -0,0 +1,116 @@
+"""
+Módulo con el caché persistente de detecciones por página.
+
+Guarda, para cada página ya procesada, el porcentaje de relleno de todos los
+círculos y las esquinas de los marcadores ArUco. Al volver a calificar los
+mismos escaneos (por ejemplo, después de corregir la pauta o la escala de
+notas) la página no necesita detección ArUco ni medición OMR: la matrícula y
+las respuestas se recalculan desde los rellenos guardados y la imagen se
+corrige con las esquinas guardadas.
+
+Cada entrada se identifica por el hash del PDF, el número de página y una
+firma con todo lo que afecta a la detección (calibración, parámetros del
+detector, resolución de trabajo y modo de renderizado).
+
+Author: Gerson
+Date: 2025
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import zipfile
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+
+
+class DetectionCache:
+    """
+    Caché de detecciones en disco (un archivo .npz por página).
+
+    Es seguro usarlo desde varios procesos a la vez: cada entrada se escribe
+    en un archivo temporal y se reemplaza de forma atómica.
+    """
+
+    DEFAULT_DIR = Path.home() / ".test_scanner" / "detections"
+
+    # Incrementar si cambia la detección de marcadores (esquinas), el
+    # preprocesamiento o la medición del relleno
+    VERSION = 4
+
+    def __init__(self, signature: Dict, cache_dir: Optional[str] = None):
+        """
+        Inicializa el caché.
+
+        Args:
+            signature: Parámetros que afectan a la detección (debe ser serializable a JSON)
+            cache_dir: Carpeta del caché (default: ~/.test_scanner/detections)
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else self.DEFAULT_DIR
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        signature = dict(signature, version=self.VERSION)
+        self.signature_hash = hashlib.sha256(
+            json.dumps(signature, sort_keys=True).encode('utf-8')
+        ).hexdigest()
+
+    def _entry_path(self, pdf_hash: str, page_number: int) -> Path:
+        """Ruta del archivo de una página."""
+        key = hashlib.sha256(
+            f"{self.signature_hash}:{pdf_hash}:{page_number}".encode('utf-8')
+        ).hexdigest()
+        return self.cache_dir / key[:2] / f"{key}.npz"
+
+    def get(self, pdf_hash: str, page_number: int) -> Optional[Dict]:
+        """
+        Obtiene la detección guardada de una página.
+
+        Args:
+            pdf_hash: Hash del contenido del PDF
+            page_number: Número de página (0-indexed)
+
+        Returns:
+            Diccionario con 'fills' (porcentaje de relleno por círculo) y
+            'corners' (esquinas ordenadas de los marcadores), o None si no existe
+        """
+        path = self._entry_path(pdf_hash, page_number)
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                return {'fills': data['fills'], 'corners': data['corners']}
+        except FileNotFoundError:
+            return None
+        except (OSError, KeyError, ValueError, EOFError, zipfile.BadZipFile) as e:
+            # Quedó dañada (p. ej. truncada): se elimina y se vuelve a detectar
+            print(f"⚠️ Detección en caché dañada, se descarta: {e}")
+            try:
+                path.unlink(missing_ok=True)
+            except OSError:
+                pass
+            return None
+
+    def put(self, pdf_hash: str, page_number: int, fills: np.ndarray, corners: np.ndarray):
+        """
+        Guarda la detección de una página.
+
+        Args:
+            pdf_hash: Hash del contenido del PDF
+            page_number: Número de página (0-indexed)
+            fills: Array (N,) de OMRDetector.calculate_fill_percentages()
+            corners: Esquinas ordenadas de los marcadores (ver ImageProcessor)
+        """
+        path = self._entry_path(pdf_hash, page_number)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    np.savez(f, fills=fills, corners=corners)
+                os.replace(tmp_path, path)
+            except OSError:
+                Path(tmp_path).unlink(missing_ok=True)
+                raise
+        except OSError as e:
+            print(f"⚠️ No se pudo guardar la detección en caché: {e}")
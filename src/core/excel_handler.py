@@ -4,20 +4,33 @@ Manejador de archivos Excel para guardar y recuperar calificaciones
 
 import openpyxl
 from openpyxl.styles import Font, Alignment
+import json
 import os
+import time
 
 
 class ExcelHandler:
     """
     Maneja la lectura y escritura de calificaciones en archivos Excel
+
+    En modo write-behind las notas se acumulan en memoria y el archivo se
+    guarda cada FLUSH_EVERY notas, cada FLUSH_INTERVAL segundos o al llamar
+    a flush()/close(). Mientras tanto, cada nota queda registrada en un
+    journal junto al Excel ("<archivo>.journal"), que se vuelve a aplicar
+    al cargar el archivo si el programa se cerró sin guardar.
     """
-    
-    def __init__(self, filepath):
+
+    # Umbrales de guardado en modo write-behind
+    FLUSH_EVERY = 50  # Notas pendientes
+    FLUSH_INTERVAL = 30.0  # Segundos desde el último guardado
+
+    def __init__(self, filepath, write_behind=False):
         """
         Inicializa el manejador de Excel
         
         Args:
             filepath: Ruta del archivo Excel
+            write_behind: Si es True, las notas se guardan en lotes (ver flush)
         """
         self.filepath = filepath
         self.workbook = None
@@ -25,6 +38,14 @@ class ExcelHandler:
         self.students = {}  # {matricula: nombre}
         self.matricula_col = 1  # Columna A
         self.name_col = 2  # Columna B
+        self.first_test_col = 3  # Columna C
+        self.test_columns = {}  # {nombre_prueba: columna}
+
+        # Modo write-behind
+        self.write_behind = write_behind
+        self.journal_path = f"{filepath}.journal"
+        self.pending = 0  # Notas escritas en memoria pero no en disco
+        self.last_flush = time.monotonic()
         
         if not os.path.exists(filepath):
             raise FileNotFoundError(f"El archivo {filepath} no existe")
@@ -48,10 +69,48 @@ class ExcelHandler:
                         'row': row
                     }
             
+            # Índice de columnas de pruebas (encabezados de la fila 1)
+            self.test_columns = {}
+            for col in range(self.first_test_col, self.sheet.max_column + 1):
+                header = self.sheet.cell(1, col).value
+                if header is not None and header != "":
+                    self.test_columns.setdefault(header, col)
+
             print(f"✓ Excel cargado: {len(self.students)} estudiantes encontrados")
             
         except Exception as e:
             raise Exception(f"Error al cargar el archivo Excel: {e}")
+
+        self.replay_journal()
+
+    def replay_journal(self):
+        """
+        Aplica las notas del journal que no alcanzaron a guardarse en el Excel
+
+        Returns:
+            int: Cantidad de notas recuperadas
+        """
+        if not os.path.exists(self.journal_path):
+            return 0
+
+        recovered = 0
+        with open(self.journal_path, 'r', encoding='utf-8') as journal:
+            for line in journal:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # Línea incompleta (el programa se cerró mientras se escribía)
+                    continue
+
+                if self._write_cell(entry['matricula'], entry['test_name'], entry['grade']):
+                    recovered += 1
+
+        if recovered:
+            self.workbook.save(self.filepath)
+            print(f"✓ Recuperadas {recovered} notas no guardadas desde {self.journal_path}")
+
+        os.remove(self.journal_path)
+        return recovered
     
     def get_student_by_matricula(self, matricula):
         """
@@ -76,33 +135,23 @@ class ExcelHandler:
             int: Número de columna
         """
         # Primero buscar si ya existe una columna con este nombre
-        # Buscar hasta max_column + 5 para asegurar que revisamos todas las columnas posibles
-        max_col_to_check = max(self.sheet.max_column + 5, 10)  # Revisar al menos hasta columna J
-
-        for col in range(3, max_col_to_check):
-            cell_value = self.sheet.cell(1, col).value
-            if cell_value == test_name:
-                return col
-
-        # Si no existe, buscar la primera columna vacía empezando desde columna C (3)
-        for col in range(3, max_col_to_check):
-            cell_value = self.sheet.cell(1, col).value
-            if cell_value is None or cell_value == "":
-                # Columna vacía encontrada, usarla
-                header_cell = self.sheet.cell(1, col)
-                header_cell.value = test_name
-                header_cell.font = Font(bold=True, size=12)
-                header_cell.alignment = Alignment(horizontal='center', vertical='center')
-                return col
-
-        # Si todas las columnas están ocupadas, usar la siguiente
-        new_col = max_col_to_check
-        header_cell = self.sheet.cell(1, new_col)
+        col = self.test_columns.get(test_name)
+        if col is not None:
+            return col
+
+        # Si no existe, usar la primera columna sin encabezado desde columna C (3)
+        used_columns = set(self.test_columns.values())
+        col = self.first_test_col
+        while col in used_columns:
+            col += 1
+
+        header_cell = self.sheet.cell(1, col)
         header_cell.value = test_name
         header_cell.font = Font(bold=True, size=12)
         header_cell.alignment = Alignment(horizontal='center', vertical='center')
+        self.test_columns[test_name] = col
 
-        return new_col
+        return col
     
     def check_existing_grade(self, matricula, test_name):
         """
@@ -115,20 +164,42 @@ class ExcelHandler:
         Returns:
             tuple: (exists: bool, grade: float o None)
         """
-        student = self.get_student_by_matricula(matricula)
-        if not student:
-            return False, None
-        
-        col = self.find_or_create_test_column(test_name)
-        row = student['row']
-        
-        existing_grade = self.sheet.cell(row, col).value
-        
-        if existing_grade is not None and existing_grade != "":
-            return True, existing_grade
+        # Sin crear la columna: una prueba sin columna aún no tiene notas
+        existing = self.check_existing_grades([matricula], test_name)
+        if str(matricula) in existing:
+            return True, existing[str(matricula)]
         
         return False, None
     
+    def check_existing_grades(self, matriculas, test_name):
+        """
+        Verifica de una vez qué estudiantes ya tienen nota para una prueba
+
+        No crea la columna de la prueba si aún no existe.
+
+        Args:
+            matriculas: Lista de números de matrícula
+            test_name: Nombre de la prueba
+
+        Returns:
+            dict: {matricula: nota existente} solo para quienes ya tienen nota
+        """
+        col = self.test_columns.get(test_name)
+        if col is None:
+            return {}
+
+        existing = {}
+        for matricula in matriculas:
+            student = self.get_student_by_matricula(matricula)
+            if not student:
+                continue
+
+            grade = self.sheet.cell(student['row'], col).value
+            if grade is not None and grade != "":
+                existing[str(matricula)] = grade
+
+        return existing
+    
     def save_grade(self, matricula, test_name, grade, overwrite=False):
         """
         Guarda la nota de un estudiante
@@ -163,15 +234,17 @@ class ExcelHandler:
         
         # Guardar la nota
         try:
-            col = self.find_or_create_test_column(test_name)
-            row = student['row']
-            
-            cell = self.sheet.cell(row, col)
-            cell.value = grade
-            cell.alignment = Alignment(horizontal='center', vertical='center')
+            self._write_cell(matricula, test_name, grade)
 
-            # Guardar el archivo
-            self.workbook.save(self.filepath)
+            # Guardar el archivo (o dejarla pendiente en modo write-behind)
+            if self.write_behind:
+                self._append_journal(matricula, test_name, grade)
+                self.pending += 1
+                if (self.pending >= self.FLUSH_EVERY or
+                        time.monotonic() - self.last_flush >= self.FLUSH_INTERVAL):
+                    self.flush()
+            else:
+                self.workbook.save(self.filepath)
             
             return {
                 'success': True,
@@ -187,6 +260,59 @@ class ExcelHandler:
                 'message': f"Error al guardar la nota: {e}"
             }
     
+    def _write_cell(self, matricula, test_name, grade):
+        """
+        Escribe una nota en la hoja (solo en memoria)
+
+        Returns:
+            bool: True si el estudiante existe y se escribió la nota
+        """
+        student = self.get_student_by_matricula(matricula)
+        if not student:
+            return False
+
+        col = self.find_or_create_test_column(test_name)
+        cell = self.sheet.cell(student['row'], col)
+        cell.value = grade
+        cell.alignment = Alignment(horizontal='center', vertical='center')
+        return True
+
+    def _append_journal(self, matricula, test_name, grade):
+        """Registra una nota pendiente en el journal y la fuerza a disco"""
+        entry = {'matricula': str(matricula), 'test_name': test_name, 'grade': grade}
+        with open(self.journal_path, 'a', encoding='utf-8') as journal:
+            journal.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            journal.flush()
+            os.fsync(journal.fileno())
+
+    def flush(self):
+        """
+        Guarda en disco las notas pendientes del modo write-behind
+        
+        Returns:
+            dict: Resultado de la operación
+        """
+        if self.pending == 0:
+            return {'success': True, 'message': 'Sin notas pendientes', 'saved': 0}
+
+        try:
+            self.workbook.save(self.filepath)
+        except Exception as e:
+            # Las notas siguen en el journal y se recuperan al volver a cargar
+            return {
+                'success': False,
+                'message': f"Error al guardar el archivo Excel: {e}",
+                'saved': 0
+            }
+
+        saved = self.pending
+        self.pending = 0
+        self.last_flush = time.monotonic()
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+
+        return {'success': True, 'message': f'{saved} notas guardadas', 'saved': saved}
+
     def get_all_students(self):
         """
         Obtiene la lista de todos los estudiantes
@@ -197,6 +323,7 @@ class ExcelHandler:
         return self.students
     
     def close(self):
-        """Cierra el archivo Excel"""
+        """Guarda las notas pendientes y cierra el archivo Excel"""
         if self.workbook:
+            self.flush()
             self.workbook.close()
\ No newline at end of file
@@ -3,6 +3,10 @@ Calculadora de notas según la escala chilena
 """
 from decimal import Decimal, ROUND_HALF_UP
 
+import numpy as np
+
+from ..utils.constants import ALTERNATIVES
+
 class GradeCalculator:
     """
     Calcula notas según el sistema de evaluación chileno (escala 1.0 - 7.0)
@@ -28,6 +32,9 @@ class GradeCalculator:
         
         # Calcular puntaje mínimo de aprobación
         self.min_passing_score = (max_score * passing_percentage) / 100.0
+        
+        # Tabla puntaje -> nota (se calcula una sola vez, ver grade_table)
+        self._grade_table = None
     
     def calculate_grade(self, obtained_score):
         """
@@ -112,4 +119,94 @@ class GradeCalculator:
                     (self.max_grade - self.passing_grade) * 
                     (self.max_score - self.min_passing_score))
         
-        return round(score, 1)
\ No newline at end of file
+        return round(score, 1)
+    
+    def grade_table(self):
+        """
+        Obtiene la tabla de notas para todos los puntajes enteros posibles
+        
+        Cada nota se calcula con calculate_grade, por lo que el redondeo
+        (half up) es idéntico al de una nota individual.
+        
+        Returns:
+            np.ndarray: Array (max_score + 1,) donde el índice es el puntaje
+        """
+        if self._grade_table is None:
+            self._grade_table = np.array(
+                [self.calculate_grade(score) for score in range(int(self.max_score) + 1)],
+                dtype=np.float64
+            )
+        return self._grade_table
+    
+    @staticmethod
+    def encode_answer_key(answer_key, num_questions):
+        """
+        Convierte la pauta a un vector de índices de alternativa
+        
+        Args:
+            answer_key: Diccionario {pregunta: alternativa}
+            num_questions: Cantidad de preguntas (columnas del vector)
+        
+        Returns:
+            np.ndarray: Array (num_questions,) con el índice de la alternativa
+            correcta (-1 si la pregunta no está en la pauta)
+        """
+        key = np.full(num_questions, -1, dtype=np.int8)
+        for pregunta, alternativa in answer_key.items():
+            if 1 <= pregunta <= num_questions and alternativa in ALTERNATIVES:
+                key[pregunta - 1] = ALTERNATIVES.index(alternativa)
+        return key
+    
+    @staticmethod
+    def encode_answers(respuestas_list, num_questions):
+        """
+        Convierte las respuestas de varios estudiantes a una matriz
+        
+        Args:
+            respuestas_list: Lista de diccionarios {pregunta: alternativa o None}
+            num_questions: Cantidad de preguntas (columnas de la matriz)
+        
+        Returns:
+            np.ndarray: Matriz (estudiantes, num_questions) con el índice de la
+            alternativa marcada (-1 si está en blanco o es inválida)
+        """
+        answers = np.full((len(respuestas_list), num_questions), -1, dtype=np.int8)
+        for row, respuestas in enumerate(respuestas_list):
+            for pregunta, alternativa in respuestas.items():
+                if 1 <= pregunta <= num_questions and alternativa in ALTERNATIVES:
+                    answers[row, pregunta - 1] = ALTERNATIVES.index(alternativa)
+        return answers
+    
+    def grade_answers(self, answers, key):
+        """
+        Califica una matriz de respuestas contra la pauta en una sola operación
+        
+        Solo se consideran las preguntas que están en la pauta. Una respuesta
+        en blanco (o con múltiple marca) no cuenta como correcta ni incorrecta.
+        
+        Args:
+            answers: Matriz (estudiantes, preguntas) de encode_answers()
+            key: Vector (preguntas,) de encode_answer_key()
+        
+        Returns:
+            dict: Arrays (estudiantes,) con 'correctas', 'incorrectas',
+            'en_blanco' y 'notas'
+        """
+        answers = np.atleast_2d(answers)
+        in_key = key >= 0
+        answered = (answers >= 0) & in_key
+        
+        correctas = np.count_nonzero(answered & (answers == key), axis=1)
+        incorrectas = np.count_nonzero(answered, axis=1) - correctas
+        en_blanco = np.count_nonzero(in_key) - correctas - incorrectas
+        
+        # Los puntajes son enteros: la nota se obtiene directamente de la tabla
+        table = self.grade_table()
+        notas = table[np.minimum(correctas, len(table) - 1)]
+        
+        return {
+            'correctas': correctas,
+            'incorrectas': incorrectas,
+            'en_blanco': en_blanco,
+            'notas': notas
+        }
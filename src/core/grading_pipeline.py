@@ -0,0 +1,809 @@
+"""
+Módulo con el pipeline de calificación de hojas de respuesta escaneadas.
+
+Este módulo encadena PDFProcessor → ImageProcessor → OMRDetector → GradeCalculator
+para procesar una página, y permite procesar muchas páginas en paralelo usando
+varios procesos. Cada proceso de trabajo mantiene sus propias instancias de los
+procesadores; la escritura en Excel se mantiene en el proceso principal.
+
+Author: Gerson
+Date: 2025
+"""
+
+import os
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .detection_cache import DetectionCache
+from .grade_calculator import GradeCalculator
+from .job_ledger import JobLedger
+from .pdf_processor import PDFProcessor
+from .image_processor import ImageProcessor
+from .image_writer import ImageWriter
+from .omr_detector import OMRDetector
+from .pipeline_stats import PipelineStats
+from ..utils.constants import (DEFAULT_FILL_STRATEGY, DEFAULT_IMAGE_FORMAT, DEFAULT_IMAGE_QUALITY,
+                               DEFAULT_IMAGE_WRITER_PENDING, DEFAULT_IMAGE_WRITER_THREADS)
+
+
+# Tarea de página: (ruta_pdf, número_de_página, total_de_páginas)
+PageTask = Tuple[str, int, int]
+
+
+class GradingPipeline:
+    """
+    Procesa páginas individuales de PDFs: conversión, ArUco, OMR, overlay y nota.
+
+    No escribe en Excel: el resultado indica si la hoja debe guardarse y el
+    proceso principal se encarga de hacerlo (ver save_result_to_excel).
+    """
+
+    # Hojas con confianza menor a este valor requieren revisión manual
+    REVIEW_CONFIDENCE_THRESHOLD = 99.0
+
+    def __init__(self, settings: Dict, calibration_file: str = "config/calibration_data.json"):
+        """
+        Inicializa el pipeline y sus procesadores.
+
+        Args:
+            settings: Parámetros de calificación (ver build_pipeline_settings)
+            calibration_file: Ruta al archivo de calibración
+
+        Raises:
+            FileNotFoundError: Si no existe el archivo de calibración
+            ValueError: Si la estrategia de relleno no existe
+        """
+        self.settings = settings
+        # Las páginas se renderizan en escala de grises: el overlay se colorea al dibujar.
+        # Las páginas escaneadas se toman directamente de su imagen embebida.
+        self.pdf_processor = PDFProcessor(dpi=settings.get('dpi', PDFProcessor.DEFAULT_DPI),
+                                          grayscale=settings.get('grayscale', True),
+                                          extract_images=settings.get('extract_images', True))
+        self.image_processor = ImageProcessor()
+        self.omr_detector = OMRDetector(calibration_file,
+                                        settings.get('fill_strategy', DEFAULT_FILL_STRATEGY))
+
+        # Mediciones de la página en proceso (ver process_page)
+        self._stats = PipelineStats()
+
+        # PDF abierto actualmente (ver _render_page)
+        self._document = None
+        self._document_path = None
+
+        # Caché de detecciones: al recalificar los mismos escaneos se omiten
+        # la detección ArUco y la medición OMR (ver DetectionCache)
+        self.detection_cache = None
+        self._pdf_hashes = {}  # {ruta_pdf: hash del contenido}
+        if settings.get('detection_cache', True):
+            try:
+                self.detection_cache = DetectionCache(self._detection_signature(),
+                                                      settings.get('detection_cache_dir'))
+            except OSError as e:
+                print(f"⚠️ Caché de detecciones no disponible: {e}")
+
+        # Escritor de las imágenes de resultado: el overlay se dibuja y se guarda en
+        # segundo plano mientras se procesa la página siguiente (ver ImageWriter)
+        self.image_writer = ImageWriter(
+            image_format=settings.get('image_format', DEFAULT_IMAGE_FORMAT),
+            quality=settings.get('image_quality', DEFAULT_IMAGE_QUALITY),
+            threads=settings.get('image_writer_threads', DEFAULT_IMAGE_WRITER_THREADS),
+            max_pending=settings.get('image_writer_pending', DEFAULT_IMAGE_WRITER_PENDING)
+        )
+        self._image_jobs = {}  # {(ruta_pdf, página): (future, mediciones del trabajo)}
+
+        # Calculadora de notas y pauta codificada (una sola por lote)
+        self.grade_calculator = None
+        self.answer_key_vector = None
+        if settings.get('answer_key'):
+            self.grade_calculator = GradeCalculator(
+                max_score=settings.get('num_questions', 100),
+                passing_percentage=settings.get('passing_percentage', 60.0),
+                min_grade=settings.get('min_grade', 1.0),
+                max_grade=settings.get('max_grade', 7.0),
+                passing_grade=settings.get('passing_grade', 4.0)
+            )
+            self.answer_key_vector = GradeCalculator.encode_answer_key(
+                settings['answer_key'], max(settings['answer_key'])
+            )
+
+    def process_page(
+        self,
+        pdf_path: str,
+        page_number: int = 0,
+        total_pages: int = 1,
+        image: Optional[np.ndarray] = None,
+        stats: Optional[PipelineStats] = None,
+        wait_for_image: bool = True
+    ) -> Dict:
+        """
+        Procesa una página específica de un PDF y retorna los resultados.
+
+        La imagen corregida (warped_image) solo se incluye en el resultado cuando
+        la hoja requiere revisión manual; el overlay se guarda en disco o, si hay
+        revisión, se regenera después a partir de ella.
+
+        Si la página ya se detectó antes con la misma calibración (ver
+        DetectionCache), se omiten la detección ArUco y la medición OMR; si
+        además no requiere revisión y su imagen de resultado ya existe, la
+        página ni siquiera se renderiza (ver _reuse_overlay).
+
+        Args:
+            pdf_path: Ruta al archivo PDF
+            page_number: Número de página a procesar (0-indexed)
+            total_pages: Total de páginas en el PDF
+            image: Página ya renderizada; si es None se renderiza (solo si hace
+                falta) desde el documento abierto del pipeline
+            stats: Mediciones de la página (por ejemplo, con el tiempo de
+                renderizado ya registrado); si es None se crean nuevas
+            wait_for_image: Si es False, la imagen de resultado puede seguir
+                escribiéndose al retornar; el resultado se completa después con
+                complete_image() (ver image_ready)
+
+        Returns:
+            Diccionario con el resultado de la página; 'stats' contiene los
+            tiempos por etapa de esta página (ver PipelineStats)
+        """
+        stats = stats or PipelineStats()
+        self._stats = stats
+
+        result = {
+            'pdf_path': pdf_path,
+            'filename': page_filename(pdf_path, page_number, total_pages),
+            'page_number': page_number,
+            'total_pages': total_pages,
+            'success': False,
+            'matricula': None,
+            'respuestas': {},
+            'correctas': 0,
+            'incorrectas': 0,
+            'en_blanco': 0,
+            'nota': 0.0,
+            'confidence': 0.0,
+            'message': '',
+            'saved_to_excel': False,
+            'image_saved': False,
+            'image_path': None,
+            'needs_review': False,
+            'render_path': None,
+            'from_detection_cache': False,
+            'warped_image': None,
+            'detection_result': None,
+            'stats': None
+        }
+
+        try:
+            pdf_hash = self._pdf_hash(pdf_path)
+            cached = None
+            if pdf_hash is not None:
+                cached = self.detection_cache.get(pdf_hash, page_number)
+
+            reuse_overlay = False
+            if cached is not None:
+                # Página ya detectada: recalcular matrícula y respuestas desde los
+                # rellenos guardados (la imagen se corrige solo para el overlay)
+                corners = cached['corners']
+                warped_gray = None
+                with stats.stage('omr'):
+                    detection_result = self.omr_detector.detect_answer_sheet(None, cached['fills'])
+                result['from_detection_cache'] = True
+                stats.count('detection_cache_hits')
+                self._set_detection(result, detection_result)
+
+                # Sin revisión y con su imagen de resultado ya guardada, la página no
+                # necesita renderizarse ni corregirse (ver _reuse_overlay)
+                reuse_overlay = self._reuse_overlay(result)
+
+            if not reuse_overlay:
+                # Paso 1: Convertir PDF a imagen (página específica)
+                if image is None:
+                    with stats.stage('render'):
+                        image = self._render_page(pdf_path, page_number)
+                if image is None:
+                    result['message'] = f"Error al convertir página {page_number + 1} a imagen"
+                    return result
+
+                # Método con que se obtuvo la página ('embedded' o 'rendered'); la
+                # imagen se obtiene justo antes, así que corresponde a esta página
+                result['render_path'] = self.pdf_processor.last_render_path
+                stats.count(f"pages_{result['render_path']}")
+
+                if cached is None:
+                    # Paso 2: Detectar ArUco, corregir perspectiva y preprocesar en escala de grises
+                    with stats.stage('aruco_warp'):
+                        process_result = self.image_processor.prepare_for_omr(image)
+                    if not process_result['success']:
+                        result['message'] = process_result['message']
+                        return result
+                    corners = process_result['corners']
+                    warped_gray = process_result['warped_gray']
+
+                    # Paso 3: Detección OMR
+                    with stats.stage('omr'):
+                        fills = self.omr_detector.calculate_fill_percentages(
+                            process_result['preprocessed']
+                        )
+                        detection_result = self.omr_detector.detect_answer_sheet(
+                            process_result['preprocessed'], fills
+                        )
+                    if pdf_hash is not None:
+                        self.detection_cache.put(pdf_hash, page_number, fills, corners)
+                    self._set_detection(result, detection_result)
+
+                # Paso 4: Generar y guardar imagen con overlay visual. La imagen corregida
+                # reutiliza la de escala de grises; solo una página a color se vuelve a corregir
+                warped_image = self._display_warp(image, corners, warped_gray)
+                self._save_overlay(result, warped_image, detection_result)
+
+                # Guardar imagen necesaria para revisión manual
+                if result['needs_review']:
+                    result['warped_image'] = warped_image
+
+            # Paso 5: Calificar si hay pauta
+            if self.grade_calculator is not None:
+                with stats.stage('grade'):
+                    self._grade(result)
+
+            result['success'] = True
+            if result['needs_review']:
+                result['message'] = "Procesado - Requiere revisión manual"
+            else:
+                result['message'] = "Procesado exitosamente"
+
+        except Exception as e:
+            result['message'] = f"Error: {str(e)}"
+
+        finally:
+            stats.count('pages')
+            if not result['success']:
+                stats.count('pages_failed')
+            stats.sample_memory()
+            result['stats'] = stats.to_dict()
+
+        if wait_for_image:
+            self.complete_image(result)
+
+        return result
+
+    def image_ready(self, result: Dict) -> bool:
+        """
+        Indica si la imagen de resultado de una página ya terminó de escribirse.
+
+        Args:
+            result: Resultado de process_page()
+
+        Returns:
+            True si terminó o si la página no tiene imagen pendiente
+        """
+        job = self._image_jobs.get((result.get('pdf_path'), result.get('page_number')))
+        return job is None or job[0].done()
+
+    def complete_image(self, result: Dict):
+        """
+        Espera la imagen de resultado de una página y completa su resultado.
+
+        Actualiza 'image_saved' e 'image_path' y suma a 'stats' los tiempos de
+        dibujo y escritura medidos en el escritor.
+
+        Args:
+            result: Resultado de process_page() (se actualiza en el lugar)
+        """
+        job = self._image_jobs.pop((result.get('pdf_path'), result.get('page_number')), None)
+        if job is None:
+            return
+
+        future, job_stats = job
+        saved = future.result()
+        result['image_saved'] = saved
+        if not saved:
+            result['image_path'] = None
+
+        stats = PipelineStats()
+        stats.merge(result.get('stats'))
+        stats.merge(job_stats.to_dict())
+        result['stats'] = stats.to_dict()
+
+    def _set_detection(self, result: Dict, detection_result: Dict):
+        """
+        Copia en el resultado la matrícula, respuestas y confianza detectadas.
+
+        Args:
+            result: Resultado de la página (se actualiza en el lugar)
+            detection_result: Resultado de OMRDetector.detect_answer_sheet()
+        """
+        result['detection_result'] = detection_result
+
+        # Extraer matrícula
+        result['matricula'] = detection_result['matricula'].get('matricula', 'N/A')
+        result['respuestas'] = detection_result['respuestas'].get('respuestas', {})
+        result['confidence'] = detection_result.get('overall_confidence', 0.0)
+
+        # Verificar si necesita revisión manual (confianza < 99%)
+        result['needs_review'] = result['confidence'] < self.REVIEW_CONFIDENCE_THRESHOLD
+
+    def _reuse_overlay(self, result: Dict) -> bool:
+        """
+        Reutiliza la imagen de resultado ya guardada de una página detectada antes.
+
+        Solo aplica a hojas que no requieren revisión y cuya imagen existe en
+        el formato configurado. Con settings['rewrite_overlays'] la imagen se
+        vuelve a generar (por ejemplo, para que refleje una pauta corregida).
+
+        Args:
+            result: Resultado de la página con la detección ya copiada (se
+                actualiza en el lugar)
+
+        Returns:
+            True si la imagen existente se reutiliza
+        """
+        if result['needs_review'] or self.settings.get('rewrite_overlays'):
+            return False
+
+        image_path = self._overlay_path(result)
+        if not image_path.is_file():
+            return False
+
+        result['image_path'] = str(image_path)
+        result['image_saved'] = True
+        self._stats.count('overlays_reused')
+        return True
+
+    def _display_warp(self, image: np.ndarray, corners: np.ndarray,
+                      warped_gray: Optional[np.ndarray]) -> np.ndarray:
+        """
+        Obtiene la imagen corregida que se muestra en el overlay y la revisión.
+
+        Args:
+            image: Página original (BGR o escala de grises)
+            corners: Esquinas ordenadas de los marcadores
+            warped_gray: Corrección en escala de grises ya calculada (o None)
+
+        Returns:
+            Imagen corregida con los canales de la página original
+        """
+        if image.ndim == 2 and warped_gray is not None:
+            return warped_gray
+        with self._stats.stage('aruco_warp'):
+            return self.image_processor.apply_perspective_transform(image, corners)
+
+    def _detection_signature(self) -> Dict:
+        """
+        Parámetros que afectan a la detección de una página (firma del caché).
+
+        Returns:
+            Diccionario serializable a JSON
+        """
+        return {
+            'calibration': self.omr_detector.calibration_data,
+            'effective_radius_ratio': self.omr_detector.EFFECTIVE_RADIUS_RATIO,
+            'fill_range': [self.omr_detector.min_fill, self.omr_detector.max_fill],
+            'output_size': [self.image_processor.OUTPUT_WIDTH, self.image_processor.OUTPUT_HEIGHT],
+            'aruco_max_size': self.image_processor.DETECTION_MAX_SIZE,
+            'dpi': self.pdf_processor.dpi,
+            'grayscale': self.pdf_processor.grayscale,
+            'extract_images': self.pdf_processor.extract_images
+        }
+
+    def _pdf_hash(self, pdf_path: str) -> Optional[str]:
+        """
+        Obtiene (una sola vez por PDF) el hash del contenido para el caché de detecciones.
+
+        Args:
+            pdf_path: Ruta al archivo PDF
+
+        Returns:
+            Hash en hexadecimal o None si el caché está desactivado o el PDF no se puede leer
+        """
+        if self.detection_cache is None:
+            return None
+
+        if pdf_path not in self._pdf_hashes:
+            try:
+                self._pdf_hashes[pdf_path] = JobLedger.file_hash(pdf_path)
+            except OSError:
+                self._pdf_hashes[pdf_path] = None
+        return self._pdf_hashes[pdf_path]
+
+    def _render_page(self, pdf_path: str, page_number: int) -> Optional[np.ndarray]:
+        """
+        Renderiza una página manteniendo abierto el último PDF usado.
+
+        Las páginas de un mismo PDF llegan seguidas, por lo que cada archivo
+        se abre una sola vez aunque sus páginas se pidan de a una.
+
+        Args:
+            pdf_path: Ruta al archivo PDF
+            page_number: Número de página (0-indexed)
+
+        Returns:
+            Imagen BGR o None si hay error
+        """
+        try:
+            if self._document_path != pdf_path:
+                self.close()
+                self._document = self.pdf_processor.open_document(pdf_path)
+                self._document_path = pdf_path
+            return self.pdf_processor.render_page(self._document, page_number)
+        except Exception as e:
+            print(f"Error al procesar PDF: {str(e)}")
+            return None
+
+    def close(self):
+        """Cierra el PDF que el pipeline mantiene abierto, si lo hay."""
+        if self._document is not None:
+            self._document.close()
+        self._document = None
+        self._document_path = None
+
+    def shutdown(self):
+        """Espera las imágenes pendientes, detiene el escritor y cierra el PDF abierto."""
+        self.image_writer.close()
+        self.close()
+
+    def _overlay_path(self, result: Dict) -> Path:
+        """
+        Calcula la ruta de la imagen de resultado de una página.
+
+        Args:
+            result: Resultado de la página (con matrícula)
+
+        Returns:
+            Ruta {carpeta}/{prueba}/{matricula}_{prueba}[_pN].{formato}
+        """
+        # Determinar dónde guardar la imagen
+        if self.settings.get('output_base_dir'):
+            # Guardar en una carpeta con el nombre de la prueba dentro del directorio del Excel
+            base_dir = Path(self.settings['output_base_dir'])
+        else:
+            # Guardar en la carpeta del PDF si no hay Excel configurado
+            base_dir = Path(result['pdf_path']).parent
+
+        # Crear nombre de archivo: {matricula}_{nombre_prueba}.{formato}
+        # Para PDFs multi-página, agregar sufijo de página
+        test_name = self.settings.get('test_name', 'Prueba')
+        # Limpiar nombre de prueba para que sea válido en sistema de archivos
+        safe_test_name = "".join(c for c in test_name if c.isalnum() or c in (' ', '_', '-')).strip()
+
+        # Carpeta con el nombre de la prueba para organizar los overlays
+        output_dir = base_dir / safe_test_name
+
+        # Si es multi-página, agregar sufijo "_pX" para evitar sobrescritura
+        extension = self.image_writer.extension
+        if result['total_pages'] > 1:
+            image_filename = f"{result['matricula']}_{safe_test_name}_p{result['page_number'] + 1}{extension}"
+        else:
+            image_filename = f"{result['matricula']}_{safe_test_name}{extension}"
+
+        return output_dir / image_filename
+
+    def _save_overlay(self, result: Dict, warped_image, detection_result: Dict):
+        """
+        Envía el overlay visual al escritor si la hoja no requiere revisión.
+
+        El overlay se dibuja y se guarda en segundo plano (ver ImageWriter);
+        complete_image() registra el resultado de la escritura.
+
+        Args:
+            result: Resultado de la página (se actualiza en el lugar)
+            warped_image: Imagen corregida por perspectiva
+            detection_result: Resultado de OMRDetector.detect_answer_sheet()
+        """
+        try:
+            image_path = self._overlay_path(result)
+
+            # Crear carpeta con el nombre de la prueba para organizar los overlays
+            image_path.parent.mkdir(parents=True, exist_ok=True)
+
+            # Guardar la ruta para usar después
+            result['image_path'] = str(image_path)
+
+            # IMPORTANTE: Solo guardar imagen si NO necesita revisión manual
+            # Si necesita revisión, la imagen se generará y guardará DESPUÉS de las correcciones
+            result['image_saved'] = False
+            if not result['needs_review']:
+                job_stats = PipelineStats()
+                future = self.image_writer.submit(self._write_overlay, str(image_path),
+                                                  warped_image, detection_result, job_stats)
+                self._image_jobs[(result['pdf_path'], result['page_number'])] = (future, job_stats)
+
+        except Exception as e:
+            # Si falla el guardado de imagen, continuar con el procesamiento
+            result['image_saved'] = False
+            result['image_path'] = None
+            print(f"⚠️ Error al guardar imagen overlay: {e}")
+
+    def _write_overlay(self, image_path: str, warped_image, detection_result: Dict,
+                       stats: PipelineStats) -> bool:
+        """
+        Dibuja el overlay visual y lo guarda (se ejecuta en un hilo del escritor).
+
+        Args:
+            image_path: Ruta del archivo de imagen
+            warped_image: Imagen corregida por perspectiva
+            detection_result: Resultado de OMRDetector.detect_answer_sheet()
+            stats: Mediciones propias del trabajo
+
+        Returns:
+            True si la imagen se guardó correctamente
+        """
+        try:
+            with stats.stage('overlay'):
+                overlay = self.omr_detector.create_visual_overlay(
+                    warped_image,
+                    detection_result,
+                    answer_key=self.settings.get('answer_key')
+                )
+            with stats.stage('imwrite'):
+                if not self.image_writer.write(image_path, overlay):
+                    raise OSError(f"OpenCV no pudo escribir {image_path}")
+            return True
+        except Exception as e:
+            print(f"⚠️ Error al guardar imagen overlay: {e}")
+            return False
+
+    def _grade(self, result: Dict):
+        """
+        Compara las respuestas con la pauta y calcula la nota.
+
+        Args:
+            result: Resultado de la página (se actualiza en el lugar)
+        """
+        answers = GradeCalculator.encode_answers([result['respuestas']],
+                                                 len(self.answer_key_vector))
+        graded = self.grade_calculator.grade_answers(answers, self.answer_key_vector)
+
+        result['correctas'] = int(graded['correctas'][0])
+        result['incorrectas'] = int(graded['incorrectas'][0])
+        result['en_blanco'] = int(graded['en_blanco'][0])
+        result['nota'] = float(graded['notas'][0])
+
+
+def page_filename(pdf_path: str, page_number: int, total_pages: int) -> str:
+    """
+    Construye el nombre de una página para mostrar en la interfaz.
+
+    Args:
+        pdf_path: Ruta al archivo PDF
+        page_number: Número de página (0-indexed)
+        total_pages: Total de páginas en el PDF
+
+    Returns:
+        Nombre del archivo, con sufijo de página si el PDF tiene varias
+    """
+    filename = Path(pdf_path).name
+    if total_pages > 1:
+        filename = f"{filename} - Página {page_number + 1}/{total_pages}"
+    return filename
+
+
+def build_pipeline_settings(app_data: Dict) -> Dict:
+    """
+    Construye los parámetros del pipeline a partir de los datos de la aplicación.
+
+    El resultado solo contiene valores simples, por lo que puede enviarse
+    a los procesos de trabajo.
+
+    Args:
+        app_data: Datos compartidos de la aplicación
+
+    Returns:
+        Diccionario con los parámetros de calificación
+    """
+    output_base_dir = None
+    if app_data.get('excel_handler'):
+        output_base_dir = str(Path(app_data['excel_handler'].filepath).parent)
+
+    return {
+        'answer_key': dict(app_data.get('answer_key') or {}),
+        'num_questions': app_data.get('num_questions', 100),
+        'passing_percentage': app_data.get('passing_percentage', 60.0),
+        'min_grade': app_data.get('min_grade', 1.0),
+        'max_grade': app_data.get('max_grade', 7.0),
+        'passing_grade': app_data.get('passing_grade', 4.0),
+        'test_name': app_data.get('test_name', 'Prueba'),
+        'output_base_dir': output_base_dir,
+        'detection_cache': app_data.get('detection_cache', True),
+        'fill_strategy': app_data.get('fill_strategy', DEFAULT_FILL_STRATEGY),
+        'rewrite_overlays': app_data.get('rewrite_overlays', False),
+        'image_format': app_data.get('image_format', DEFAULT_IMAGE_FORMAT),
+        'image_quality': app_data.get('image_quality', DEFAULT_IMAGE_QUALITY)
+    }
+
+
+def save_result_to_excel(result: Dict, excel_handler, test_name: str,
+                         stats: Optional[PipelineStats] = None):
+    """
+    Guarda en Excel la nota de una página ya procesada.
+
+    Solo guarda hojas exitosas, calificadas, con matrícula y que no requieren
+    revisión manual. Debe llamarse desde un único proceso/hilo escritor.
+
+    Args:
+        result: Resultado de GradingPipeline.process_page() (se actualiza en el lugar)
+        excel_handler: Instancia de ExcelHandler
+        test_name: Nombre de la prueba (columna de Excel)
+        stats: Mediciones de la ejecución donde registrar el tiempo de guardado
+    """
+    if not result['success'] or result['matricula'] in (None, 'N/A'):
+        return
+
+    if result['needs_review']:
+        # Marcar que no se guardó porque necesita revisión
+        result['saved_to_excel'] = False
+        return
+
+    stats = stats or PipelineStats()
+    with stats.stage('excel'):
+        save_result = excel_handler.save_grade(
+            matricula=result['matricula'],
+            grade=result['nota'],
+            test_name=test_name
+        )
+    result['saved_to_excel'] = save_result['success']
+    if not save_result['success']:
+        result['message'] = save_result['message']
+        # Distingue un guardado fallido de una hoja que no correspondía guardar
+        result['excel_error'] = save_result['message']
+
+
+def resolve_num_workers(num_workers: int = 0) -> int:
+    """
+    Determina la cantidad de procesos de trabajo a usar.
+
+    Args:
+        num_workers: Cantidad solicitada (0 = automático: núcleos disponibles - 1)
+
+    Returns:
+        Cantidad de procesos (al menos 1)
+    """
+    if num_workers and num_workers > 0:
+        return num_workers
+    return max(1, (os.cpu_count() or 1) - 1)
+
+
+# Pipeline del proceso de trabajo (uno por proceso)
+_worker_pipeline = None
+
+
+def _init_worker(settings: Dict, calibration_file: str):
+    """Inicializa el pipeline del proceso de trabajo."""
+    global _worker_pipeline
+    # Cada proceso escribe sus imágenes antes de entregar la página: las páginas
+    # ya se superponen entre procesos y el resultado llega con la imagen guardada
+    _worker_pipeline = GradingPipeline(dict(settings, image_writer_threads=0), calibration_file)
+
+
+def _process_page_task(task: PageTask) -> Dict:
+    """Procesa una página en el proceso de trabajo."""
+    return _worker_pipeline.process_page(*task)
+
+
+def _failed_result(task: PageTask, message: str, stats: Optional[PipelineStats] = None) -> Dict:
+    """Construye el resultado de una página que no se pudo procesar."""
+    pdf_path, page_number, total_pages = task
+    stats = stats or PipelineStats()
+    stats.count('pages')
+    stats.count('pages_failed')
+    return {
+        'pdf_path': pdf_path,
+        'filename': page_filename(pdf_path, page_number, total_pages),
+        'page_number': page_number,
+        'total_pages': total_pages,
+        'success': False,
+        'needs_review': False,
+        'message': message,
+        'stats': stats.to_dict()
+    }
+
+
+def _iter_serial(pipeline: GradingPipeline, tasks: List[PageTask]) -> Iterator[Tuple[int, Dict]]:
+    """
+    Procesa las tareas en el proceso actual, abriendo cada PDF una sola vez.
+
+    Las tareas consecutivas del mismo PDF reutilizan el documento abierto por
+    el pipeline (ver GradingPipeline._render_page), y cada página se renderiza
+    solo si hace falta: una página ya detectada cuya imagen de resultado existe
+    no se renderiza. Las imágenes de resultado se escriben en segundo plano
+    mientras se procesa la página siguiente; cada resultado se entrega, en
+    orden, cuando su imagen ya está guardada.
+    """
+    waiting = deque()  # (índice, resultado) en orden, a la espera de su imagen
+    max_waiting = 2 * pipeline.image_writer.max_pending
+
+    def ready(block: bool) -> Iterator[Tuple[int, Dict]]:
+        """Entrega los resultados cuya imagen terminó (o todos, si block es True)."""
+        while waiting and (block or len(waiting) > max_waiting
+                           or pipeline.image_ready(waiting[0][1])):
+            index, result = waiting.popleft()
+            pipeline.complete_image(result)
+            yield index, result
+
+    for index, (pdf_path, page_number, total_pages) in enumerate(tasks):
+        result = pipeline.process_page(pdf_path, page_number, total_pages,
+                                       wait_for_image=False)
+        waiting.append((index, result))
+        yield from ready(block=False)
+
+    # Fin del lote: cerrar el último PDF y esperar todas las imágenes pendientes
+    pipeline.close()
+    yield from ready(block=True)
+
+
+def iter_page_results(
+    tasks: List[PageTask],
+    settings: Dict,
+    num_workers: int = 0,
+    calibration_file: str = "config/calibration_data.json",
+    completed: Optional[Dict[int, Dict]] = None
+) -> Iterator[Tuple[int, Dict]]:
+    """
+    Procesa páginas y entrega los resultados a medida que terminan.
+
+    Con un solo proceso de trabajo las páginas se procesan en el proceso actual
+    y en orden; con más, se reparten en un pool de procesos y los resultados
+    llegan en orden de finalización.
+
+    Args:
+        tasks: Lista de tareas (ruta_pdf, número_de_página, total_de_páginas)
+        settings: Parámetros de calificación (ver build_pipeline_settings)
+        num_workers: Cantidad de procesos (0 = automático)
+        calibration_file: Ruta al archivo de calibración
+        completed: Resultados ya conocidos {índice_de_tarea: resultado}, por
+            ejemplo recuperados de JobLedger; se entregan primero y esas
+            páginas no se vuelven a procesar
+
+    Yields:
+        Tuplas (índice_de_tarea, resultado)
+    """
+    completed = completed or {}
+    for index in sorted(completed):
+        # El PDF pudo cambiar de nombre o de carpeta desde que se registró
+        pdf_path, page_number, total_pages = tasks[index]
+        result = completed[index]
+        result['pdf_path'] = pdf_path
+        result['filename'] = page_filename(pdf_path, page_number, total_pages)
+        yield index, result
+
+    pending = [index for index in range(len(tasks)) if index not in completed]
+    if not pending:
+        return
+
+    if len(pending) < len(tasks):
+        # Procesar solo las páginas restantes, conservando los índices originales
+        for position, result in iter_page_results([tasks[i] for i in pending], settings,
+                                                  num_workers, calibration_file):
+            yield pending[position], result
+        return
+
+    workers = min(resolve_num_workers(num_workers), max(1, len(tasks)))
+
+    if workers == 1:
+        pipeline = GradingPipeline(settings, calibration_file)
+        try:
+            yield from _iter_serial(pipeline, tasks)
+        finally:
+            # También si se interrumpe la iteración: no dejar imágenes a medio escribir
+            pipeline.shutdown()
+        return
+
+    # 'spawn' evita heredar hilos de la interfaz gráfica en los procesos hijos
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_init_worker,
+                             initargs=(settings, calibration_file)) as executor:
+        futures = {
+            executor.submit(_process_page_task, task): index
+            for index, task in enumerate(tasks)
+        }
+
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                result = _failed_result(tasks[index], f"Error en proceso de trabajo: {e}")
+            yield index, result
@@ -32,6 +32,13 @@ class ImageProcessor:
     OUTPUT_WIDTH = 1700
     OUTPUT_HEIGHT = 2200
 
+    # Lado mayor de la copia reducida donde se buscan los marcadores
+    # (a 300 DPI un marcador de 10 mm queda de ~36 píxeles)
+    DETECTION_MAX_SIZE = 1000
+
+    # Criterio de término del refinamiento sub-píxel de las esquinas
+    SUBPIX_CRITERIA = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 0.01)
+
     def __init__(self):
         """Inicializa el procesador de imágenes con el diccionario ArUco."""
         # Cargar el diccionario ArUco especificado en constants
@@ -41,12 +48,36 @@ class ImageProcessor:
         self.aruco_params = cv2.aruco.DetectorParameters()
         self.aruco_detector = cv2.aruco.ArucoDetector(self.aruco_dict, self.aruco_params)
 
+        # CLAHE reutilizado en todas las páginas (ver preprocess_for_omr)
+        self.clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+
+    @staticmethod
+    def to_grayscale(image: np.ndarray) -> np.ndarray:
+        """
+        Convierte una imagen a escala de grises si aún no lo está.
+
+        Args:
+            image: Imagen BGR o en escala de grises
+
+        Returns:
+            Imagen en escala de grises (la misma si ya lo era)
+        """
+        if image.ndim == 2:
+            return image
+        return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
     def detect_aruco_markers(self, image: np.ndarray) -> Tuple[bool, Optional[np.ndarray], Optional[List[int]]]:
         """
         Detecta marcadores ArUco en la imagen.
 
+        La búsqueda se hace en dos etapas: primero en una copia reducida de la
+        página (los marcadores son grandes y la detección es mucho más rápida),
+        y luego las esquinas encontradas se refinan con precisión sub-píxel en
+        la imagen original. Solo si la copia reducida no entrega exactamente
+        4 marcadores se busca en la página completa.
+
         Args:
-            image: Imagen BGR de OpenCV
+            image: Imagen BGR o en escala de grises
 
         Returns:
             Tupla de (éxito, esquinas, ids):
@@ -55,10 +86,14 @@ class ImageProcessor:
             - ids: Lista con los IDs de los marcadores detectados
         """
         # Convertir a escala de grises para mejor detección
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        gray = self.to_grayscale(image)
 
-        # Detectar marcadores ArUco
-        corners, ids, rejected = self.aruco_detector.detectMarkers(gray)
+        # Etapa 1: buscar en una copia reducida
+        corners, ids = self._detect_downscaled(gray)
+
+        # Etapa 2 (respaldo): buscar en la página completa
+        if ids is None or len(ids) != 4:
+            corners, ids, rejected = self.aruco_detector.detectMarkers(gray)
 
         # Verificar que se detectaron exactamente 4 marcadores
         if ids is None or len(ids) != 4:
@@ -66,6 +101,36 @@ class ImageProcessor:
 
         return True, corners, ids.flatten().tolist()
 
+    def _detect_downscaled(self, gray: np.ndarray) -> Tuple[Optional[tuple], Optional[np.ndarray]]:
+        """
+        Detecta los marcadores en una copia reducida y refina sus esquinas en la original.
+
+        Args:
+            gray: Imagen en escala de grises (resolución original)
+
+        Returns:
+            Tupla (esquinas, ids) con las esquinas en coordenadas de la imagen
+            original, o (None, None) si la imagen ya es pequeña o no hay marcadores
+        """
+        scale = self.DETECTION_MAX_SIZE / max(gray.shape[:2])
+        if scale >= 1.0:
+            return None, None
+
+        small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        corners, ids, rejected = self.aruco_detector.detectMarkers(small)
+        if ids is None:
+            return None, None
+
+        # Llevar las esquinas a la resolución original (centros de píxel) y refinarlas.
+        # La ventana cubre el error del escalado sin alcanzar los bits internos del marcador
+        points = (np.concatenate(corners).reshape(-1, 2) + 0.5) / scale - 0.5
+        half_window = int(np.ceil(1.5 / scale))
+        cv2.cornerSubPix(gray, points, (half_window, half_window), (-1, -1),
+                         self.SUBPIX_CRITERIA)
+
+        refined = tuple(points.reshape(-1, 1, 4, 2).astype(np.float32))
+        return refined, ids
+
     def order_marker_corners(self, corners: np.ndarray, ids: List[int]) -> Optional[np.ndarray]:
         """
         Ordena las esquinas de los marcadores ArUco en el orden correcto.
@@ -112,11 +177,12 @@ class ImageProcessor:
         Aplica transformación de perspectiva para obtener una vista "plana" de la hoja.
 
         Args:
-            image: Imagen BGR de OpenCV
+            image: Imagen BGR o en escala de grises
             corners: Array con 4 puntos ordenados [top-left, top-right, bottom-right, bottom-left]
 
         Returns:
             Imagen transformada con dimensiones OUTPUT_WIDTH x OUTPUT_HEIGHT
+            (con los mismos canales que la imagen de entrada)
         """
         # Definir los puntos de destino (rectángulo perfecto)
         dst_points = np.array([
@@ -144,30 +210,59 @@ class ImageProcessor:
         Preprocesa la imagen para mejorar la detección OMR.
 
         Aplica:
-        - Conversión a escala de grises
+        - Conversión a escala de grises (si la imagen es BGR)
         - Ecualización de histograma adaptativa (CLAHE)
         - Filtro gaussiano para reducir ruido
-        - Binarización adaptativa
 
         Args:
-            image: Imagen BGR ya corregida por perspectiva
+            image: Imagen BGR o en escala de grises ya corregida por perspectiva
 
         Returns:
             Imagen preprocesada en escala de grises, lista para detección OMR
         """
         # Convertir a escala de grises
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        gray = self.to_grayscale(image)
 
         # Aplicar CLAHE (Contrast Limited Adaptive Histogram Equalization)
         # Mejora el contraste localmente, útil para diferentes condiciones de iluminación
-        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-        enhanced = clahe.apply(gray)
+        enhanced = self.clahe.apply(gray)
 
         # Aplicar filtro gaussiano para reducir ruido
         blurred = cv2.GaussianBlur(enhanced, (5, 5), 0)
 
         return blurred
 
+    def _locate_sheet(self, image: np.ndarray, result: Dict) -> Optional[np.ndarray]:
+        """
+        Detecta los marcadores ArUco y ordena sus centros.
+
+        Args:
+            image: Imagen BGR o en escala de grises
+            result: Diccionario de resultado; se completan 'message', 'corners' y 'marker_ids'
+
+        Returns:
+            Esquinas ordenadas (ver order_marker_corners) o None si falla
+        """
+        success, corners, ids = self.detect_aruco_markers(image)
+
+        if not success:
+            if ids is None:
+                result['message'] = "No se detectaron marcadores ArUco. Asegúrese de que la hoja esté visible."
+            else:
+                result['message'] = f"Se detectaron {len(ids)} marcadores. Se requieren exactamente 4."
+            return None
+
+        result['marker_ids'] = ids
+
+        ordered_corners = self.order_marker_corners(corners, ids)
+
+        if ordered_corners is None:
+            result['message'] = "No se pudieron ordenar los marcadores. Verifique que los IDs sean 0, 1, 2, 3."
+            return None
+
+        result['corners'] = ordered_corners
+        return ordered_corners
+
     def process_answer_sheet(self, image: np.ndarray) -> Dict:
         """
         Procesa una imagen de hoja de respuesta completa.
@@ -178,14 +273,18 @@ class ImageProcessor:
         3. Aplica corrección de perspectiva
         4. Preprocesa la imagen para OMR
 
+        Si la imagen viene en escala de grises (ver PDFProcessor con grayscale=True)
+        se procesa completa en un solo canal y la imagen corregida también queda
+        en escala de grises; el overlay la convierte a color solo al dibujar.
+
         Args:
-            image: Imagen BGR de OpenCV (frame de cámara)
+            image: Imagen BGR o en escala de grises (frame de cámara o página de PDF)
 
         Returns:
             Diccionario con:
             - 'success': bool - True si el procesamiento fue exitoso
             - 'message': str - Mensaje descriptivo del resultado
-            - 'warped_image': np.ndarray - Imagen corregida (BGR)
+            - 'warped_image': np.ndarray - Imagen corregida (BGR o escala de grises)
             - 'preprocessed': np.ndarray - Imagen preprocesada para OMR (escala de grises)
             - 'corners': np.ndarray - Esquinas ordenadas de los marcadores
             - 'marker_ids': List[int] - IDs de los marcadores detectados
@@ -199,27 +298,11 @@ class ImageProcessor:
             'marker_ids': None
         }
 
-        # Paso 1: Detectar marcadores ArUco
-        success, corners, ids = self.detect_aruco_markers(image)
-
-        if not success:
-            if ids is None:
-                result['message'] = "No se detectaron marcadores ArUco. Asegúrese de que la hoja esté visible."
-            else:
-                result['message'] = f"Se detectaron {len(ids)} marcadores. Se requieren exactamente 4."
-            return result
-
-        result['marker_ids'] = ids
-
-        # Paso 2: Ordenar las esquinas de los marcadores
-        ordered_corners = self.order_marker_corners(corners, ids)
-
+        # Pasos 1 y 2: Detectar y ordenar los marcadores ArUco
+        ordered_corners = self._locate_sheet(image, result)
         if ordered_corners is None:
-            result['message'] = "No se pudieron ordenar los marcadores. Verifique que los IDs sean 0, 1, 2, 3."
             return result
 
-        result['corners'] = ordered_corners
-
         # Paso 3: Aplicar transformación de perspectiva
         try:
             warped = self.apply_perspective_transform(image, ordered_corners)
@@ -242,6 +325,54 @@ class ImageProcessor:
 
         return result
 
+    def prepare_for_omr(self, image: np.ndarray) -> Dict:
+        """
+        Etapa combinada de detección, corrección y preprocesamiento para el OMR.
+
+        A diferencia de process_answer_sheet(), corrige la perspectiva una sola
+        vez en escala de grises y preprocesa esa misma imagen. La
+        imagen corregida en color no se genera: si se necesita (overlay de una
+        página a color), se obtiene después con apply_perspective_transform()
+        y las esquinas del resultado.
+
+        Args:
+            image: Imagen BGR o en escala de grises (página de PDF)
+
+        Returns:
+            Diccionario con:
+            - 'success': bool - True si el procesamiento fue exitoso
+            - 'message': str - Mensaje descriptivo del resultado
+            - 'warped_gray': np.ndarray - Imagen corregida en escala de grises
+            - 'preprocessed': np.ndarray - Imagen preprocesada para OMR
+            - 'corners': np.ndarray - Esquinas ordenadas de los marcadores
+            - 'marker_ids': List[int] - IDs de los marcadores detectados
+        """
+        result = {
+            'success': False,
+            'message': '',
+            'warped_gray': None,
+            'preprocessed': None,
+            'corners': None,
+            'marker_ids': None
+        }
+
+        ordered_corners = self._locate_sheet(image, result)
+        if ordered_corners is None:
+            return result
+
+        try:
+            warped_gray = self.apply_perspective_transform(self.to_grayscale(image), ordered_corners)
+            result['warped_gray'] = warped_gray
+            result['preprocessed'] = self.preprocess_for_omr(warped_gray)
+        except Exception as e:
+            result['message'] = f"Error al corregir y preprocesar imagen: {str(e)}"
+            return result
+
+        result['success'] = True
+        result['message'] = "Hoja detectada y procesada correctamente"
+
+        return result
+
     def draw_markers_debug(self, image: np.ndarray, corners: np.ndarray, ids: List[int]) -> np.ndarray:
         """
         Dibuja los marcadores detectados en la imagen para debugging.
@@ -0,0 +1,158 @@
+"""
+Módulo con el escritor de imágenes de resultado en segundo plano.
+
+Dibujar el overlay y codificar una imagen de 1700x2200 es una parte
+importante del tiempo por página. El escritor ejecuta esos trabajos en un
+pool de hilos (OpenCV libera el GIL al dibujar y codificar) mientras el
+pipeline continúa con la página siguiente. La cantidad de trabajos
+pendientes está acotada: al llegar al límite, submit() espera a que
+termine uno, de modo que las imágenes en cola no hacen crecer la memoria.
+
+También define el formato de las imágenes (JPEG, PNG o WebP) y su calidad.
+
+Author: Gerson
+Date: 2025
+"""
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Callable, List
+
+import cv2
+import numpy as np
+
+
+class ImageWriter:
+    """
+    Pool acotado de hilos para generar y guardar imágenes.
+
+    Con threads=0 los trabajos se ejecutan de inmediato en el hilo que los
+    envía (por ejemplo, en los procesos de trabajo, que ya se ejecutan en
+    paralelo entre sí).
+    """
+
+    # Formatos soportados: {formato: (extensión, parámetro de calidad de OpenCV)}
+    FORMATS = {
+        'jpg': ('.jpg', cv2.IMWRITE_JPEG_QUALITY),
+        'png': ('.png', cv2.IMWRITE_PNG_COMPRESSION),
+        'webp': ('.webp', cv2.IMWRITE_WEBP_QUALITY)
+    }
+
+    # Nivel de compresión PNG (0-9): PNG no tiene pérdida, la calidad no aplica
+    PNG_COMPRESSION = 3
+
+    def __init__(self, image_format: str = 'jpg', quality: int = 95, threads: int = 2,
+                 max_pending: int = 4):
+        """
+        Inicializa el escritor.
+
+        Args:
+            image_format: 'jpg', 'png' o 'webp'
+            quality: Calidad JPEG/WebP (1-100)
+            threads: Hilos de escritura (0 = escribir en el hilo que envía el trabajo)
+            max_pending: Trabajos pendientes como máximo antes de que submit() espere
+
+        Raises:
+            ValueError: Si el formato o la calidad no son válidos
+        """
+        image_format = image_format.lower().lstrip('.')
+        if image_format == 'jpeg':
+            image_format = 'jpg'
+        if image_format not in self.FORMATS:
+            raise ValueError(
+                f"Formato de imagen desconocido: {image_format}. "
+                f"Opciones: {', '.join(self.FORMATS)}"
+            )
+        if not 1 <= quality <= 100:
+            raise ValueError("La calidad de imagen debe estar entre 1 y 100")
+
+        self.image_format = image_format
+        self.quality = quality
+        self.extension, quality_flag = self.FORMATS[image_format]
+        if image_format == 'png':
+            self.params = [quality_flag, self.PNG_COMPRESSION]
+        else:
+            self.params = [quality_flag, int(quality)]
+
+        self.max_pending = max(1, max_pending)
+        self.threads = max(0, threads)
+        self._executor = None
+        if self.threads:
+            self._executor = ThreadPoolExecutor(max_workers=self.threads,
+                                                thread_name_prefix="image-writer")
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def write(self, path: str, image: np.ndarray) -> bool:
+        """
+        Guarda una imagen con el formato y la calidad configurados.
+
+        Args:
+            path: Ruta del archivo (debe tener la extensión del formato)
+            image: Imagen a guardar
+
+        Returns:
+            True si se guardó correctamente
+        """
+        return bool(cv2.imwrite(str(path), image, self.params))
+
+    def submit(self, job: Callable, *args) -> Future:
+        """
+        Envía un trabajo al pool, esperando si ya hay demasiados pendientes.
+
+        Args:
+            job: Función a ejecutar (debe capturar sus propios errores)
+            *args: Argumentos de la función
+
+        Returns:
+            Future del trabajo
+        """
+        if self._executor is None:
+            future = Future()
+            try:
+                future.set_result(job(*args))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+
+        # Contrapresión: no encolar más imágenes de las permitidas
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(job, *args)
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._pending.add(future)
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, future: Future):
+        """Libera el cupo de un trabajo terminado."""
+        with self._lock:
+            self._pending.discard(future)
+        self._slots.release()
+
+    def flush(self) -> List[Future]:
+        """
+        Espera a que terminen todos los trabajos enviados.
+
+        Returns:
+            Futures de los trabajos que terminaron con error
+        """
+        with self._lock:
+            pending = list(self._pending)
+        if not pending:
+            return []
+
+        wait(pending)
+        return [future for future in pending if future.exception() is not None]
+
+    def close(self):
+        """Espera los trabajos pendientes y detiene los hilos."""
+        self.flush()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
@@ -0,0 +1,220 @@
+"""
+Módulo con el registro persistente (SQLite) de páginas ya calificadas.
+
+Cada página se identifica por el hash del contenido de su PDF, su número de
+página y un hash del contexto de calificación (pauta, escala de notas,
+prueba, Excel y calibración). Al volver a procesar los mismos PDFs con el
+mismo contexto, las páginas terminadas se recuperan del registro en lugar
+de procesarse otra vez, lo que permite reanudar un lote interrumpido.
+
+Author: Gerson
+Date: 2025
+"""
+
+import hashlib
+import json
+import pickle
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+
+class JobLedger:
+    """
+    Registro de páginas procesadas guardado en una base de datos SQLite.
+
+    Solo las páginas terminadas (exitosas, sin revisión pendiente) se
+    reutilizan; las que fallaron o esperan revisión manual se vuelven a
+    procesar porque la revisión necesita la imagen de la hoja, y las que no
+    se pudieron guardar en Excel, para volver a intentarlo.
+    """
+
+    DEFAULT_PATH = Path.home() / ".test_scanner" / "ledger.sqlite3"
+
+    # Estados de una página
+    STATUS_DONE = 'done'  # Calificada (y guardada en Excel si correspondía)
+    STATUS_REVIEW = 'review'  # Requiere revisión manual
+    STATUS_ERROR = 'error'  # No se pudo procesar
+    STATUS_UNSAVED = 'unsaved'  # Calificada, pero no se pudo guardar en Excel
+
+    # Campos del resultado que no se guardan (imágenes, claves de caché y marcas)
+    TRANSIENT_FIELDS = ('warped_image', 'overlay_image', 'review_image_key', 'from_ledger', 'stats')
+
+    def __init__(self, db_path: Optional[str] = None):
+        """
+        Abre (o crea) el registro.
+
+        Args:
+            db_path: Ruta del archivo SQLite (default: ~/.test_scanner/ledger.sqlite3)
+        """
+        self.db_path = Path(db_path) if db_path else self.DEFAULT_PATH
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # La conexión se comparte entre el hilo de procesamiento y el de la interfaz
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                pdf_hash TEXT NOT NULL,
+                page_number INTEGER NOT NULL,
+                context TEXT NOT NULL,
+                pdf_path TEXT,
+                status TEXT NOT NULL,
+                matricula TEXT,
+                nota REAL,
+                result BLOB,
+                updated_at REAL,
+                PRIMARY KEY (pdf_hash, page_number, context)
+            )
+        """)
+        self._connection.commit()
+
+    @staticmethod
+    def file_hash(pdf_path: str) -> str:
+        """
+        Calcula el hash SHA-256 del contenido de un archivo.
+
+        Args:
+            pdf_path: Ruta al archivo
+
+        Returns:
+            Hash en hexadecimal
+        """
+        digest = hashlib.sha256()
+        with open(pdf_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def context_hash(settings: Dict, excel_path: Optional[str] = None,
+                     calibration_file: str = "config/calibration_data.json") -> str:
+        """
+        Calcula el hash del contexto de calificación.
+
+        Un cambio de pauta, escala de notas, prueba, Excel o calibración
+        produce otro contexto, por lo que las páginas se vuelven a procesar.
+
+        Args:
+            settings: Parámetros del pipeline (ver build_pipeline_settings)
+            excel_path: Archivo Excel donde se guardan las notas
+            calibration_file: Archivo de calibración
+
+        Returns:
+            Hash en hexadecimal
+        """
+        context = {
+            'answer_key': {str(k): v for k, v in (settings.get('answer_key') or {}).items()},
+            'num_questions': settings.get('num_questions'),
+            'passing_percentage': settings.get('passing_percentage'),
+            'min_grade': settings.get('min_grade'),
+            'max_grade': settings.get('max_grade'),
+            'passing_grade': settings.get('passing_grade'),
+            'test_name': settings.get('test_name'),
+            'excel_path': str(Path(excel_path).resolve()) if excel_path else None
+        }
+
+        digest = hashlib.sha256(json.dumps(context, sort_keys=True).encode('utf-8'))
+        try:
+            digest.update(Path(calibration_file).read_bytes())
+        except OSError:
+            pass
+        return digest.hexdigest()
+
+    @classmethod
+    def status_for(cls, result: Dict) -> str:
+        """Determina el estado de una página a partir de su resultado."""
+        if not result.get('success'):
+            return cls.STATUS_ERROR
+        if result.get('needs_review'):
+            return cls.STATUS_REVIEW
+        if result.get('saved_to_excel') is False and result.get('excel_error'):
+            # Se vuelve a procesar para guardarla cuando el Excel se corrija
+            return cls.STATUS_UNSAVED
+        return cls.STATUS_DONE
+
+    def record(self, pdf_hash: str, context: str, result: Dict):
+        """
+        Guarda (o actualiza) el resultado de una página.
+
+        Args:
+            pdf_hash: Hash del PDF (ver file_hash)
+            context: Hash del contexto (ver context_hash)
+            result: Resultado de la página
+        """
+        stored = {k: v for k, v in result.items() if k not in self.TRANSIENT_FIELDS}
+        nota = result.get('nota')
+
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO pages "
+                "(pdf_hash, page_number, context, pdf_path, status, matricula, nota, result, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (pdf_hash, result['page_number'], context, result.get('pdf_path'),
+                 self.status_for(result), result.get('matricula'),
+                 float(nota) if nota is not None else None,
+                 pickle.dumps(stored), time.time())
+            )
+            self._connection.commit()
+
+    def get_completed(self, pdf_hash: str, context: str) -> Dict[int, Dict]:
+        """
+        Obtiene las páginas terminadas de un PDF en un contexto.
+
+        Args:
+            pdf_hash: Hash del PDF
+            context: Hash del contexto
+
+        Returns:
+            Diccionario {número_de_página: resultado}
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT page_number, result FROM pages "
+                "WHERE pdf_hash = ? AND context = ? AND status = ?",
+                (pdf_hash, context, self.STATUS_DONE)
+            ).fetchall()
+
+        return {page_number: pickle.loads(blob) for page_number, blob in rows}
+
+    def find_completed(self, tasks: List[Tuple[str, int, int]],
+                       context: str) -> Tuple[Dict[str, str], Dict[int, Dict]]:
+        """
+        Busca en el registro las tareas de página que ya están terminadas.
+
+        Args:
+            tasks: Lista de tareas (ruta_pdf, número_de_página, total_de_páginas)
+            context: Hash del contexto
+
+        Returns:
+            Tupla (hashes, terminadas):
+            - hashes: {ruta_pdf: hash del contenido}
+            - terminadas: {índice_de_tarea: resultado guardado}, marcados
+              con 'from_ledger' (ya guardados en Excel en la ejecución anterior)
+        """
+        hashes = {}
+        completed_by_pdf = {}
+        for pdf_path, _, _ in tasks:
+            if pdf_path not in hashes:
+                try:
+                    hashes[pdf_path] = self.file_hash(pdf_path)
+                except OSError:
+                    continue
+                completed_by_pdf[pdf_path] = self.get_completed(hashes[pdf_path], context)
+
+        completed = {}
+        for index, (pdf_path, page_number, _) in enumerate(tasks):
+            result = completed_by_pdf.get(pdf_path, {}).get(page_number)
+            if result is not None:
+                result['from_ledger'] = True
+                completed[index] = result
+
+        return hashes, completed
+
+    def close(self):
+        """Cierra la conexión con la base de datos."""
+        with self._lock:
+            self._connection.close()
@@ -13,10 +13,15 @@ import json
 import numpy as np
 from pathlib import Path
 from typing import Dict, List, Tuple, Optional
+from .circle_table import CircleTable
 from ..utils.constants import (
+    ALTERNATIVES,
+    DEFAULT_FILL_STRATEGY,
+    FILL_STRATEGIES,
     MIN_FILL_PERCENTAGE,
     MAX_FILL_PERCENTAGE,
     MATRICULA_DIGITS,
+    MAX_QUESTIONS,
     NUM_ALTERNATIVES
 )
 
@@ -29,13 +34,45 @@ class OMRDetector:
     determinar si está marcado con bolígrafo.
     """
 
-    def __init__(self, calibration_file: str = "config/calibration_data.json"):
+    # Fracción del radio calibrado que se analiza
+    # Con escáner de alta resolución (300 DPI), podemos usar un radio mayor
+    # 0.7 = 70% del radio para buena precisión sin interferencia de círculos vecinos
+    EFFECTIVE_RADIUS_RATIO = 0.7
+
+    # Estrategias disponibles para medir el relleno de los círculos:
+    # - 'exact': cuenta los píxeles oscuros de cada disco sobre la imagen en grises
+    # - 'integral': binariza la hoja una vez y suma cada disco con una tabla de áreas
+    #   acumuladas; el costo por círculo no depende de la cantidad de círculos
+    # Ambas estrategias producen exactamente los mismos porcentajes.
+    FILL_STRATEGIES = tuple(FILL_STRATEGIES)
+
+    # Márgenes para el puntaje de ambigüedad de cada pregunta (ver _ambiguity):
+    # a qué distancia (en puntos porcentuales) de los umbrales de relleno y de
+    # diferencia una decisión deja de considerarse dudosa. Las preguntas sin
+    # marcar quedan cerca del umbral de relleno (el texto impreso oscurece hasta
+    # ~70%), por eso su margen es menor.
+    AMBIGUITY_FILL_MARGIN = 5.0
+    AMBIGUITY_DIFFERENCE_MARGIN = 10.0
+
+    def __init__(self, calibration_file: str = "config/calibration_data.json",
+                 fill_strategy: str = DEFAULT_FILL_STRATEGY):
         """
         Inicializa el detector OMR con los datos de calibración.
 
         Args:
             calibration_file: Ruta al archivo JSON con las coordenadas de los círculos
+            fill_strategy: Estrategia de medición del relleno (ver FILL_STRATEGIES)
+
+        Raises:
+            ValueError: Si la estrategia de relleno no existe
         """
+        if fill_strategy not in self.FILL_STRATEGIES:
+            raise ValueError(
+                f"Estrategia de relleno desconocida: {fill_strategy}. "
+                f"Opciones: {', '.join(self.FILL_STRATEGIES)}"
+            )
+        self.fill_strategy = fill_strategy
+
         self.calibration_file = calibration_file
         self.calibration_data = self._load_calibration()
 
@@ -43,6 +80,9 @@ class OMRDetector:
         self.min_fill = MIN_FILL_PERCENTAGE
         self.max_fill = MAX_FILL_PERCENTAGE
 
+        # Tabla compilada de círculos (arrays, índices y stencils)
+        self.circles = CircleTable(self.calibration_data, self.EFFECTIVE_RADIUS_RATIO)
+
     def _load_calibration(self) -> Dict:
         """
         Carga los datos de calibración desde el archivo JSON.
@@ -65,44 +105,182 @@ class OMRDetector:
         with open(calibration_path, 'r', encoding='utf-8') as f:
             return json.load(f)
 
-    def calculate_fill_percentage(self, image: np.ndarray, x: int, y: int, radius: int) -> float:
+    def _compute_threshold(self, image: np.ndarray) -> float:
         """
-        Calcula el porcentaje de píxeles oscuros dentro de un círculo.
+        Calcula el umbral de Otsu para toda la hoja.
 
         Args:
             image: Imagen en escala de grises
-            x, y: Coordenadas del centro del círculo
-            radius: Radio del círculo en píxeles
 
         Returns:
-            Porcentaje de píxeles oscuros (0-100)
+            Umbral bajo el cual un píxel se considera oscuro
         """
-        # Con escáner de alta resolución (300 DPI), podemos usar un radio mayor
-        # 0.7 = 70% del radio para buena precisión sin interferencia de círculos vecinos
-        effective_radius = int(radius * 0.7)
+        # Calcular umbral adaptativo basado en la mediana de la imagen
+        # Esto ayuda a manejar diferentes condiciones de iluminación
+        return cv2.threshold(image, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[0]
 
-        # Crear máscara circular
+    def _fill_for_circles(
+        self,
+        image: np.ndarray,
+        xs: np.ndarray,
+        ys: np.ndarray,
+        effective_radii: np.ndarray,
+        threshold: float
+    ) -> np.ndarray:
+        """
+        Calcula el porcentaje de píxeles oscuros de varios círculos a la vez.
+
+        Args:
+            image: Imagen en escala de grises
+            xs, ys: Arrays con las coordenadas de los centros
+            effective_radii: Array con los radios efectivos (ya escalados) de los círculos
+            threshold: Umbral de oscuridad (ver _compute_threshold)
+
+        Returns:
+            Array (N,) con el porcentaje de píxeles oscuros (0-100) de cada círculo
+        """
         height, width = image.shape
-        mask = np.zeros((height, width), dtype=np.uint8)
-        cv2.circle(mask, (x, y), effective_radius, 255, -1)
+        fills = np.zeros(len(xs), dtype=np.float64)
+
+        # Agrupar por radio: todos los círculos de un grupo comparten el mismo disco
+        for radius in np.unique(effective_radii):
+            idx = np.flatnonzero(effective_radii == radius)
+            radius = int(radius)
+            if radius in self.circles.stencils:
+                dy, dx = self.circles.stencils[radius]
+            else:
+                dy, dx = CircleTable.disk_offsets(radius)
 
-        # Extraer píxeles dentro del círculo
-        circle_pixels = image[mask == 255]
+            # Coordenadas (círculos x píxeles del disco)
+            py = ys[idx, None] + dy[None, :]
+            px = xs[idx, None] + dx[None, :]
 
-        if len(circle_pixels) == 0:
-            return 0.0
+            # Los píxeles fuera de la imagen no forman parte del círculo
+            inside = (py >= 0) & (py < height) & (px >= 0) & (px < width)
+            pixels = image[np.clip(py, 0, height - 1), np.clip(px, 0, width - 1)]
 
-        # Calcular umbral adaptativo basado en la mediana de la imagen
-        # Esto ayuda a manejar diferentes condiciones de iluminación
-        threshold = cv2.threshold(image, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[0]
+            # Contar píxeles oscuros (por debajo del umbral)
+            dark_pixels = np.sum((pixels < threshold) & inside, axis=1)
+            total_pixels = np.sum(inside, axis=1)
 
-        # Contar píxeles oscuros (por debajo del umbral)
-        dark_pixels = np.sum(circle_pixels < threshold)
-        total_pixels = len(circle_pixels)
+            valid = total_pixels > 0
+            fills[idx[valid]] = (dark_pixels[valid] / total_pixels[valid]) * 100
 
-        percentage = (dark_pixels / total_pixels) * 100
+        return fills
 
-        return percentage
+    def _fill_for_circles_integral(
+        self,
+        image: np.ndarray,
+        xs: np.ndarray,
+        ys: np.ndarray,
+        effective_radii: np.ndarray,
+        threshold: float
+    ) -> np.ndarray:
+        """
+        Calcula el porcentaje de píxeles oscuros usando una tabla de áreas acumuladas.
+
+        La hoja se binariza una sola vez y cada disco se suma como una serie de
+        tramos horizontales, cada uno con cuatro accesos a la tabla. El resultado
+        es idéntico al de _fill_for_circles.
+
+        Args:
+            image: Imagen en escala de grises
+            xs, ys: Arrays con las coordenadas de los centros
+            effective_radii: Array con los radios efectivos (ya escalados) de los círculos
+            threshold: Umbral de oscuridad (ver _compute_threshold)
+
+        Returns:
+            Array (N,) con el porcentaje de píxeles oscuros (0-100) de cada círculo
+        """
+        height, width = image.shape
+        fills = np.zeros(len(xs), dtype=np.float64)
+
+        # Binarizar una vez y construir la tabla de áreas acumuladas (H+1, W+1)
+        dark = (image < threshold).astype(np.uint8)
+        area_table = cv2.integral(dark)
+
+        for radius in np.unique(effective_radii):
+            idx = np.flatnonzero(effective_radii == radius)
+            radius = int(radius)
+            if radius in self.circles.spans:
+                dy, x0, x1 = self.circles.spans[radius]
+            else:
+                dy, x0, x1 = CircleTable.disk_spans(radius)
+
+            # Tramos (círculos x filas del disco), recortados a los bordes de la imagen
+            rows = ys[idx, None] + dy[None, :]
+            row_inside = (rows >= 0) & (rows < height)
+            rows = np.clip(rows, 0, height - 1)
+            left = np.clip(xs[idx, None] + x0[None, :], 0, width)
+            right = np.clip(xs[idx, None] + x1[None, :] + 1, 0, width)
+
+            span_dark = (
+                area_table[rows + 1, right] - area_table[rows + 1, left] -
+                area_table[rows, right] + area_table[rows, left]
+            )
+
+            dark_pixels = np.sum(np.where(row_inside, span_dark, 0), axis=1)
+            total_pixels = np.sum(np.where(row_inside, right - left, 0), axis=1)
+
+            valid = total_pixels > 0
+            fills[idx[valid]] = (dark_pixels[valid] / total_pixels[valid]) * 100
+
+        return fills
+
+    def calculate_fill_percentages(self, image: np.ndarray) -> np.ndarray:
+        """
+        Calcula el porcentaje de relleno de todos los círculos de la hoja en una sola pasada.
+
+        El umbral de Otsu se calcula una única vez por hoja y los círculos se evalúan
+        de forma vectorizada, sin construir una máscara del tamaño de la imagen.
+        La medición usa la estrategia configurada en self.fill_strategy.
+
+        Args:
+            image: Imagen en escala de grises
+
+        Returns:
+            Array (N,) con porcentajes de relleno (0-100) en orden de calibración:
+            primero los círculos de matrícula y luego los de respuestas
+        """
+        threshold = self._compute_threshold(image)
+
+        if self.fill_strategy == 'integral':
+            fill_function = self._fill_for_circles_integral
+        else:
+            fill_function = self._fill_for_circles
+
+        return fill_function(
+            image,
+            self.circles.x,
+            self.circles.y,
+            self.circles.effective_radius,
+            threshold
+        )
+
+    def calculate_fill_percentage(self, image: np.ndarray, x: int, y: int, radius: int) -> float:
+        """
+        Calcula el porcentaje de píxeles oscuros dentro de un círculo.
+
+        Para evaluar la hoja completa usar calculate_fill_percentages(), que calcula
+        el umbral una sola vez.
+
+        Args:
+            image: Imagen en escala de grises
+            x, y: Coordenadas del centro del círculo
+            radius: Radio del círculo en píxeles
+
+        Returns:
+            Porcentaje de píxeles oscuros (0-100)
+        """
+        threshold = self._compute_threshold(image)
+        fills = self._fill_for_circles(
+            image,
+            np.array([x], dtype=np.intp),
+            np.array([y], dtype=np.intp),
+            np.array([int(radius * self.EFFECTIVE_RADIUS_RATIO)], dtype=np.intp),
+            threshold
+        )
+        return fills[0]
 
     def is_circle_marked(self, image: np.ndarray, x: int, y: int, radius: int) -> Tuple[bool, float, str]:
         """
@@ -130,7 +308,24 @@ class OMRDetector:
         else:
             return False, fill_percentage, 'ambiguous'
 
-    def detect_matricula(self, image: np.ndarray) -> Dict:
+    @staticmethod
+    def _calibration_order(index_row: np.ndarray) -> np.ndarray:
+        """
+        Obtiene las posiciones válidas de una fila de índice, en orden de calibración.
+
+        Mantener el orden del archivo de calibración preserva el desempate del
+        ordenamiento estable por porcentaje de relleno.
+
+        Args:
+            index_row: Fila de matricula_index o respuestas_index
+
+        Returns:
+            Array con las posiciones (dígito o alternativa) que tienen círculo
+        """
+        positions = np.flatnonzero(index_row >= 0)
+        return positions[np.argsort(index_row[positions], kind='stable')]
+
+    def detect_matricula(self, image: np.ndarray, fills: Optional[np.ndarray] = None) -> Dict:
         """
         Detecta el número de matrícula marcado en la hoja usando comparación relativa.
 
@@ -139,13 +334,16 @@ class OMRDetector:
 
         Args:
             image: Imagen preprocesada en escala de grises
+            fills: Array (N,) opcional de calculate_fill_percentages() ya calculado
 
         Returns:
             Diccionario con:
             - 'success': bool - True si se detectó correctamente
             - 'matricula': str - Número de matrícula (10 dígitos)
             - 'confidence': float - Nivel de confianza (0-100)
-            - 'details': dict - Información detallada por columna
+            - 'details': dict - Información detallada por columna (incluye
+              'ambiguity': 0-1, qué tan cerca estuvo la decisión de cambiar)
+            - 'ambiguity': float - Mayor ambigüedad entre las columnas (0-1)
             - 'errors': list - Lista de errores encontrados
         """
         result = {
@@ -153,12 +351,15 @@ class OMRDetector:
             'matricula': '',
             'confidence': 0.0,
             'details': {},
+            'ambiguity': 0.0,
             'errors': []
         }
 
-        matricula_circles = self.calibration_data['matricula']
         detected_digits = []
 
+        if fills is None:
+            fills = self.calculate_fill_percentages(image)
+
         # Umbral de diferencia mínima (15%) para considerar que un círculo está marcado
         # Si un círculo es 15% más oscuro que los demás, es el marcado
         MIN_DIFFERENCE_PERCENTAGE = 15.0
@@ -169,26 +370,19 @@ class OMRDetector:
 
         # Procesar cada columna (10 columnas para 10 dígitos)
         for col in range(1, MATRICULA_DIGITS + 1):
-            # Obtener círculos de esta columna
-            col_circles = [c for c in matricula_circles if c['columna'] == col]
+            # Obtener círculos de esta columna desde el índice compilado
+            col_index = self.circles.matricula_index[col - 1]
+            col_digits = self._calibration_order(col_index)
 
-            if not col_circles:
+            if len(col_digits) == 0:
                 result['errors'].append(f"No se encontraron círculos para columna {col}")
                 continue
 
-            # Medir el porcentaje de relleno de TODOS los círculos de esta columna
-            fill_percentages = []
-            for circle in col_circles:
-                fill_pct = self.calculate_fill_percentage(
-                    image,
-                    circle['x'],
-                    circle['y'],
-                    circle['radius']
-                )
-                fill_percentages.append({
-                    'digito': circle['digito'],
-                    'fill_percentage': fill_pct
-                })
+            # Porcentaje de relleno de TODOS los círculos de esta columna
+            fill_percentages = [
+                {'digito': int(digito), 'fill_percentage': fills[col_index[digito]]}
+                for digito in col_digits
+            ]
 
             # Ordenar por porcentaje de relleno (mayor a menor)
             fill_percentages.sort(key=lambda x: x['fill_percentage'], reverse=True)
@@ -200,13 +394,20 @@ class OMRDetector:
             # Verificar que el más oscuro sea SIGNIFICATIVAMENTE más oscuro que el segundo
             difference = darkest['fill_percentage'] - second_darkest['fill_percentage']
 
+            # Qué tan cerca de los umbrales quedó esta columna (una matrícula dudosa
+            # necesita la revisión de la hoja completa)
+            ambiguity = self._ambiguity(darkest['fill_percentage'], difference,
+                                        MIN_FILL_THRESHOLD, MIN_DIFFERENCE_PERCENTAGE)
+            result['ambiguity'] = max(result['ambiguity'], ambiguity)
+
             if difference >= MIN_DIFFERENCE_PERCENTAGE and darkest['fill_percentage'] >= MIN_FILL_THRESHOLD:
                 # Hay una marca clara Y supera el umbral mínimo de relleno
                 detected_digits.append(str(darkest['digito']))
                 result['details'][f'col_{col}'] = {
                     'digito': darkest['digito'],
                     'fill_percentage': darkest['fill_percentage'],
-                    'difference': difference
+                    'difference': difference,
+                    'ambiguity': ambiguity
                 }
             else:
                 # No hay diferencia suficiente o no supera el umbral mínimo (sin marcar o marca ambigua)
@@ -228,7 +429,32 @@ class OMRDetector:
 
         return result
 
-    def detect_respuestas(self, image: np.ndarray) -> Dict:
+    def _ambiguity(self, top_fill: float, difference: float,
+                   fill_threshold: float, difference_threshold: float) -> float:
+        """
+        Calcula qué tan cerca está una decisión de cambiar de resultado.
+
+        La decisión depende de si el relleno más alto supera fill_threshold y,
+        cuando lo supera, de si la diferencia con el segundo supera
+        difference_threshold. El puntaje es 1 justo en un umbral y baja a 0 al
+        alejarse de él más que el margen correspondiente.
+
+        Args:
+            top_fill: Porcentaje de relleno del círculo más oscuro
+            difference: Diferencia con el segundo más oscuro
+            fill_threshold: Relleno mínimo para considerar que hay marca
+            difference_threshold: Diferencia mínima para una marca clara
+
+        Returns:
+            Ambigüedad entre 0 (decisión segura) y 1 (en el umbral)
+        """
+        ambiguity = 1.0 - abs(top_fill - fill_threshold) / self.AMBIGUITY_FILL_MARGIN
+        if top_fill >= fill_threshold:
+            ambiguity = max(ambiguity,
+                            1.0 - abs(difference - difference_threshold) / self.AMBIGUITY_DIFFERENCE_MARGIN)
+        return float(min(1.0, max(0.0, ambiguity)))
+
+    def detect_respuestas(self, image: np.ndarray, fills: Optional[np.ndarray] = None) -> Dict:
         """
         Detecta las respuestas marcadas en la hoja usando comparación relativa.
 
@@ -237,13 +463,15 @@ class OMRDetector:
 
         Args:
             image: Imagen preprocesada en escala de grises
+            fills: Array (N,) opcional de calculate_fill_percentages() ya calculado
 
         Returns:
             Diccionario con:
             - 'success': bool - True si se detectaron todas las respuestas
             - 'respuestas': dict - Diccionario {pregunta: alternativa}
             - 'confidence': float - Nivel de confianza (0-100)
-            - 'details': dict - Información detallada por pregunta
+            - 'details': dict - Información detallada por pregunta (incluye
+              'ambiguity': 0-1, qué tan cerca estuvo la decisión de cambiar)
             - 'errors': list - Lista de errores encontrados
         """
         result = {
@@ -254,34 +482,28 @@ class OMRDetector:
             'errors': []
         }
 
-        respuestas_circles = self.calibration_data['respuestas']
+        if fills is None:
+            fills = self.calculate_fill_percentages(image)
 
         # Umbral de diferencia mínima (15%) para considerar que un círculo está marcado
         # Si un círculo es 15% más oscuro que los demás, es el marcado
         MIN_DIFFERENCE_PERCENTAGE = 15.0
 
         # Procesar cada pregunta (1-100)
-        for pregunta in range(1, 101):
-            # Obtener círculos de esta pregunta
-            pregunta_circles = [c for c in respuestas_circles if c['pregunta'] == pregunta]
+        for pregunta in range(1, MAX_QUESTIONS + 1):
+            # Obtener círculos de esta pregunta desde el índice compilado
+            pregunta_index = self.circles.respuestas_index[pregunta - 1]
+            pregunta_alts = self._calibration_order(pregunta_index)
 
-            if not pregunta_circles:
+            if len(pregunta_alts) == 0:
                 result['errors'].append(f"No se encontraron círculos para pregunta {pregunta}")
                 continue
 
-            # Medir el porcentaje de relleno de TODAS las alternativas de esta pregunta
-            fill_percentages = []
-            for circle in pregunta_circles:
-                fill_pct = self.calculate_fill_percentage(
-                    image,
-                    circle['x'],
-                    circle['y'],
-                    circle['radius']
-                )
-                fill_percentages.append({
-                    'alternativa': circle['alternativa'],
-                    'fill_percentage': fill_pct
-                })
+            # Porcentaje de relleno de TODAS las alternativas de esta pregunta
+            fill_percentages = [
+                {'alternativa': ALTERNATIVES[alt], 'fill_percentage': fills[pregunta_index[alt]]}
+                for alt in pregunta_alts
+            ]
 
             # Ordenar por porcentaje de relleno (mayor a menor)
             fill_percentages.sort(key=lambda x: x['fill_percentage'], reverse=True)
@@ -298,6 +520,10 @@ class OMRDetector:
             # El texto impreso dentro de los círculos oscurece entre 45-70%, por eso usamos 75%
             MIN_FILL_THRESHOLD = 75.0
 
+            # Qué tan cerca de los umbrales quedó esta pregunta (para ordenar la revisión)
+            ambiguity = self._ambiguity(darkest['fill_percentage'], difference,
+                                        MIN_FILL_THRESHOLD, MIN_DIFFERENCE_PERCENTAGE)
+
             if difference >= MIN_DIFFERENCE_PERCENTAGE and darkest['fill_percentage'] >= MIN_FILL_THRESHOLD:
                 # Hay una marca clara Y supera el umbral mínimo de relleno
                 result['respuestas'][pregunta] = darkest['alternativa']
@@ -305,7 +531,8 @@ class OMRDetector:
                     'status': 'ok',
                     'alternativa': darkest['alternativa'],
                     'fill_percentage': darkest['fill_percentage'],
-                    'difference': difference
+                    'difference': difference,
+                    'ambiguity': ambiguity
                 }
             else:
                 # Diferencia < 15%: puede ser múltiple marca o sin marca
@@ -329,7 +556,8 @@ class OMRDetector:
                             'status': 'multiple',
                             'marked_alternatives': marked_alternatives,
                             'difference': difference,
-                            'fill_percentages': {fp['alternativa']: fp['fill_percentage'] for fp in fill_percentages}
+                            'fill_percentages': {fp['alternativa']: fp['fill_percentage'] for fp in fill_percentages},
+                            'ambiguity': ambiguity
                         }
                         result['errors'].append(
                             f"Pregunta {pregunta}: Múltiple marca detectada ({', '.join(marked_alternatives)}, "
@@ -342,14 +570,16 @@ class OMRDetector:
                             'status': 'ok',
                             'alternativa': darkest['alternativa'],
                             'fill_percentage': darkest['fill_percentage'],
-                            'difference': difference
+                            'difference': difference,
+                            'ambiguity': ambiguity
                         }
                 else:
                     # SIN MARCA: Ninguna alternativa supera el umbral mínimo
                     result['respuestas'][pregunta] = None
                     result['details'][pregunta] = {
                         'status': 'empty',
-                        'difference': difference
+                        'difference': difference,
+                        'ambiguity': ambiguity
                     }
 
         # Calcular confianza
@@ -361,14 +591,18 @@ class OMRDetector:
 
         return result
 
-    def detect_answer_sheet(self, preprocessed_image: np.ndarray) -> Dict:
+    def detect_answer_sheet(self, preprocessed_image: Optional[np.ndarray],
+                            fills: Optional[np.ndarray] = None) -> Dict:
         """
         Detecta toda la información de la hoja de respuestas.
 
         Esta es la función principal que combina detección de matrícula y respuestas.
 
         Args:
-            preprocessed_image: Imagen preprocesada en escala de grises
+            preprocessed_image: Imagen preprocesada en escala de grises (puede ser
+                None si se entregan los rellenos)
+            fills: Array (N,) opcional de calculate_fill_percentages() ya calculado,
+                por ejemplo recuperado de DetectionCache
 
         Returns:
             Diccionario con:
@@ -385,12 +619,16 @@ class OMRDetector:
         }
 
         try:
+            # Medir el relleno de todos los círculos en una sola pasada
+            if fills is None:
+                fills = self.calculate_fill_percentages(preprocessed_image)
+
             # Detectar matrícula
-            matricula_result = self.detect_matricula(preprocessed_image)
+            matricula_result = self.detect_matricula(preprocessed_image, fills)
             result['matricula'] = matricula_result
 
             # Detectar respuestas
-            respuestas_result = self.detect_respuestas(preprocessed_image)
+            respuestas_result = self.detect_respuestas(preprocessed_image, fills)
             result['respuestas'] = respuestas_result
 
             # Calcular confianza general
@@ -411,6 +649,18 @@ class OMRDetector:
 
         return result
 
+    def _draw_circle(self, overlay: np.ndarray, circle_index: int, color: Tuple[int, int, int]):
+        """
+        Dibuja el contorno de un círculo calibrado sobre el overlay.
+
+        Args:
+            overlay: Imagen BGR sobre la que se dibuja
+            circle_index: Índice del círculo en la tabla compilada
+            color: Color BGR del contorno
+        """
+        x, y, radius = self.circles.circle(circle_index)
+        cv2.circle(overlay, (x, y), radius, color, 2)
+
     def create_visual_overlay(
         self,
         image: np.ndarray,
@@ -421,14 +671,17 @@ class OMRDetector:
         Crea una imagen con overlay visual de los resultados de detección.
 
         Args:
-            image: Imagen BGR original (corregida por perspectiva)
+            image: Imagen BGR o en escala de grises (corregida por perspectiva)
             detection_result: Resultado de detect_answer_sheet()
             answer_key: Diccionario opcional con pauta de respuestas {pregunta: alternativa}
 
         Returns:
-            Imagen con overlay visual (círculos de colores)
+            Imagen BGR con overlay visual (círculos de colores)
         """
-        overlay = image.copy()
+        if image.ndim == 2:
+            overlay = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+        else:
+            overlay = image.copy()
 
         # Colores (BGR)
         COLOR_CORRECT = (0, 255, 0)      # Verde
@@ -438,79 +691,70 @@ class OMRDetector:
         COLOR_MULTIPLE = (0, 165, 255)   # Naranja
 
         # Dibujar círculos de matrícula
-        matricula_circles = self.calibration_data['matricula']
         matricula_detected = detection_result['matricula'].get('details', {})
 
-        for circle in matricula_circles:
-            col = circle['columna']
-            digit = circle['digito']
+        for col in range(1, MATRICULA_DIGITS + 1):
             col_key = f'col_{col}'
 
-            # Verificar si este círculo fue detectado
-            if col_key in matricula_detected:
-                detected = matricula_detected[col_key]
-                if isinstance(detected, dict) and 'selected' in detected:
-                    # Múltiples marcas
-                    if detected['selected']['digito'] == digit:
-                        color = COLOR_MULTIPLE
-                        cv2.circle(overlay, (circle['x'], circle['y']), circle['radius'], color, 2)
-                elif detected['digito'] == digit:
-                    # Marca correcta
-                    color = COLOR_CORRECT
-                    cv2.circle(overlay, (circle['x'], circle['y']), circle['radius'], color, 2)
+            # Verificar si esta columna tiene un dígito detectado
+            if col_key not in matricula_detected:
+                continue
+
+            detected = matricula_detected[col_key]
+            if isinstance(detected, dict) and 'selected' in detected:
+                # Múltiples marcas
+                digit = detected['selected']['digito']
+                color = COLOR_MULTIPLE
+            else:
+                # Marca correcta
+                digit = detected['digito']
+                color = COLOR_CORRECT
+
+            circle_index = self.circles.matricula_circle(col, digit)
+            if circle_index is not None:
+                self._draw_circle(overlay, circle_index, color)
 
         # Dibujar círculos de respuestas
-        respuestas_circles = self.calibration_data['respuestas']
         respuestas_detected = detection_result['respuestas'].get('respuestas', {})
         respuestas_details = detection_result['respuestas'].get('details', {})
 
-        for circle in respuestas_circles:
-            pregunta = circle['pregunta']
-            alternativa = circle['alternativa']
-
-            if pregunta in respuestas_detected:
-                detected_alt = respuestas_detected[pregunta]
-                detail = respuestas_details.get(pregunta, {})
-
-                # Determinar color según el estado
-                if detail.get('status') == 'empty':
-                    # Sin respuesta - no dibujar nada o dibujar gris muy tenue
-                    continue
-                elif detail.get('status') == 'multiple':
-                    # Múltiples marcas - marcar TODAS las alternativas marcadas en rojo
-                    marked_alternatives = detail.get('marked_alternatives', [])
-                    if alternativa in marked_alternatives:
-                        color = COLOR_INCORRECT
-                        cv2.circle(overlay, (circle['x'], circle['y']), circle['radius'], color, 2)
-                    # NO dibujar círculo amarillo para la respuesta correcta
-                elif alternativa == detected_alt:
-                    # Respuesta marcada
-                    if answer_key and pregunta in answer_key:
-                        # Comparar con pauta
-                        correct_alt = answer_key[pregunta]
-                        if detected_alt == correct_alt:
-                            color = COLOR_CORRECT
-                        else:
-                            color = COLOR_INCORRECT
-                            # Marcar también la respuesta correcta en amarillo
-                            correct_circle = next(
-                                (c for c in respuestas_circles
-                                 if c['pregunta'] == pregunta and c['alternativa'] == correct_alt),
-                                None
-                            )
-                            if correct_circle:
-                                cv2.circle(
-                                    overlay,
-                                    (correct_circle['x'], correct_circle['y']),
-                                    correct_circle['radius'],
-                                    COLOR_CORRECT_ANSWER,
-                                    2
-                                )
-                    else:
-                        # Sin pauta, solo marcar como detectado
-                        color = (255, 0, 255)  # Magenta
+        for pregunta, detected_alt in respuestas_detected.items():
+            detail = respuestas_details.get(pregunta, {})
+
+            # Determinar color según el estado
+            if detail.get('status') == 'empty':
+                # Sin respuesta - no dibujar nada o dibujar gris muy tenue
+                continue
+            elif detail.get('status') == 'multiple':
+                # Múltiples marcas - marcar TODAS las alternativas marcadas en rojo
+                # NO dibujar círculo amarillo para la respuesta correcta
+                for alternativa in detail.get('marked_alternatives', []):
+                    circle_index = self.circles.respuesta_circle(pregunta, alternativa)
+                    if circle_index is not None:
+                        self._draw_circle(overlay, circle_index, COLOR_INCORRECT)
+                continue
+
+            # Respuesta marcada
+            circle_index = self.circles.respuesta_circle(pregunta, detected_alt)
+            if circle_index is None:
+                continue
+
+            if answer_key and pregunta in answer_key:
+                # Comparar con pauta
+                correct_alt = answer_key[pregunta]
+                if detected_alt == correct_alt:
+                    color = COLOR_CORRECT
+                else:
+                    color = COLOR_INCORRECT
+                    # Marcar también la respuesta correcta en amarillo
+                    correct_index = self.circles.respuesta_circle(pregunta, correct_alt)
+                    if correct_index is not None:
+                        self._draw_circle(overlay, correct_index, COLOR_CORRECT_ANSWER)
+            else:
+                # Sin pauta, solo marcar como detectado
+                color = (255, 0, 255)  # Magenta
 
-                    cv2.circle(overlay, (circle['x'], circle['y']), circle['radius'], color, 2)
+            self._draw_circle(overlay, circle_index, color)
 
         return overlay
 
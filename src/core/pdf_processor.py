@@ -11,7 +11,7 @@ Date: 2025
 import cv2
 import numpy as np
 from pathlib import Path
-from typing import Tuple, Optional, List
+from typing import Iterable, Iterator, Tuple, Optional, List
 import fitz  # PyMuPDF
 
 
@@ -27,62 +27,272 @@ class PDFProcessor:
     # Los escáneres típicamente usan 300 DPI
     DEFAULT_DPI = 300
 
-    def __init__(self, dpi: int = DEFAULT_DPI):
+    # Tolerancia (en puntos PDF) para considerar que una imagen cubre toda la página
+    FULL_PAGE_TOLERANCE = 2.0
+
+    # Métodos de obtención de una página
+    PATH_EMBEDDED = 'embedded'  # Imagen del escáner extraída directamente
+    PATH_RENDERED = 'rendered'  # Página rasterizada con PyMuPDF
+
+    def __init__(self, dpi: int = DEFAULT_DPI, grayscale: bool = False,
+                 extract_images: bool = False):
         """
         Inicializa el procesador de PDFs.
 
         Args:
             dpi: Resolución en DPI para la conversión (default: 300)
+            grayscale: Si es True, las páginas se renderizan directamente en
+                escala de grises (un canal) en lugar de BGR
+            extract_images: Si es True, las páginas escaneadas (una sola imagen
+                que cubre la página) se obtienen decodificando la imagen embebida
+                a su resolución nativa, sin rasterizar
         """
         self.dpi = dpi
+        self.grayscale = grayscale
+        self.extract_images = extract_images
 
-    def pdf_to_image(self, pdf_path: str, page_number: int = 0) -> Optional[np.ndarray]:
+        # Método usado en la última página y conteo por método
+        self.last_render_path = None
+        self.render_stats = {self.PATH_EMBEDDED: 0, self.PATH_RENDERED: 0}
+
+    def open_document(self, pdf_path: str) -> fitz.Document:
         """
-        Convierte una página de PDF a imagen OpenCV.
+        Abre un PDF una sola vez para renderizar varias de sus páginas.
+
+        El documento retornado puede usarse como context manager
+        (``with processor.open_document(ruta) as doc:``) o cerrarse
+        explícitamente con ``doc.close()``.
 
         Args:
             pdf_path: Ruta al archivo PDF
+
+        Returns:
+            Documento PyMuPDF abierto
+
+        Raises:
+            Exception: Si el archivo no existe o no es un PDF válido
+        """
+        return fitz.open(pdf_path)
+
+    def render_page(self, doc: fitz.Document, page_number: int) -> Optional[np.ndarray]:
+        """
+        Renderiza una página de un documento ya abierto a imagen OpenCV.
+
+        Con extract_images=True las páginas escaneadas se obtienen de su imagen
+        embebida (ver extract_page_image). El método usado queda registrado en
+        last_render_path y render_stats.
+
+        Args:
+            doc: Documento abierto con open_document()
             page_number: Número de página a convertir (0-indexed)
 
         Returns:
-            Imagen BGR de OpenCV o None si hay error
+            Imagen BGR (o en escala de grises si grayscale=True) o None si la
+            página no existe
+        """
+        # Verificar que la página existe
+        if page_number >= doc.page_count:
+            print(f"Error: El PDF solo tiene {doc.page_count} página(s)")
+            return None
+
+        # Obtener la página
+        page = doc.load_page(page_number)
+
+        # Ruta rápida: decodificar directamente la imagen del escáner
+        if self.extract_images:
+            image = self.extract_page_image(page)
+            if image is not None:
+                self._record_render_path(self.PATH_EMBEDDED)
+                return image
+
+        # Calcular factor de zoom para obtener el DPI deseado
+        # PyMuPDF usa 72 DPI por default
+        zoom = self.dpi / 72.0
+        matrix = fitz.Matrix(zoom, zoom)
+
+        # Renderizar página a imagen
+        if self.grayscale:
+            pix = page.get_pixmap(matrix=matrix, colorspace=fitz.csGRAY, alpha=False)
+        else:
+            pix = page.get_pixmap(matrix=matrix)
+
+        self._record_render_path(self.PATH_RENDERED)
+        return self._pixmap_to_image(pix)
+
+    def extract_page_image(self, page: fitz.Page) -> Optional[np.ndarray]:
+        """
+        Obtiene la imagen embebida de una página escaneada sin rasterizarla.
+
+        Solo aplica a páginas formadas por una única imagen opaca que cubre
+        toda la página, sin rotación ni dibujos vectoriales ni texto visible
+        (lo que producen los escáneres). La imagen se decodifica a su resolución
+        nativa; el resto de las páginas retorna None para que se rendericen.
+
+        Args:
+            page: Página PyMuPDF
+
+        Returns:
+            Imagen BGR (o en escala de grises si grayscale=True) o None si la
+            página no es una imagen escaneada simple
         """
         try:
-            # Abrir el PDF
-            doc = fitz.open(pdf_path)
+            if page.rotation != 0:
+                return None
 
-            # Verificar que la página existe
-            if page_number >= doc.page_count:
-                print(f"Error: El PDF solo tiene {doc.page_count} página(s)")
-                doc.close()
+            images = page.get_images(full=True)
+            if len(images) != 1:
                 return None
 
-            # Obtener la página
-            page = doc.load_page(page_number)
+            xref, smask, width, height, colorspace = (
+                images[0][0], images[0][1], images[0][2], images[0][3], images[0][5]
+            )
+            if smask or not colorspace:
+                # Imagen con transparencia o máscara de imagen (stencil)
+                return None
 
-            # Calcular factor de zoom para obtener el DPI deseado
-            # PyMuPDF usa 72 DPI por default
-            zoom = self.dpi / 72.0
-            matrix = fitz.Matrix(zoom, zoom)
+            # Operaciones de dibujo de la página (sin decodificar la imagen).
+            # El texto invisible de OCR ('ignore-text') no afecta la imagen.
+            operations = [op for op in page.get_bboxlog() if op[0] != 'ignore-text']
+            if len(operations) != 1 or operations[0][0] != 'fill-image':
+                return None
 
-            # Renderizar página a imagen
-            pix = page.get_pixmap(matrix=matrix)
+            # La imagen debe cubrir la página con la misma orientación
+            rect = fitz.Rect(operations[0][1])
+            if any(abs(a - b) > self.FULL_PAGE_TOLERANCE for a, b in zip(rect, page.rect)):
+                return None
+            if abs(width / height - rect.width / rect.height) > 0.02 * rect.width / rect.height:
+                return None
 
-            # Convertir a array numpy
-            img_data = np.frombuffer(pix.samples, dtype=np.uint8)
-            img_data = img_data.reshape(pix.height, pix.width, pix.n)
+            # JPEG (lo habitual en escáneres): decodificar el stream con OpenCV,
+            # que puede entregar escala de grises directamente
+            if self._is_plain_jpeg(page.parent, xref):
+                flags = cv2.IMREAD_IGNORE_ORIENTATION | (
+                    cv2.IMREAD_GRAYSCALE if self.grayscale else cv2.IMREAD_COLOR
+                )
+                data = np.frombuffer(page.parent.xref_stream_raw(xref), dtype=np.uint8)
+                image = cv2.imdecode(data, flags)
+                if image is not None and image.shape[:2] == (height, width):
+                    return image
+
+            # Otros formatos (CCITT, JBIG2, Flate...): decodificar con PyMuPDF
+            pix = fitz.Pixmap(page.parent, xref)
+            if pix.alpha:
+                pix = fitz.Pixmap(pix, 0)
+            if pix.n not in (1, 3):
+                # CMYK u otros espacios de color
+                pix = fitz.Pixmap(fitz.csRGB, pix)
+
+            return self._pixmap_to_image(pix)
 
-            # Convertir de RGB a BGR (OpenCV usa BGR)
-            if pix.n == 3:  # RGB
-                image = cv2.cvtColor(img_data, cv2.COLOR_RGB2BGR)
-            elif pix.n == 4:  # RGBA
-                image = cv2.cvtColor(img_data, cv2.COLOR_RGBA2BGR)
-            else:
-                image = img_data
+        except Exception as e:
+            print(f"Advertencia: No se pudo extraer la imagen embebida: {str(e)}")
+            return None
 
-            doc.close()
+    @staticmethod
+    def _is_plain_jpeg(doc: fitz.Document, xref: int) -> bool:
+        """
+        Indica si una imagen es un JPEG en gris o RGB sin transformaciones.
+
+        Args:
+            doc: Documento PyMuPDF
+            xref: Referencia de la imagen
+
+        Returns:
+            True si el stream puede decodificarse tal cual como archivo JPEG
+        """
+        filter_type, filter_value = doc.xref_get_key(xref, 'Filter')
+        if filter_value not in ('/DCTDecode', '[/DCTDecode]'):
+            return False
+        if doc.xref_get_key(xref, 'Decode')[0] != 'null':
+            return False
+        return doc.xref_get_key(xref, 'ColorSpace')[1] in ('/DeviceGray', '/DeviceRGB')
+
+    def _pixmap_to_image(self, pix: fitz.Pixmap) -> np.ndarray:
+        """
+        Convierte un pixmap de PyMuPDF a imagen OpenCV.
+
+        Args:
+            pix: Pixmap con 1 (gris), 3 (RGB) o 4 (RGBA) canales
+
+        Returns:
+            Imagen en escala de grises si grayscale=True, BGR en caso contrario
+        """
+        # Convertir a array numpy. Se lee el buffer del pixmap sin copiarlo, por
+        # lo que toda rama debe producir un array propio antes de retornar.
+        img_data = np.frombuffer(pix.samples_mv, dtype=np.uint8)
+        img_data = img_data.reshape(pix.height, pix.width, pix.n)
+
+        # Convertir de RGB a BGR (OpenCV usa BGR)
+        if pix.n == 1:  # Escala de grises
+            image = img_data.reshape(pix.height, pix.width).copy()
+            if not self.grayscale:
+                image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+        elif pix.n == 3 and self.grayscale:  # Imagen embebida RGB
+            image = cv2.cvtColor(img_data, cv2.COLOR_RGB2GRAY)
+        elif pix.n == 3:  # RGB
+            image = cv2.cvtColor(img_data, cv2.COLOR_RGB2BGR)
+        elif pix.n == 4:  # RGBA
+            image = cv2.cvtColor(img_data, cv2.COLOR_RGBA2BGR)
+        else:
+            image = img_data.copy()
+
+        return image
+
+    def _record_render_path(self, path: str):
+        """Registra el método con que se obtuvo la última página."""
+        self.last_render_path = path
+        self.render_stats[path] += 1
+
+    def iter_pages(
+        self,
+        pdf_path: str,
+        page_numbers: Optional[Iterable[int]] = None
+    ) -> Iterator[Tuple[int, Optional[np.ndarray]]]:
+        """
+        Recorre las páginas de un PDF abriéndolo una sola vez.
+
+        Las páginas se renderizan a medida que se consumen, por lo que solo
+        una imagen de página está en memoria a la vez.
 
-            return image
+        Args:
+            pdf_path: Ruta al archivo PDF
+            page_numbers: Páginas a renderizar (0-indexed); None = todas
+
+        Yields:
+            Tuplas (número_de_página, imagen BGR o None si falló esa página)
+
+        Raises:
+            Exception: Si el PDF no se puede abrir
+        """
+        with self.open_document(pdf_path) as doc:
+            if page_numbers is None:
+                page_numbers = range(doc.page_count)
+
+            for page_number in page_numbers:
+                try:
+                    image = self.render_page(doc, page_number)
+                except Exception as e:
+                    print(f"Error al procesar página {page_number + 1} del PDF: {str(e)}")
+                    image = None
+                yield page_number, image
+
+    def pdf_to_image(self, pdf_path: str, page_number: int = 0) -> Optional[np.ndarray]:
+        """
+        Convierte una página de PDF a imagen OpenCV.
+
+        Abre y cierra el PDF en cada llamada; para recorrer varias páginas
+        del mismo archivo usar iter_pages().
+
+        Args:
+            pdf_path: Ruta al archivo PDF
+            page_number: Número de página a convertir (0-indexed)
+
+        Returns:
+            Imagen BGR de OpenCV o None si hay error
+        """
+        try:
+            with self.open_document(pdf_path) as doc:
+                return self.render_page(doc, page_number)
 
         except Exception as e:
             print(f"Error al procesar PDF: {str(e)}")
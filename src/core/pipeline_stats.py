@@ -0,0 +1,254 @@
+"""
+Módulo con la instrumentación del pipeline de calificación.
+
+Mide el tiempo real (wall) y de CPU de cada etapa (renderizado, ArUco,
+OMR, overlay, escritura de imágenes, Excel), cuenta páginas y eventos, y
+registra la memoria máxima (RSS) del proceso. Cada página lleva sus propias
+mediciones en el resultado ('stats'), de modo que el proceso principal
+puede sumar las de todos los procesos de trabajo.
+
+Author: Gerson
+Date: 2025
+"""
+
+import json
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+
+def peak_rss_mb() -> Optional[float]:
+    """
+    Obtiene la memoria máxima (RSS) usada por el proceso actual.
+
+    Returns:
+        Memoria en MB o None si no se puede medir en esta plataforma
+    """
+    if sys.platform == 'win32':
+        try:
+            import ctypes
+            from ctypes import wintypes
+
+            class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+                _fields_ = [
+                    ('cb', wintypes.DWORD),
+                    ('PageFaultCount', wintypes.DWORD),
+                    ('PeakWorkingSetSize', ctypes.c_size_t),
+                    ('WorkingSetSize', ctypes.c_size_t),
+                    ('QuotaPeakPagedPoolUsage', ctypes.c_size_t),
+                    ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                    ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+                    ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                    ('PagefileUsage', ctypes.c_size_t),
+                    ('PeakPagefileUsage', ctypes.c_size_t),
+                ]
+
+            counters = PROCESS_MEMORY_COUNTERS()
+            counters.cb = ctypes.sizeof(counters)
+            handle = ctypes.windll.kernel32.GetCurrentProcess()
+            if not ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters),
+                                                             counters.cb):
+                return None
+            return counters.PeakWorkingSetSize / (1024 * 1024)
+        except Exception:
+            return None
+
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta KB; macOS reporta bytes
+    if sys.platform == 'darwin':
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+class PipelineStats:
+    """
+    Acumula tiempos por etapa, contadores y memoria máxima.
+
+    Uso:
+        stats = PipelineStats()
+        with stats.stage('render'):
+            ...
+        stats.count('pages')
+    """
+
+    # Carpeta donde la aplicación guarda el JSON de cada ejecución
+    DEFAULT_DIR = Path.home() / ".test_scanner" / "stats"
+
+    # Etapas en el orden en que se muestran en el resumen
+    STAGE_LABELS = {
+        'render': "PDF → imagen",
+        'aruco_warp': "ArUco + perspectiva",
+        'omr': "Detección OMR",
+        'grade': "Cálculo de nota",
+        'overlay': "Dibujo del overlay",
+        'imwrite': "Escritura de imagen",
+        'excel': "Guardado en Excel",
+        'excel_flush': "Escritura del Excel"
+    }
+
+    def __init__(self):
+        """Inicializa las mediciones vacías."""
+        self.stages = {}  # {etapa: {'count', 'wall', 'cpu', 'max_wall'}}
+        self.counters = {}  # {nombre: cantidad}
+        self.peak_rss_mb = None
+        self.started = time.perf_counter()
+        self.elapsed = None
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        Mide el tiempo real y de CPU de un bloque de código.
+
+        El tiempo de CPU es el del hilo que ejecuta el bloque: con el escritor
+        de imágenes trabajando en paralelo, el del proceso completo sumaría a
+        cada etapa el trabajo de otros hilos. No incluye los hilos internos de
+        OpenCV.
+
+        Args:
+            name: Nombre de la etapa
+        """
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield
+        finally:
+            self.add_stage(name, time.perf_counter() - wall_start,
+                           time.thread_time() - cpu_start)
+
+    def add_stage(self, name: str, wall: float, cpu: float, count: int = 1,
+                  max_wall: Optional[float] = None):
+        """
+        Suma una medición a una etapa.
+
+        Args:
+            name: Nombre de la etapa
+            wall: Tiempo real en segundos
+            cpu: Tiempo de CPU en segundos
+            count: Cantidad de ejecuciones que representa la medición
+            max_wall: Máximo de una ejecución (default: wall)
+        """
+        entry = self.stages.setdefault(name, {'count': 0, 'wall': 0.0, 'cpu': 0.0, 'max_wall': 0.0})
+        entry['count'] += count
+        entry['wall'] += wall
+        entry['cpu'] += cpu
+        entry['max_wall'] = max(entry['max_wall'], wall if max_wall is None else max_wall)
+
+    def count(self, name: str, amount: int = 1):
+        """
+        Incrementa un contador.
+
+        Args:
+            name: Nombre del contador
+            amount: Cantidad a sumar
+        """
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def sample_memory(self):
+        """Actualiza la memoria máxima con la del proceso actual."""
+        self._update_peak(peak_rss_mb())
+
+    def _update_peak(self, value: Optional[float]):
+        """Actualiza la memoria máxima con un valor medido (None = sin medición)."""
+        if value is not None:
+            self.peak_rss_mb = value if self.peak_rss_mb is None else max(self.peak_rss_mb, value)
+
+    def merge(self, data: Optional[Dict]):
+        """
+        Suma las mediciones de otro PipelineStats (por ejemplo, las de una página).
+
+        Args:
+            data: Diccionario de to_dict() (se ignora si es None)
+        """
+        if not data:
+            return
+
+        for name, entry in data.get('stages', {}).items():
+            self.add_stage(name, entry['wall'], entry['cpu'], entry['count'], entry['max_wall'])
+        for name, amount in data.get('counters', {}).items():
+            self.count(name, amount)
+        self._update_peak(data.get('peak_rss_mb'))
+
+    def finish(self):
+        """Registra el tiempo total y la memoria del proceso actual."""
+        self.elapsed = time.perf_counter() - self.started
+        self.sample_memory()
+
+    def to_dict(self) -> Dict:
+        """
+        Convierte las mediciones a un diccionario serializable a JSON.
+
+        Returns:
+            Diccionario con 'stages', 'counters', 'peak_rss_mb' y 'elapsed'
+        """
+        return {
+            'stages': {name: dict(entry) for name, entry in self.stages.items()},
+            'counters': dict(self.counters),
+            'peak_rss_mb': self.peak_rss_mb,
+            'elapsed': self.elapsed
+        }
+
+    def dump_json(self, path: str, extra: Optional[Dict] = None) -> Path:
+        """
+        Guarda las mediciones en un archivo JSON para compararlas después.
+
+        Args:
+            path: Ruta del archivo
+            extra: Datos adicionales de la ejecución (prueba, procesos, etc.)
+
+        Returns:
+            Ruta del archivo escrito
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = dict(extra or {}, **self.to_dict())
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        return path
+
+    def summary_lines(self) -> List[str]:
+        """
+        Construye el resumen de la ejecución para mostrar al usuario.
+
+        Los tiempos de las etapas son la suma de todas las páginas (en todos
+        los procesos), por lo que con varios procesos pueden superar el total.
+        La CPU de cada etapa es la del hilo que la ejecutó (ver stage).
+
+        Returns:
+            Lista de líneas de texto
+        """
+        lines = []
+        names = [n for n in self.STAGE_LABELS if n in self.stages]
+        names += sorted(n for n in self.stages if n not in self.STAGE_LABELS)
+
+        if names:
+            lines.append(f"{'Etapa':<24}{'Veces':>7}{'Total (s)':>11}{'CPU (s)':>10}"
+                         f"{'Prom. (ms)':>12}{'Máx. (ms)':>11}")
+            for name in names:
+                entry = self.stages[name]
+                average_ms = entry['wall'] / entry['count'] * 1000 if entry['count'] else 0.0
+                lines.append(f"{self.STAGE_LABELS.get(name, name):<24}{entry['count']:>7}"
+                             f"{entry['wall']:>11.2f}{entry['cpu']:>10.2f}"
+                             f"{average_ms:>12.1f}{entry['max_wall'] * 1000:>11.1f}")
+
+        if self.counters:
+            lines.append(", ".join(f"{name}: {amount}" for name, amount in sorted(self.counters.items())))
+
+        footer = []
+        if self.elapsed is not None:
+            footer.append(f"Tiempo total: {self.elapsed:.1f} s")
+            pages = self.counters.get('pages', 0)
+            if pages and self.elapsed > 0:
+                footer.append(f"{pages / self.elapsed:.2f} páginas/s")
+        if self.peak_rss_mb is not None:
+            footer.append(f"Memoria máxima por proceso: {self.peak_rss_mb:.0f} MB")
+        if footer:
+            lines.append(" | ".join(footer))
+
+        return lines
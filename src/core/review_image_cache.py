@@ -0,0 +1,191 @@
+"""
+Módulo con el caché de imágenes de hojas pendientes de revisión manual.
+
+Mantiene en memoria las imágenes usadas más recientemente hasta un tope
+configurable; las demás se guardan comprimidas (PNG, sin pérdida) en una
+carpeta temporal y se vuelven a cargar cuando la revisión manual las pide.
+Es seguro usarlo desde varios hilos (la revisión manual precarga imágenes
+en segundo plano).
+
+Author: Gerson
+Date: 2025
+"""
+
+import shutil
+import tempfile
+import threading
+import weakref
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+import cv2
+import numpy as np
+
+
+class ReviewImageCache:
+    """
+    Caché de imágenes con tope de memoria y respaldo en disco.
+
+    Cada imagen se identifica con la clave entera que retorna put().
+    """
+
+    # Compresión PNG rápida: prioriza velocidad sobre tamaño
+    PNG_COMPRESSION = 1
+
+    def __init__(self, max_memory_mb: float = 1024):
+        """
+        Inicializa el caché.
+
+        Args:
+            max_memory_mb: Memoria máxima (MB) para imágenes sin comprimir
+        """
+        self.max_memory_bytes = int(max_memory_mb * 1024 * 1024)
+        self.memory_bytes = 0
+
+        self._memory = OrderedDict()  # {clave: imagen}, de menos a más reciente
+        self._disk = {}  # {clave: ruta del PNG}
+        self._next_key = 0
+        self._lock = threading.RLock()
+
+        # Carpeta temporal (se crea al guardar la primera imagen en disco)
+        self._cache_dir = None
+        self._finalizer = None
+
+    def put(self, image: np.ndarray) -> int:
+        """
+        Agrega una imagen al caché.
+
+        Args:
+            image: Imagen a guardar
+
+        Returns:
+            Clave para recuperar la imagen con get()
+        """
+        with self._lock:
+            key = self._next_key
+            self._next_key += 1
+
+            self._memory[key] = image
+            self.memory_bytes += image.nbytes
+            self._enforce_limit()
+
+        return key
+
+    def get(self, key: int) -> Optional[np.ndarray]:
+        """
+        Obtiene una imagen, cargándola desde disco si fue descargada de memoria.
+
+        Args:
+            key: Clave retornada por put()
+
+        Returns:
+            Imagen o None si la clave no existe
+        """
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+
+            path = self._disk.get(key)
+            if path is None:
+                return None
+
+            image = cv2.imread(str(path), cv2.IMREAD_UNCHANGED)
+            if image is None:
+                return None
+
+            # Volver a memoria como la más reciente (el PNG se conserva)
+            self._memory[key] = image
+            self.memory_bytes += image.nbytes
+            self._enforce_limit(keep=key)
+
+        return image
+
+    def discard(self, key: int):
+        """
+        Elimina una imagen del caché.
+
+        Args:
+            key: Clave retornada por put()
+        """
+        with self._lock:
+            image = self._memory.pop(key, None)
+            if image is not None:
+                self.memory_bytes -= image.nbytes
+
+            path = self._disk.pop(key, None)
+            if path is not None:
+                path.unlink(missing_ok=True)
+
+    def clear(self):
+        """Elimina todas las imágenes y la carpeta temporal."""
+        with self._lock:
+            self._memory.clear()
+            self._disk.clear()
+            self.memory_bytes = 0
+
+            if self._finalizer is not None:
+                self._finalizer()
+            self._cache_dir = None
+            self._finalizer = None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._memory.keys() | self._disk.keys())
+
+    def _enforce_limit(self, keep: Optional[int] = None):
+        """
+        Descarga a disco las imágenes menos recientes hasta respetar el tope.
+
+        Args:
+            keep: Clave que no debe descargarse (la que se está usando)
+        """
+        failed = set()  # Claves que no se pudieron escribir (se quedan en memoria)
+        while self.memory_bytes > self.max_memory_bytes:
+            key = next((k for k in self._memory if k != keep and k not in failed), None)
+            if key is None:
+                break
+
+            if key not in self._disk and not self._write_to_disk(key, self._memory[key]):
+                # Disco lleno o sin permisos: la imagen no se pierde, se
+                # conserva en memoria aunque se supere el tope
+                failed.add(key)
+                continue
+
+            image = self._memory.pop(key)
+            self.memory_bytes -= image.nbytes
+
+    def _write_to_disk(self, key: int, image: np.ndarray) -> bool:
+        """
+        Guarda una imagen como PNG en la carpeta temporal.
+
+        Args:
+            key: Clave de la imagen
+            image: Imagen a guardar
+
+        Returns:
+            True si se escribió correctamente
+        """
+        try:
+            path = self._get_cache_dir() / f"{key}.png"
+            written = cv2.imwrite(str(path), image,
+                                  [cv2.IMWRITE_PNG_COMPRESSION, self.PNG_COMPRESSION])
+        except (OSError, cv2.error) as e:
+            print(f"⚠️ No se pudo guardar en disco la imagen de revisión {key}: {e}")
+            return False
+
+        if not written:
+            print(f"⚠️ No se pudo guardar en disco la imagen de revisión {key}: {path}")
+            return False
+
+        self._disk[key] = path
+        return True
+
+    def _get_cache_dir(self) -> Path:
+        """Crea (una sola vez) la carpeta temporal del caché."""
+        if self._cache_dir is None:
+            self._cache_dir = Path(tempfile.mkdtemp(prefix="test_scanner_review_"))
+            # Eliminar la carpeta al liberar el caché o al cerrar el programa
+            self._finalizer = weakref.finalize(self, shutil.rmtree, str(self._cache_dir), True)
+        return self._cache_dir
@@ -0,0 +1,111 @@
+"""
+Módulo con la precarga de imágenes para la revisión manual.
+
+Al pasar a la hoja siguiente, la ventana de revisión debe obtener la imagen
+(a veces desde el disco), reducirla y convertirla a RGB antes de mostrarla.
+El precargador prepara esas imágenes para las próximas hojas en un hilo de
+fondo mientras el usuario revisa la actual, y conserva las últimas hojas
+mostradas para volver atrás sin prepararlas de nuevo.
+
+Todos los métodos se llaman desde el hilo de la interfaz; el hilo de fondo
+solo ejecuta la función de preparación.
+
+Author: Gerson
+Date: 2025
+"""
+
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+
+class ReviewPrefetcher:
+    """
+    Prepara en segundo plano las próximas hojas de la revisión manual.
+
+    Cada hoja se identifica por su índice en la lista de revisión. El
+    resultado de la preparación puede ser cualquier objeto (por ejemplo, un
+    diccionario con la imagen escalada) y la ventana puede agregarle datos
+    (como el PhotoImage ya creado) para reutilizarlos al volver a la hoja.
+    """
+
+    def __init__(self, prepare: Callable[[int], Any], ahead: int = 2, history: int = 3):
+        """
+        Inicializa el precargador.
+
+        Args:
+            prepare: Función que prepara la hoja de un índice (se ejecuta en
+                el hilo de fondo, no debe usar widgets de tkinter)
+            ahead: Hojas siguientes a preparar por adelantado (0 = sin precarga)
+            history: Hojas ya mostradas que se conservan para volver atrás
+        """
+        self.prepare = prepare
+        self.ahead = max(0, ahead)
+        self.history = max(0, history)
+
+        self._ready = OrderedDict()  # {índice: preparado}, de menos a más reciente
+        self._futures: Dict[int, Future] = {}  # {índice: preparación en curso o terminada}
+        self._executor = None
+        if self.ahead:
+            self._executor = ThreadPoolExecutor(max_workers=1,
+                                                thread_name_prefix="review-prefetch")
+
+    def get(self, index: int) -> Any:
+        """
+        Obtiene la hoja preparada, esperando la precarga o preparándola ahora.
+
+        Args:
+            index: Índice de la hoja
+
+        Returns:
+            Resultado de prepare(index)
+        """
+        if index in self._ready:
+            self._ready.move_to_end(index)
+            return self._ready[index]
+
+        future = self._futures.pop(index, None)
+        if future is not None and not future.cancelled():
+            value = future.result()
+        else:
+            value = self.prepare(index)
+
+        self._ready[index] = value
+        while len(self._ready) > self.history + 1:
+            self._ready.popitem(last=False)
+
+        return value
+
+    def prefetch(self, index: int, count: int):
+        """
+        Programa la preparación de las hojas que siguen a la actual.
+
+        Las precargas pendientes que quedaron fuera de la ventana (por
+        ejemplo, al volver atrás) se cancelan si aún no comenzaron.
+
+        Args:
+            index: Índice de la hoja que se está mostrando
+            count: Cantidad total de hojas en revisión
+        """
+        if self._executor is None:
+            return
+
+        wanted = range(index + 1, min(count, index + 1 + self.ahead))
+        for other in list(self._futures):
+            if other not in wanted:
+                self._futures.pop(other).cancel()
+
+        for other in wanted:
+            if other not in self._ready and other not in self._futures:
+                self._futures[other] = self._executor.submit(self.prepare, other)
+
+    def close(self):
+        """Cancela las precargas pendientes y libera las hojas preparadas."""
+        for future in self._futures.values():
+            future.cancel()
+        self._futures.clear()
+        self._ready.clear()
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
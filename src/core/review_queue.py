@@ -0,0 +1,126 @@
+"""
+Módulo con la cola de revisión por preguntas.
+
+En lugar de revisar cada hoja completa, la revisión por preguntas reúne las
+preguntas dudosas de todas las hojas (las de marca múltiple o sin marca, y
+las detectadas con una ambigüedad según OMRDetector) y las ordena de más a
+menos ambigua. Las hojas cuya matrícula
+no se detectó completa, o se detectó con alguna columna dudosa, quedan
+fuera de la cola: necesitan la revisión de hoja completa.
+
+Author: Gerson
+Date: 2025
+"""
+
+from typing import Dict, List, Set
+
+from ..utils.constants import MATRICULA_DIGITS, MAX_QUESTIONS
+
+
+def detected_answers(sheet: Dict) -> Dict[int, Set[str]]:
+    """
+    Obtiene las alternativas detectadas de cada pregunta de una hoja.
+
+    Args:
+        sheet: Hoja en revisión ('result' y 'detection_result')
+
+    Returns:
+        Diccionario {pregunta: conjunto de alternativas} (vacío = sin respuesta;
+        más de una = múltiple marca)
+    """
+    details = sheet['detection_result']['respuestas'].get('details', {})
+    answers = {}
+
+    for pregunta, alternativa in sheet['result']['respuestas'].items():
+        if alternativa is None:
+            # Sin respuesta
+            answers[pregunta] = set()
+            continue
+
+        # Verificar si es múltiple desde la detección original
+        detail = details.get(pregunta, {})
+        if detail.get('status') == 'multiple':
+            answers[pregunta] = set(detail.get('marked_alternatives', [alternativa]))
+        else:
+            answers[pregunta] = {alternativa}
+
+    return answers
+
+
+def is_queue_eligible(sheet: Dict, min_ambiguity: float = 0.0) -> bool:
+    """
+    Indica si una hoja puede revisarse por preguntas.
+
+    Args:
+        sheet: Hoja en revisión
+        min_ambiguity: Ambigüedad de matrícula a partir de la cual (sin incluirla)
+            la hoja necesita la revisión completa
+
+    Returns:
+        True si no fue revisada ni omitida y su matrícula está completa y sin dudas
+    """
+    if sheet.get('reviewed') or sheet.get('skipped'):
+        return False
+
+    matricula = sheet['result'].get('matricula') or ''
+    if len(matricula) != MATRICULA_DIGITS or not matricula.isdigit():
+        return False
+
+    # Un dígito que superó los umbrales por poco puede ser la matrícula de otro alumno
+    return sheet['detection_result']['matricula'].get('ambiguity', 0.0) <= min_ambiguity
+
+
+def build_review_queue(sheets: List[Dict], num_questions: int = MAX_QUESTIONS,
+                       min_ambiguity: float = 0.0) -> List[Dict]:
+    """
+    Construye la cola de preguntas dudosas de todas las hojas.
+
+    Args:
+        sheets: Hojas en revisión
+        num_questions: Preguntas de la prueba (las demás se ignoran)
+        min_ambiguity: Las preguntas detectadas ('ok') solo entran si su ambigüedad
+            supera este valor; las de marca múltiple o sin marca entran siempre
+
+    Returns:
+        Lista ordenada de mayor a menor ambigüedad; cada elemento tiene:
+        - 'sheet': int - Índice de la hoja en sheets
+        - 'pregunta': int - Número de pregunta
+        - 'ambiguity': float - Ambigüedad de la detección (0-1)
+        - 'status': str - Resultado de la detección ('ok', 'multiple', 'empty')
+        - 'detected': set - Alternativas detectadas
+    """
+    num_questions = num_questions or MAX_QUESTIONS
+    queue = []
+
+    for sheet_index, sheet in enumerate(sheets):
+        if not is_queue_eligible(sheet, min_ambiguity):
+            continue
+
+        answers = detected_answers(sheet)
+        details = sheet['detection_result']['respuestas'].get('details', {})
+
+        for pregunta, detail in details.items():
+            ambiguity = detail.get('ambiguity', 0.0)
+            if pregunta > num_questions:
+                continue
+
+            # Una marca múltiple clara (p. ej. 90% y 88%) tiene ambigüedad 0, pero igual
+            # es la razón por la que la hoja quedó en revisión: debe verla una persona
+            if detail.get('status') == 'ok' and ambiguity <= min_ambiguity:
+                continue
+
+            detected = answers.get(pregunta, set())
+            if detail.get('status') == 'multiple':
+                # Mostrar (y aceptar con Enter) las alternativas marcadas, no "sin respuesta"
+                detected = set(detail.get('marked_alternatives', detected))
+
+            queue.append({
+                'sheet': sheet_index,
+                'pregunta': pregunta,
+                'ambiguity': ambiguity,
+                'status': detail.get('status'),
+                'detected': detected
+            })
+
+    queue.sort(key=lambda item: (-item['ambiguity'], item['sheet'], item['pregunta']))
+    return queue
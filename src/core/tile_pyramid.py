@@ -0,0 +1,151 @@
+"""
+Módulo con la pirámide de mosaicos para ampliar hojas en la revisión manual.
+
+Para ampliar una hoja no se escala la imagen completa: la vista pide solo
+los mosaicos (cuadros de tamaño fijo) visibles para el nivel de zoom
+actual. Cada mosaico se genera al pedirlo desde el nivel de la pirámide
+(la imagen original o sus reducciones a la mitad, calculadas una sola vez)
+más cercano a la escala pedida, y se guarda en un caché LRU con un máximo
+de mosaicos, de modo que la memoria no depende del tamaño de la imagen ni
+del zoom.
+
+Author: Gerson
+Date: 2025
+"""
+
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+class TilePyramid:
+    """
+    Genera y guarda mosaicos RGB de una imagen a distintas escalas.
+
+    Las coordenadas de los mosaicos son de la imagen escalada: el mosaico
+    (tx, ty) cubre los píxeles [tx * tile_size, (tx + 1) * tile_size) en x
+    (y lo mismo en y); los del borde derecho e inferior pueden ser menores.
+    """
+
+    def __init__(self, image: np.ndarray, tile_size: int = 256, max_tiles: int = 128):
+        """
+        Inicializa la pirámide.
+
+        Args:
+            image: Imagen original (BGR o escala de grises)
+            tile_size: Lado de los mosaicos en píxeles de pantalla
+            max_tiles: Mosaicos que se conservan en el caché como máximo
+        """
+        self.height, self.width = image.shape[:2]
+        self.tile_size = tile_size
+        self.max_tiles = max(1, max_tiles)
+
+        self._levels = [image]  # Nivel k: imagen reducida k veces a la mitad
+        self._tiles = OrderedDict()  # {(escala, tx, ty): mosaico RGB}, de menos a más reciente
+
+    def scaled_size(self, scale: float) -> Tuple[int, int]:
+        """
+        Calcula el tamaño de la imagen completa a una escala.
+
+        Args:
+            scale: Píxeles de pantalla por píxel de la imagen original
+
+        Returns:
+            Tupla (ancho, alto)
+        """
+        return max(1, int(self.width * scale)), max(1, int(self.height * scale))
+
+    def visible_tiles(self, scale: float, x0: float, y0: float,
+                      x1: float, y1: float) -> List[Tuple[int, int]]:
+        """
+        Lista los mosaicos que cubren un rectángulo de la imagen escalada.
+
+        Args:
+            scale: Escala de la imagen
+            x0, y0, x1, y1: Rectángulo visible en píxeles de la imagen escalada
+
+        Returns:
+            Lista de tuplas (tx, ty)
+        """
+        width, height = self.scaled_size(scale)
+        size = self.tile_size
+
+        first_x = max(0, int(x0 // size))
+        first_y = max(0, int(y0 // size))
+        last_x = min((width - 1) // size, int(x1 // size))
+        last_y = min((height - 1) // size, int(y1 // size))
+
+        return [(tx, ty) for ty in range(first_y, last_y + 1)
+                for tx in range(first_x, last_x + 1)]
+
+    def get_tile(self, scale: float, tx: int, ty: int) -> Optional[np.ndarray]:
+        """
+        Obtiene un mosaico, generándolo si no está en el caché.
+
+        Args:
+            scale: Escala de la imagen
+            tx, ty: Posición del mosaico (en mosaicos)
+
+        Returns:
+            Mosaico RGB o None si está fuera de la imagen
+        """
+        key = (round(scale, 6), tx, ty)
+        tile = self._tiles.get(key)
+        if tile is not None:
+            self._tiles.move_to_end(key)
+            return tile
+
+        width, height = self.scaled_size(scale)
+        x0 = tx * self.tile_size
+        y0 = ty * self.tile_size
+        tile_width = min(self.tile_size, width - x0)
+        tile_height = min(self.tile_size, height - y0)
+        if tx < 0 or ty < 0 or tile_width <= 0 or tile_height <= 0:
+            return None
+
+        level = self._level(scale)
+        level_height, level_width = level.shape[:2]
+
+        # Píxeles del nivel por píxel de pantalla; el centro de cada píxel de
+        # pantalla se proyecta al nivel para que los mosaicos encajen sin bordes
+        ratio_x = level_width / self.width / scale
+        ratio_y = level_height / self.height / scale
+        matrix = np.float32([
+            [ratio_x, 0, (x0 + 0.5) * ratio_x - 0.5],
+            [0, ratio_y, (y0 + 0.5) * ratio_y - 0.5]
+        ])
+        tile = cv2.warpAffine(level, matrix, (tile_width, tile_height),
+                              flags=cv2.INTER_LINEAR | cv2.WARP_INVERSE_MAP,
+                              borderMode=cv2.BORDER_REPLICATE)
+
+        # Convertir BGR (o escala de grises) a RGB
+        if tile.ndim == 2:
+            tile = cv2.cvtColor(tile, cv2.COLOR_GRAY2RGB)
+        else:
+            tile = cv2.cvtColor(tile, cv2.COLOR_BGR2RGB)
+
+        self._tiles[key] = tile
+        while len(self._tiles) > self.max_tiles:
+            self._tiles.popitem(last=False)
+
+        return tile
+
+    def _level(self, scale: float) -> np.ndarray:
+        """
+        Obtiene el nivel más pequeño que sigue siendo al menos tan grande
+        como la escala pedida (así cada mosaico se reduce como máximo a la mitad).
+
+        Args:
+            scale: Escala de la imagen
+
+        Returns:
+            Imagen del nivel
+        """
+        level = 0
+        while 0.5 ** (level + 1) >= scale and min(self._levels[-1].shape[:2]) > 1:
+            level += 1
+            if level == len(self._levels):
+                self._levels.append(cv2.pyrDown(self._levels[-1]))
+        return self._levels[level]
@@ -3,7 +3,9 @@ Ventana principal de la aplicación Test Scanner
 """
 
 import customtkinter as ctk
-from src.utils.constants import WINDOW_TITLE, WINDOW_WIDTH, WINDOW_HEIGHT
+import threading
+from src.utils.constants import (WINDOW_TITLE, WINDOW_WIDTH, WINDOW_HEIGHT,
+                                 DEFAULT_NUM_WORKERS, DEFAULT_REVIEW_CACHE_MB)
 from src.ui.tab_configuration import ConfigurationTab
 from src.ui.tab_answer_key import AnswerKeyTab
 from src.ui.tab_grading import GradingTab
@@ -35,7 +37,9 @@ class MainWindow(ctk.CTk):
             'excel_file': None,
             'test_name': '',
             'answer_key': {},  # {pregunta: alternativa_correcta}
-            'excel_handler': None
+            'excel_handler': None,
+            'num_workers': DEFAULT_NUM_WORKERS,  # Procesos en paralelo (0 = automático)
+            'review_cache_mb': DEFAULT_REVIEW_CACHE_MB  # Memoria para imágenes de revisión
         }
         
         # Crear el widget de pestañas
@@ -55,6 +59,9 @@ class MainWindow(ctk.CTk):
         
         # Configurar cierre de ventana
         self.protocol("WM_DELETE_WINDOW", self.on_closing)
+
+        # Cargar las librerías pesadas en segundo plano, con la ventana ya visible
+        self.after(200, self.start_warm_up)
     
     def center_window(self):
         """Centra la ventana en la pantalla"""
@@ -65,6 +72,31 @@ class MainWindow(ctk.CTk):
         y = (self.winfo_screenheight() // 2) - (height // 2)
         self.geometry(f'{width}x{height}+{x}+{y}')
     
+    def start_warm_up(self):
+        """Inicia el precalentamiento en un hilo separado"""
+        thread = threading.Thread(target=self.warm_up, daemon=True)
+        thread.start()
+
+    def warm_up(self):
+        """
+        Importa los módulos de procesamiento y carga la calibración
+
+        Así el primer uso de la pestaña de calificación no tiene que esperar
+        a OpenCV, PyMuPDF ni openpyxl.
+        """
+        try:
+            ready = self.grading_tab.ensure_processors()
+
+            import src.core.excel_handler  # noqa: F401
+            import src.core.grading_pipeline  # noqa: F401
+            import src.ui.manual_review_window  # noqa: F401
+        except Exception as e:
+            print(f"⚠️ Error al precargar módulos: {e}")
+            return
+
+        if not ready:
+            self.after(0, self.grading_tab.show_calibration_warning)
+
     def on_closing(self):
         """Maneja el cierre de la aplicación"""
         # Cerrar el manejador de Excel si existe
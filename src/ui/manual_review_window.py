@@ -6,9 +6,14 @@ import customtkinter as ctk
 from tkinter import messagebox
 from PIL import Image, ImageTk
 import cv2
-import numpy as np
 from pathlib import Path
 from typing import Dict, List, Optional, Callable
+from src.utils.constants import (DEFAULT_IMAGE_FORMAT, DEFAULT_IMAGE_QUALITY,
+                                 REVIEW_PREFETCH_SHEETS, REVIEW_HISTORY_SHEETS,
+                                 REVIEW_ZOOM_LEVELS, REVIEW_TILE_SIZE, REVIEW_TILE_CACHE)
+from src.core.review_prefetcher import ReviewPrefetcher
+from src.core.tile_pyramid import TilePyramid
+from src.core.review_queue import detected_answers
 
 
 class ManualReviewWindow(ctk.CTkToplevel):
@@ -17,7 +22,8 @@ class ManualReviewWindow(ctk.CTkToplevel):
     """
 
     def __init__(self, parent, sheets_to_review: List[Dict],
-                 omr_detector, app_data, on_save_callback: Optional[Callable] = None):
+                 omr_detector, app_data, on_save_callback: Optional[Callable] = None,
+                 image_cache=None):
         """
         Inicializa la ventana de revisión manual
 
@@ -27,6 +33,8 @@ class ManualReviewWindow(ctk.CTkToplevel):
             omr_detector: Instancia de OMRDetector para obtener posiciones de círculos
             app_data: Datos de la aplicación (pauta, Excel, etc.)
             on_save_callback: Función a llamar cuando se guarda una hoja
+            image_cache: ReviewImageCache con las imágenes de las hojas
+                (cada hoja indica su clave en 'image_key')
         """
         super().__init__(parent)
 
@@ -35,6 +43,7 @@ class ManualReviewWindow(ctk.CTkToplevel):
         self.omr_detector = omr_detector
         self.app_data = app_data
         self.on_save_callback = on_save_callback
+        self.image_cache = image_cache
 
         # Configuración de la ventana
         self.title("Revisión Manual de Hojas")
@@ -51,12 +60,32 @@ class ManualReviewWindow(ctk.CTkToplevel):
         self.edited_matricula = None
         self.edited_respuestas = {}
 
-        # Track de círculos dibujados manualmente por el usuario
-        self.manual_circles = []  # Lista de círculos verdes dibujados por el usuario
+        # Círculos verdes del canvas: un ítem persistente por círculo que solo se
+        # muestra u oculta; los cambios se aplican juntos cuando la interfaz queda libre
+        self.circle_items = {}  # {índice de círculo: id del ítem en el canvas}
+        self.visible_circles = set()  # Índices de los círculos que deben verse
+        self._pending_circles = {}  # {índice de círculo: visible} cambios por aplicar
+        self._circle_update_scheduled = False
+        self._circle_items_scale = None  # Escala con que se crearon los ítems
+        self.image_id = None
 
         # Factor de escala para la imagen
         self.scale_factor = 1.0
         self.display_width = 1100  # Ancho deseado para la imagen
+        self.fit_scale = 1.0  # Escala de la imagen ajustada al ancho (zoom 100%)
+
+        # Zoom: sobre 100% la hoja se dibuja con mosaicos de una pirámide que se
+        # generan solo para la zona visible (ver TilePyramid)
+        self.zoom_index = 0  # Posición en REVIEW_ZOOM_LEVELS
+        self.tile_pyramid = None  # Pirámide de la hoja actual (se crea al ampliar)
+        self.tile_items = {}  # {(tx, ty): (id del ítem en el canvas, PhotoImage)}
+        self._tile_update_scheduled = False
+
+        # Imágenes escaladas de las próximas hojas (preparadas en segundo plano)
+        # y de las últimas mostradas (para volver atrás sin recalcularlas)
+        self.prefetcher = ReviewPrefetcher(self.prepare_display_image,
+                                           ahead=REVIEW_PREFETCH_SHEETS,
+                                           history=REVIEW_HISTORY_SHEETS)
 
         # Crear interfaz
         self.create_widgets()
@@ -108,8 +137,17 @@ class ManualReviewWindow(ctk.CTkToplevel):
         v_scrollbar = ctk.CTkScrollbar(image_frame, orientation="vertical",
                                        command=self.canvas.yview)
 
-        self.canvas.configure(xscrollcommand=h_scrollbar.set,
-                             yscrollcommand=v_scrollbar.set)
+        # Al desplazar la vista se dibujan los mosaicos que quedan visibles
+        def on_xscroll(*args):
+            h_scrollbar.set(*args)
+            self.schedule_tile_update()
+
+        def on_yscroll(*args):
+            v_scrollbar.set(*args)
+            self.schedule_tile_update()
+
+        self.canvas.configure(xscrollcommand=on_xscroll,
+                             yscrollcommand=on_yscroll)
 
         h_scrollbar.pack(side="bottom", fill="x")
         v_scrollbar.pack(side="right", fill="y")
@@ -122,13 +160,31 @@ class ManualReviewWindow(ctk.CTkToplevel):
         self.canvas.bind("<MouseWheel>", self.on_mousewheel)
         self.canvas.bind("<Shift-MouseWheel>", self.on_shift_mousewheel)
 
+        # Zoom con Ctrl + rueda (centrado en el cursor) o con Ctrl + / Ctrl - / Ctrl 0
+        self.canvas.bind("<Control-MouseWheel>", self.on_ctrl_mousewheel)
+        self.canvas.bind("<Configure>", lambda event: self.schedule_tile_update())
+        self.bind("<Control-plus>", lambda event: self.set_zoom(self.zoom_index + 1))
+        self.bind("<Control-equal>", lambda event: self.set_zoom(self.zoom_index + 1))
+        self.bind("<Control-minus>", lambda event: self.set_zoom(self.zoom_index - 1))
+        self.bind("<Control-0>", lambda event: self.set_zoom(0))
+
         # ===== INSTRUCCIONES =====
         instruction_frame = ctk.CTkFrame(self)
         instruction_frame.pack(fill="x", padx=10, pady=5)
 
-        instructions = ("💡 Instrucciones: Haz click en los círculos de la imagen para marcar/desmarcar respuestas y matrícula.")
+        # Controles de zoom
+        ctk.CTkButton(instruction_frame, text="−", width=30,
+                     command=lambda: self.set_zoom(self.zoom_index - 1)).pack(side="left", padx=(10, 2), pady=5)
+        self.zoom_label = ctk.CTkLabel(instruction_frame, text="100%", width=50,
+                                      font=ctk.CTkFont(size=11))
+        self.zoom_label.pack(side="left", padx=2)
+        ctk.CTkButton(instruction_frame, text="+", width=30,
+                     command=lambda: self.set_zoom(self.zoom_index + 1)).pack(side="left", padx=(2, 10))
+
+        instructions = ("💡 Instrucciones: Haz click en los círculos de la imagen para marcar/desmarcar respuestas y matrícula. "
+                        "Usa Ctrl + rueda del ratón para ampliar.")
         ctk.CTkLabel(instruction_frame, text=instructions,
-                    font=ctk.CTkFont(size=11), wraplength=1100).pack(pady=5)
+                    font=ctk.CTkFont(size=11), wraplength=900).pack(side="left", pady=5)
 
         # ===== BOTONES DE NAVEGACIÓN =====
         nav_frame = ctk.CTkFrame(self)
@@ -174,24 +230,7 @@ class ManualReviewWindow(ctk.CTkToplevel):
 
         # Cargar respuestas - ahora como diccionario de SETS para soportar múltiples alternativas
         # Formato: {pregunta: set(alternativas)}
-        self.edited_respuestas = {}
-        for pregunta, alternativa in sheet['result']['respuestas'].items():
-            if alternativa is not None:
-                # Verificar si es múltiple desde la detección original
-                detail = sheet['detection_result']['respuestas'].get('details', {}).get(pregunta, {})
-                if detail.get('status') == 'multiple':
-                    # Obtener todas las alternativas marcadas
-                    marked_alts = detail.get('marked_alternatives', [alternativa])
-                    self.edited_respuestas[pregunta] = set(marked_alts)
-                else:
-                    # Respuesta única
-                    self.edited_respuestas[pregunta] = {alternativa}
-            else:
-                # Sin respuesta
-                self.edited_respuestas[pregunta] = set()
-
-        # Limpiar círculos manuales anteriores
-        self.manual_circles = []
+        self.edited_respuestas = detected_answers(sheet)
 
         # Mostrar confianza
         confidence = sheet['result']['confidence']
@@ -208,55 +247,224 @@ class ManualReviewWindow(ctk.CTkToplevel):
     def load_image(self, sheet: Dict):
         """Carga la imagen de overlay en el canvas - solo muestra detecciones en verde"""
         try:
-            # Obtener la imagen warped original
-            warped_image = sheet.get('warped_image')
+            # Imagen escalada de esta hoja (precargada si ya se preparó en segundo plano)
+            display = self.prefetcher.get(self.current_index)
 
-            if warped_image is None:
+            # Empezar a preparar las hojas siguientes mientras se revisa esta
+            self.prefetcher.prefetch(self.current_index, len(self.sheets_to_review))
+
+            if display is None:
                 messagebox.showerror("Error", "No se pudo cargar la imagen de la hoja")
                 return
 
-            # Generar overlay de REVISIÓN (solo círculos verdes en detecciones, sin comparar con pauta)
-            review_overlay = self.create_review_overlay(
-                warped_image,
-                sheet['detection_result']
-            )
-
             # Guardar imagen original (sin escalar) para generar overlay final
-            self.current_image_bgr = review_overlay
+            self.current_image_bgr = display['image']
+            self.fit_scale = display['scale']
+            self.current_pil_image = display['pil_image']
+
+            # Los mosaicos ampliados de la hoja anterior ya no sirven
+            self.tile_pyramid = None
+            self.clear_tiles()
+
+            # Convertir a PhotoImage para tkinter (solo en el hilo de la interfaz;
+            # se conserva para volver a esta hoja sin convertirla otra vez)
+            if display.get('photo_image') is None:
+                display['photo_image'] = ImageTk.PhotoImage(display['pil_image'])
+            self.photo_image = display['photo_image']
+
+            # Actualizar canvas (la imagen y los círculos se reutilizan entre hojas)
+            if self.image_id is None:
+                self.image_id = self.canvas.create_image(0, 0, anchor="nw",
+                                                         image=self.photo_image)
+            else:
+                self.canvas.itemconfigure(self.image_id, image=self.photo_image)
+
+            # Aplicar el zoom actual (se conserva entre hojas) y mostrar los
+            # círculos de esta hoja (solo cambian los que difieren de la anterior)
+            self.apply_zoom()
+
+        except Exception as e:
+            messagebox.showerror("Error", f"Error al cargar imagen: {e}")
+
+    def apply_zoom(self):
+        """Ajusta la escala, la imagen visible, los círculos y la región de scroll al zoom actual"""
+        zoom = REVIEW_ZOOM_LEVELS[self.zoom_index]
+        self.scale_factor = self.fit_scale * zoom
+
+        if self.scale_factor != self._circle_items_scale:
+            # Otro tamaño de imagen: los círculos se vuelven a crear a la nueva escala
+            self.canvas.delete("manual_circle")
+            self.circle_items = {}
+            self.visible_circles = set()
+            self._pending_circles = {}
+            self._circle_items_scale = self.scale_factor
+
+        # Al 100% se muestra la imagen precargada; al ampliar, los mosaicos
+        self.canvas.itemconfigure(self.image_id, state="normal" if zoom == 1.0 else "hidden")
+        self.clear_tiles()
+        if zoom != 1.0 and self.tile_pyramid is None:
+            self.tile_pyramid = TilePyramid(self.current_image_bgr,
+                                            tile_size=REVIEW_TILE_SIZE,
+                                            max_tiles=REVIEW_TILE_CACHE)
+
+        # Configurar región de scroll
+        original_height, original_width = self.current_image_bgr.shape[:2]
+        self.canvas.configure(scrollregion=(0, 0, int(original_width * self.scale_factor),
+                                            int(original_height * self.scale_factor)))
+        self.zoom_label.configure(text=f"{zoom * 100:.0f}%")
+
+        self.update_tiles()
+        self.redraw_all_circles()
+
+    def set_zoom(self, zoom_index: int, anchor=None):
+        """
+        Cambia el nivel de zoom manteniendo fijo un punto de la vista
+
+        Args:
+            zoom_index: Posición en REVIEW_ZOOM_LEVELS (se limita al rango válido)
+            anchor: Punto (x, y) del canvas en pantalla que debe quedar fijo
+                (default: centro de la vista)
+        """
+        zoom_index = max(0, min(len(REVIEW_ZOOM_LEVELS) - 1, zoom_index))
+        if zoom_index == self.zoom_index or self.image_id is None:
+            return
+
+        if anchor is None:
+            anchor = (self.canvas.winfo_width() / 2, self.canvas.winfo_height() / 2)
+
+        # Punto de la imagen original bajo el ancla antes del cambio
+        image_x = self.canvas.canvasx(anchor[0]) / self.scale_factor
+        image_y = self.canvas.canvasy(anchor[1]) / self.scale_factor
+
+        self.zoom_index = zoom_index
+        self.apply_zoom()
+
+        # Desplazar la vista para que ese punto quede otra vez bajo el ancla
+        original_height, original_width = self.current_image_bgr.shape[:2]
+        total_width = original_width * self.scale_factor
+        total_height = original_height * self.scale_factor
+        self.canvas.xview_moveto(max(0.0, (image_x * self.scale_factor - anchor[0]) / total_width))
+        self.canvas.yview_moveto(max(0.0, (image_y * self.scale_factor - anchor[1]) / total_height))
+
+    def on_ctrl_mousewheel(self, event):
+        """Amplía o reduce con Ctrl + rueda del ratón, centrado en el cursor"""
+        step = 1 if event.delta > 0 else -1
+        self.set_zoom(self.zoom_index + step, anchor=(event.x, event.y))
+        return "break"
+
+    def schedule_tile_update(self):
+        """Programa la actualización de los mosaicos para cuando la interfaz quede libre"""
+        if self.tile_pyramid is not None and not self._tile_update_scheduled:
+            self._tile_update_scheduled = True
+            self.after_idle(self.update_tiles)
+
+    def update_tiles(self):
+        """Dibuja los mosaicos visibles (y uno más alrededor) y elimina los que quedaron fuera"""
+        self._tile_update_scheduled = False
+        if self.tile_pyramid is None or REVIEW_ZOOM_LEVELS[self.zoom_index] == 1.0:
+            return
+
+        # Zona visible en coordenadas de la imagen escalada
+        margin = REVIEW_TILE_SIZE
+        x0 = self.canvas.canvasx(0) - margin
+        y0 = self.canvas.canvasy(0) - margin
+        x1 = self.canvas.canvasx(self.canvas.winfo_width()) + margin
+        y1 = self.canvas.canvasy(self.canvas.winfo_height()) + margin
+        wanted = set(self.tile_pyramid.visible_tiles(self.scale_factor, x0, y0, x1, y1))
+
+        for position in list(self.tile_items):
+            if position not in wanted:
+                item_id, _ = self.tile_items.pop(position)
+                self.canvas.delete(item_id)
+
+        created = False
+        for tx, ty in wanted:
+            if (tx, ty) in self.tile_items:
+                continue
+            tile = self.tile_pyramid.get_tile(self.scale_factor, tx, ty)
+            if tile is None:
+                continue
+            photo = ImageTk.PhotoImage(Image.fromarray(tile))
+            item_id = self.canvas.create_image(tx * REVIEW_TILE_SIZE, ty * REVIEW_TILE_SIZE,
+                                               anchor="nw", image=photo, tags="review_tile")
+            self.tile_items[(tx, ty)] = (item_id, photo)
+            created = True
+
+        if created:
+            # Mantener los círculos sobre los mosaicos
+            self.canvas.tag_raise("manual_circle")
+
+    def clear_tiles(self):
+        """Elimina del canvas los mosaicos dibujados"""
+        if self.tile_items:
+            self.canvas.delete("review_tile")
+            self.tile_items = {}
+
+    def prepare_display_image(self, index: int) -> Optional[Dict]:
+        """
+        Prepara la imagen escalada de una hoja para mostrarla en el canvas
 
-            # Calcular factor de escala para ajustar imagen a la ventana
-            original_height, original_width = review_overlay.shape[:2]
-            self.scale_factor = self.display_width / original_width
+        Se ejecuta en el hilo de precarga: no debe usar widgets de tkinter.
 
-            # Redimensionar imagen para visualización
-            new_width = int(original_width * self.scale_factor)
-            new_height = int(original_height * self.scale_factor)
-            resized_image = cv2.resize(review_overlay, (new_width, new_height),
-                                      interpolation=cv2.INTER_AREA)
+        Args:
+            index: Índice de la hoja en sheets_to_review
+
+        Returns:
+            Diccionario con 'image' (overlay sin escalar), 'scale' y 'pil_image',
+            o None si la imagen de la hoja no está disponible
+        """
+        sheet = self.sheets_to_review[index]
+
+        # Obtener la imagen warped original
+        warped_image = self.get_warped_image(sheet)
+        if warped_image is None:
+            return None
+
+        # Generar overlay de REVISIÓN (solo círculos verdes en detecciones, sin comparar con pauta)
+        review_overlay = self.create_review_overlay(
+            warped_image,
+            sheet['detection_result']
+        )
+
+        # Calcular factor de escala para ajustar imagen a la ventana
+        original_height, original_width = review_overlay.shape[:2]
+        scale_factor = self.display_width / original_width
 
-            # Convertir BGR a RGB
+        # Redimensionar imagen para visualización
+        new_width = int(original_width * scale_factor)
+        new_height = int(original_height * scale_factor)
+        resized_image = cv2.resize(review_overlay, (new_width, new_height),
+                                  interpolation=cv2.INTER_AREA)
+
+        # Convertir BGR (o escala de grises) a RGB
+        if resized_image.ndim == 2:
+            image_rgb = cv2.cvtColor(resized_image, cv2.COLOR_GRAY2RGB)
+        else:
             image_rgb = cv2.cvtColor(resized_image, cv2.COLOR_BGR2RGB)
 
-            # Convertir a PIL Image
-            pil_image = Image.fromarray(image_rgb)
-            self.current_pil_image = pil_image
+        return {
+            'image': review_overlay,
+            'scale': scale_factor,
+            'pil_image': Image.fromarray(image_rgb)
+        }
 
-            # Convertir a PhotoImage para tkinter
-            self.photo_image = ImageTk.PhotoImage(pil_image)
+    def get_warped_image(self, sheet: Dict):
+        """
+        Obtiene la imagen corregida de una hoja, desde el caché si corresponde
 
-            # Actualizar canvas
-            self.canvas.delete("all")
-            self.image_id = self.canvas.create_image(0, 0, anchor="nw",
-                                                     image=self.photo_image)
+        Args:
+            sheet: Hoja en revisión
 
-            # Configurar región de scroll
-            self.canvas.configure(scrollregion=self.canvas.bbox("all"))
+        Returns:
+            Imagen corregida por perspectiva o None si no está disponible
+        """
+        if sheet.get('warped_image') is not None:
+            return sheet['warped_image']
 
-            # Dibujar círculos iniciales (detecciones + correcciones manuales)
-            self.redraw_all_circles()
+        if self.image_cache is not None and sheet.get('image_key') is not None:
+            return self.image_cache.get(sheet['image_key'])
 
-        except Exception as e:
-            messagebox.showerror("Error", f"Error al cargar imagen: {e}")
+        return None
 
     def create_review_overlay(self, warped_image, detection_result):
         """
@@ -277,84 +485,111 @@ class ManualReviewWindow(ctk.CTkToplevel):
         """Maneja el scroll horizontal con Shift + rueda del ratón"""
         self.canvas.xview_scroll(int(-1 * (event.delta / 120)), "units")
 
-    def draw_permanent_circle(self, x, y, radius):
-        """Dibuja un círculo verde PERMANENTE en el canvas"""
+    def create_circle_item(self, circle_index: int) -> int:
+        """
+        Crea el ítem del canvas (oculto) para el círculo verde de un círculo de la hoja
+
+        Args:
+            circle_index: Índice del círculo (ver CircleTable)
+
+        Returns:
+            Id del ítem en el canvas
+        """
+        x, y, radius = self.omr_detector.circles.circle(circle_index)
+
         # Escalar coordenadas según el factor de escala de la imagen
         scaled_x = int(x * self.scale_factor)
         scaled_y = int(y * self.scale_factor)
         scaled_radius = int(radius * self.scale_factor)
 
-        # Dibujar círculo verde brillante/fluorescente permanente
-        circle_id = self.canvas.create_oval(
+        # Círculo verde brillante/fluorescente
+        item_id = self.canvas.create_oval(
             scaled_x - scaled_radius,
             scaled_y - scaled_radius,
             scaled_x + scaled_radius,
             scaled_y + scaled_radius,
             outline="#00FF00",  # Verde brillante/fluorescente (lime green)
             width=3,
+            state="hidden",
             tags="manual_circle"
         )
+        self.circle_items[circle_index] = item_id
+        return item_id
 
-        # Guardar en la lista de círculos manuales
-        self.manual_circles.append({
-            'id': circle_id,
-            'x': x,  # Coordenadas originales (sin escalar)
-            'y': y,
-            'radius': radius
-        })
+    def set_circle_visible(self, circle_index: int, visible: bool):
+        """
+        Muestra u oculta el círculo verde de un círculo de la hoja
 
-    def redraw_all_circles(self):
-        """Redibuja TODOS los círculos verdes según el estado actual de edited_respuestas y edited_matricula"""
-        # Eliminar todos los círculos manuales existentes
-        self.canvas.delete("manual_circle")
-        self.manual_circles = []
+        El cambio se agrupa con los demás de la misma interacción y se aplica
+        en el canvas cuando la interfaz queda libre (after_idle).
+
+        Args:
+            circle_index: Índice del círculo (ver CircleTable)
+            visible: True para mostrarlo
+        """
+        if visible:
+            self.visible_circles.add(circle_index)
+        else:
+            self.visible_circles.discard(circle_index)
+
+        self._pending_circles[circle_index] = visible
+        if not self._circle_update_scheduled:
+            self._circle_update_scheduled = True
+            self.after_idle(self.apply_circle_updates)
+
+    def apply_circle_updates(self):
+        """Aplica en el canvas los cambios de visibilidad pendientes"""
+        self._circle_update_scheduled = False
+        pending, self._pending_circles = self._pending_circles, {}
+
+        for circle_index, visible in pending.items():
+            item_id = self.circle_items.get(circle_index)
+            if item_id is None:
+                if not visible:
+                    continue
+                item_id = self.create_circle_item(circle_index)
+            self.canvas.itemconfigure(item_id, state="normal" if visible else "hidden")
+
+        # Mantener los círculos sobre la imagen
+        self.canvas.tag_raise("manual_circle")
+
+    def selected_circles(self) -> set:
+        """
+        Obtiene los círculos marcados según edited_matricula y edited_respuestas
 
-        calibration = self.omr_detector.calibration_data
+        Returns:
+            Conjunto de índices de círculos (ver CircleTable)
+        """
+        circles = self.omr_detector.circles
+        selected = set()
 
-        # Redibujar círculos de MATRÍCULA
-        matricula_circles = calibration['matricula']
+        # Círculos de MATRÍCULA
         if len(self.edited_matricula) == 10:
             for col_idx, digito_char in enumerate(self.edited_matricula):
-                if digito_char == '?':
+                if not digito_char.isdigit():
                     continue  # Saltar columnas sin dígito
 
-                try:
-                    digito = int(digito_char)
-                    col_num = col_idx + 1
-
-                    # Encontrar el círculo correspondiente
-                    matching_circle = next(
-                        (c for c in matricula_circles
-                         if c['columna'] == col_num and c['digito'] == digito),
-                        None
-                    )
-
-                    if matching_circle:
-                        self.draw_permanent_circle(
-                            matching_circle['x'],
-                            matching_circle['y'],
-                            matching_circle['radius']
-                        )
-                except ValueError:
-                    continue
+                circle_index = circles.matricula_circle(col_idx + 1, int(digito_char))
+                if circle_index is not None:
+                    selected.add(circle_index)
 
-        # Redibujar círculos de RESPUESTAS
-        respuestas_circles = calibration['respuestas']
+        # Círculos de RESPUESTAS
         for pregunta, alternativas_set in self.edited_respuestas.items():
             for alternativa in alternativas_set:
-                # Encontrar el círculo correspondiente
-                matching_circle = next(
-                    (c for c in respuestas_circles
-                     if c['pregunta'] == pregunta and c['alternativa'] == alternativa),
-                    None
-                )
+                circle_index = circles.respuesta_circle(pregunta, alternativa)
+                if circle_index is not None:
+                    selected.add(circle_index)
 
-                if matching_circle:
-                    self.draw_permanent_circle(
-                        matching_circle['x'],
-                        matching_circle['y'],
-                        matching_circle['radius']
-                    )
+        return selected
+
+    def redraw_all_circles(self):
+        """Sincroniza TODOS los círculos verdes con edited_respuestas y edited_matricula (solo cambia los que difieren)"""
+        selected = self.selected_circles()
+
+        for circle_index in self.visible_circles - selected:
+            self.set_circle_visible(circle_index, False)
+        for circle_index in selected - self.visible_circles:
+            self.set_circle_visible(circle_index, True)
 
     def on_image_click(self, event):
         """Maneja clicks en la imagen para seleccionar/deseleccionar respuestas o matrícula (TOGGLE)"""
@@ -366,29 +601,15 @@ class ManualReviewWindow(ctk.CTkToplevel):
         image_x = int(canvas_x / self.scale_factor)
         image_y = int(canvas_y / self.scale_factor)
 
-        calibration = self.omr_detector.calibration_data
-
-        # Primero verificar si el click fue en un círculo de matrícula
-        matricula_circles = calibration['matricula']
-        clicked_matricula = None
-        min_distance_matricula = float('inf')
-
-        for circle in matricula_circles:
-            x, y = circle['x'], circle['y']
-            radius = circle['radius']
-
-            # Calcular distancia del click al centro del círculo (en coordenadas originales)
-            distance = np.sqrt((image_x - x)**2 + (image_y - y)**2)
-
-            # Si está dentro del círculo y es el más cercano
-            if distance <= radius * 1.5 and distance < min_distance_matricula:
-                clicked_matricula = circle
-                min_distance_matricula = distance
+        # Círculo bajo el click (índice espacial, sin recorrer todos los círculos)
+        circles = self.omr_detector.circles
+        circle_index = circles.hit_test(image_x, image_y)
+        if circle_index is None:
+            return
 
-        if clicked_matricula:
+        if circles.is_matricula(circle_index):
             # Usuario hizo click en un círculo de matrícula
-            columna = clicked_matricula['columna']
-            digito = clicked_matricula['digito']
+            columna, digito = circles.matricula_label(circle_index)
 
             # TOGGLE: Verificar si este dígito ya está seleccionado en esta columna
             matricula_list = list(self.edited_matricula) if len(self.edited_matricula) == 10 else ['?'] * 10
@@ -398,10 +619,16 @@ class ManualReviewWindow(ctk.CTkToplevel):
                 # Ya estaba seleccionado → DESMARCAR (poner '?')
                 matricula_list[columna - 1] = '?'
                 feedback_msg = f"Matrícula col {columna}: Desmarcado"
+                self.set_circle_visible(circle_index, False)
             else:
-                # No estaba seleccionado → MARCAR
+                # No estaba seleccionado → MARCAR (y ocultar el dígito anterior de la columna)
                 matricula_list[columna - 1] = str(digito)
                 feedback_msg = f"Matrícula col {columna}: {digito}"
+                if current_digit.isdigit():
+                    previous_index = circles.matricula_circle(columna, int(current_digit))
+                    if previous_index is not None:
+                        self.set_circle_visible(previous_index, False)
+                self.set_circle_visible(circle_index, True)
 
             # Actualizar matrícula
             self.edited_matricula = ''.join(matricula_list)
@@ -410,53 +637,30 @@ class ManualReviewWindow(ctk.CTkToplevel):
             self.matricula_entry.delete(0, "end")
             self.matricula_entry.insert(0, self.edited_matricula)
 
-            # Redibujar todos los círculos
-            self.redraw_all_circles()
-
             # Mostrar feedback
             self.show_feedback(feedback_msg)
             return
 
-        # Si no fue click en matrícula, buscar en círculos de respuesta
-        respuestas_circles = calibration['respuestas']
-        clicked_circle = None
-        min_distance = float('inf')
-
-        for circle in respuestas_circles:
-            x, y = circle['x'], circle['y']
-            radius = circle['radius']
-
-            # Calcular distancia del click al centro del círculo (en coordenadas originales)
-            distance = np.sqrt((image_x - x)**2 + (image_y - y)**2)
+        # Si no fue click en matrícula, es un círculo de respuesta
+        pregunta, alternativa = circles.respuesta_label(circle_index)
 
-            # Si está dentro del círculo y es el más cercano
-            if distance <= radius * 1.5 and distance < min_distance:
-                clicked_circle = circle
-                min_distance = distance
+        # TOGGLE: Verificar si esta alternativa ya está en el set
+        if pregunta not in self.edited_respuestas:
+            self.edited_respuestas[pregunta] = set()
 
-        if clicked_circle:
-            # Usuario hizo click en un círculo de respuesta
-            pregunta = clicked_circle['pregunta']
-            alternativa = clicked_circle['alternativa']
-
-            # TOGGLE: Verificar si esta alternativa ya está en el set
-            if pregunta not in self.edited_respuestas:
-                self.edited_respuestas[pregunta] = set()
-
-            if alternativa in self.edited_respuestas[pregunta]:
-                # Ya estaba seleccionada → DESMARCAR (eliminar del set)
-                self.edited_respuestas[pregunta].remove(alternativa)
-                feedback_msg = f"P{pregunta}: {alternativa} desmarcado"
-            else:
-                # No estaba seleccionada → MARCAR (agregar al set)
-                self.edited_respuestas[pregunta].add(alternativa)
-                feedback_msg = f"P{pregunta}: {alternativa} marcado"
-
-            # Redibujar todos los círculos
-            self.redraw_all_circles()
+        if alternativa in self.edited_respuestas[pregunta]:
+            # Ya estaba seleccionada → DESMARCAR (eliminar del set)
+            self.edited_respuestas[pregunta].remove(alternativa)
+            feedback_msg = f"P{pregunta}: {alternativa} desmarcado"
+            self.set_circle_visible(circle_index, False)
+        else:
+            # No estaba seleccionada → MARCAR (agregar al set)
+            self.edited_respuestas[pregunta].add(alternativa)
+            feedback_msg = f"P{pregunta}: {alternativa} marcado"
+            self.set_circle_visible(circle_index, True)
 
-            # Mostrar feedback
-            self.show_feedback(feedback_msg)
+        # Mostrar feedback
+        self.show_feedback(feedback_msg)
 
     def generate_final_overlay(self, sheet: Dict):
         """
@@ -578,7 +782,7 @@ class ManualReviewWindow(ctk.CTkToplevel):
 
             # Generar overlay final con comparación de pauta
             overlay = self.omr_detector.create_visual_overlay(
-                sheet['warped_image'],
+                self.get_warped_image(sheet),
                 detection_result,
                 answer_key=self.app_data.get('answer_key')
             )
@@ -616,11 +820,40 @@ class ManualReviewWindow(ctk.CTkToplevel):
                                "Por favor corrige la matrícula antes de guardar.")
             return
 
+        # Guardar la hoja con las correcciones
+        sheet = self.sheets_to_review[self.current_index]
+        if not self.save_sheet(sheet, new_matricula):
+            return
+
+        messagebox.showinfo("Guardado",
+                          f"Hoja guardada exitosamente\n"
+                          f"Matrícula: {new_matricula}\n"
+                          f"Nota: {sheet['result']['nota']:.1f}")
+
+        # Ir a siguiente hoja o cerrar
+        if self.current_index < len(self.sheets_to_review) - 1:
+            self.current_index += 1
+            self.load_current_sheet()
+        else:
+            messagebox.showinfo("Completado", "Todas las hojas han sido revisadas")
+            self.close_window()
+
+    def save_sheet(self, sheet: Dict, new_matricula: str) -> bool:
+        """
+        Aplica las correcciones (edited_matricula y edited_respuestas) a una hoja
+        y la guarda: recalcula la nota, genera el overlay final y guarda Excel e imagen
+
+        Args:
+            sheet: Hoja a guardar
+            new_matricula: Matrícula corregida (10 dígitos)
+
+        Returns:
+            True si la hoja se guardó
+        """
         # Actualizar matrícula editada
         self.edited_matricula = new_matricula
 
         # Actualizar resultado
-        sheet = self.sheets_to_review[self.current_index]
         sheet['result']['matricula'] = new_matricula
 
         # Convertir edited_respuestas (sets) a formato simple para guardar
@@ -653,16 +886,18 @@ class ManualReviewWindow(ctk.CTkToplevel):
 
             # Obtener el nombre de prueba del path original
             # Formato: {matricula}_{test_name}.jpg o {matricula}_{test_name}_pX.jpg
+            # (la extensión depende del formato de imagen configurado)
             old_filename = old_path.stem  # nombre sin extensión
+            extension = old_path.suffix
 
             # Extraer la parte después del primer "_" (que es el nombre de prueba)
             parts = old_filename.split('_', 1)
             if len(parts) > 1:
                 test_part = parts[1]  # Esto puede ser "test2" o "test2_p1"
-                new_filename = f"{new_matricula}_{test_part}.jpg"
+                new_filename = f"{new_matricula}_{test_part}{extension}"
             else:
                 # Fallback: usar solo la matrícula
-                new_filename = f"{new_matricula}.jpg"
+                new_filename = f"{new_matricula}{extension}"
 
             new_image_path = output_dir / new_filename
             sheet['result']['image_path'] = str(new_image_path)
@@ -679,7 +914,7 @@ class ManualReviewWindow(ctk.CTkToplevel):
 
         if final_overlay is None:
             messagebox.showerror("Error", "No se pudo generar el overlay final")
-            return
+            return False
 
         # Actualizar la imagen actual con el overlay final
         self.current_image_bgr = final_overlay
@@ -689,26 +924,14 @@ class ManualReviewWindow(ctk.CTkToplevel):
             success = self.on_save_callback(sheet)
             if not success:
                 messagebox.showerror("Error", "No se pudo guardar en Excel")
-                return
+                return False
 
         # Guardar imagen actualizada (con todas las correcciones visualizadas)
         self.save_updated_image(sheet)
 
         # Marcar como revisada
         sheet['reviewed'] = True
-
-        messagebox.showinfo("Guardado",
-                          f"Hoja guardada exitosamente\n"
-                          f"Matrícula: {new_matricula}\n"
-                          f"Nota: {sheet['result']['nota']:.1f}")
-
-        # Ir a siguiente hoja o cerrar
-        if self.current_index < len(self.sheets_to_review) - 1:
-            self.current_index += 1
-            self.load_current_sheet()
-        else:
-            messagebox.showinfo("Completado", "Todas las hojas han sido revisadas")
-            self.close_window()
+        return True
 
     def recalculate_grade(self, sheet: Dict):
         """Recalcula la nota basándose en las respuestas editadas"""
@@ -757,7 +980,15 @@ class ManualReviewWindow(ctk.CTkToplevel):
         try:
             if sheet['result'].get('image_path'):
                 # Guardar la imagen con las correcciones visualizadas
-                cv2.imwrite(sheet['result']['image_path'], self.current_image_bgr)
+                # (con el formato y la calidad configurados)
+                from src.core.image_writer import ImageWriter
+                writer = ImageWriter(
+                    image_format=self.app_data.get('image_format', DEFAULT_IMAGE_FORMAT),
+                    quality=self.app_data.get('image_quality', DEFAULT_IMAGE_QUALITY),
+                    threads=0
+                )
+                if not writer.write(sheet['result']['image_path'], self.current_image_bgr):
+                    raise OSError("OpenCV no pudo escribir la imagen")
                 # Actualizar flag de imagen guardada
                 sheet['result']['image_saved'] = True
                 print(f"✓ Imagen con correcciones guardada: {sheet['result']['image_path']}")
@@ -798,5 +1029,6 @@ class ManualReviewWindow(ctk.CTkToplevel):
                                       "¿Cerrar de todos modos?"):
                 return
 
+        self.prefetcher.close()
         self.grab_release()
         self.destroy()
@@ -0,0 +1,334 @@
+"""
+Ventana de revisión por preguntas: muestra solo las filas dudosas de todas las hojas
+"""
+
+import customtkinter as ctk
+from tkinter import messagebox
+from PIL import Image, ImageTk
+import cv2
+from typing import Dict, List, Optional, Callable, Set
+from src.utils.constants import ALTERNATIVES, REVIEW_QUEUE_MIN_AMBIGUITY
+from src.core.review_queue import build_review_queue, detected_answers, is_queue_eligible
+from src.ui.manual_review_window import ManualReviewWindow
+
+
+class QuestionReviewWindow(ManualReviewWindow):
+    """
+    Ventana modal que recorre las preguntas dudosas de todas las hojas, de la más
+    a la menos ambigua, mostrando solo el recorte de cada fila
+
+    Al terminar, guarda (como la revisión manual) cada hoja cuyas preguntas dudosas
+    quedaron todas decididas. Las hojas con matrícula incompleta o dudosa no entran
+    en la cola y quedan para la revisión hoja por hoja.
+    """
+
+    # Margen del recorte alrededor de los círculos (en radios); a la izquierda es
+    # mayor para incluir el número de la pregunta
+    CROP_PADDING_RATIO = 1.5
+    CROP_LABEL_RATIO = 6
+    CROP_DISPLAY_WIDTH = 700  # Ancho del recorte en pantalla
+
+    def __init__(self, parent, sheets_to_review: List[Dict],
+                 omr_detector, app_data, on_save_callback: Optional[Callable] = None,
+                 image_cache=None):
+        """
+        Inicializa la ventana de revisión por preguntas
+
+        Args:
+            parent: Ventana padre
+            sheets_to_review: Lista de hojas que necesitan revisión
+            omr_detector: Instancia de OMRDetector (círculos y overlay final)
+            app_data: Datos de la aplicación (pauta, Excel, etc.)
+            on_save_callback: Función a llamar cuando se guarda una hoja
+            image_cache: ReviewImageCache con las imágenes de las hojas
+        """
+        # Cola de preguntas dudosas (current_index es la posición en esta cola)
+        self.queue = build_review_queue(sheets_to_review,
+                                        app_data.get('num_questions', 0),
+                                        REVIEW_QUEUE_MIN_AMBIGUITY)
+        self.decisions = {}  # {posición en la cola: alternativas elegidas}
+        self.queue_sheets = [index for index, sheet in enumerate(sheets_to_review)
+                             if is_queue_eligible(sheet, REVIEW_QUEUE_MIN_AMBIGUITY)]
+        self.finished = False
+        self.started = False
+
+        super().__init__(parent, sheets_to_review, omr_detector, app_data,
+                         on_save_callback, image_cache)
+
+    def create_widgets(self):
+        """Crea todos los widgets de la ventana"""
+        self.title("Revisión por Preguntas")
+        self.geometry("900x650")
+
+        # ===== ENCABEZADO =====
+        header_frame = ctk.CTkFrame(self)
+        header_frame.pack(fill="x", padx=10, pady=10)
+
+        self.title_label = ctk.CTkLabel(header_frame,
+                                        text="",
+                                        font=ctk.CTkFont(size=18, weight="bold"))
+        self.title_label.pack(pady=5)
+
+        self.info_label = ctk.CTkLabel(header_frame, text="",
+                                       font=ctk.CTkFont(size=14))
+        self.info_label.pack(pady=2)
+
+        self.confidence_label = ctk.CTkLabel(header_frame, text="",
+                                             font=ctk.CTkFont(size=12))
+        self.confidence_label.pack(pady=2)
+
+        # ===== RECORTE DE LA PREGUNTA =====
+        image_frame = ctk.CTkFrame(self)
+        image_frame.pack(fill="both", expand=True, padx=10, pady=10)
+
+        self.canvas = ctk.CTkCanvas(image_frame, bg="gray20", highlightthickness=0)
+        self.canvas.pack(fill="both", expand=True)
+
+        # ===== ALTERNATIVAS =====
+        choice_frame = ctk.CTkFrame(self)
+        choice_frame.pack(fill="x", padx=10, pady=5)
+
+        for number, alternativa in enumerate(ALTERNATIVES, start=1):
+            ctk.CTkButton(choice_frame, text=f"{alternativa} ({number})", width=80,
+                         command=lambda a=alternativa: self.choose({a})).pack(side="left", padx=5, pady=5)
+
+        ctk.CTkButton(choice_frame, text="Sin respuesta (0)", width=130,
+                     command=lambda: self.choose(set()),
+                     fg_color="gray", hover_color="darkgray").pack(side="left", padx=5, pady=5)
+
+        ctk.CTkButton(choice_frame, text="Aceptar detección (Enter)", width=180,
+                     command=self.accept_detection,
+                     fg_color="green", hover_color="darkgreen").pack(side="right", padx=5, pady=5)
+
+        # ===== INSTRUCCIONES =====
+        instructions = ("⌨️ Enter acepta la detección · A-E o 1-5 eligen la alternativa · "
+                        "0 = sin respuesta · Retroceso vuelve a la pregunta anterior")
+        ctk.CTkLabel(self, text=instructions, font=ctk.CTkFont(size=11)).pack(pady=5)
+
+        # ===== BOTONES DE NAVEGACIÓN =====
+        nav_frame = ctk.CTkFrame(self)
+        nav_frame.pack(fill="x", padx=10, pady=10)
+
+        self.prev_btn = ctk.CTkButton(nav_frame, text="◄ Anterior", width=120,
+                                     command=self.go_previous)
+        self.prev_btn.pack(side="left", padx=10)
+
+        self.progress_label = ctk.CTkLabel(nav_frame, text="", font=ctk.CTkFont(size=12))
+        self.progress_label.pack(side="left", padx=10)
+
+        ctk.CTkButton(nav_frame, text="Cerrar", width=120,
+                     command=self.close_window,
+                     fg_color="red", hover_color="darkred").pack(side="right", padx=10)
+
+        self.save_btn = ctk.CTkButton(nav_frame, text="Terminar y Guardar", width=180,
+                                     command=self.finish_queue,
+                                     fg_color="green", hover_color="darkgreen")
+        self.save_btn.pack(side="right", padx=10)
+
+        # Atajos de teclado
+        self.bind("<Return>", lambda event: self.accept_detection())
+        self.bind("<BackSpace>", lambda event: self.go_previous())
+        self.bind("<Escape>", lambda event: self.close_window())
+        self.bind("0", lambda event: self.choose(set()))
+        for number, alternativa in enumerate(ALTERNATIVES, start=1):
+            for key in (alternativa.lower(), alternativa, str(number)):
+                self.bind(key, lambda event, a=alternativa: self.choose({a}))
+
+    def load_current_sheet(self):
+        """Muestra la pregunta actual de la cola"""
+        if not self.started:
+            # La primera carga ocurre dentro de __init__; con la cola vacía se cerraría
+            # la ventana antes de que el llamador alcance a esperarla (wait_window)
+            self.started = True
+            self.after(0, self.load_current_sheet)
+            return
+
+        if self.current_index >= len(self.queue):
+            # Cola terminada (o sin preguntas dudosas): solo queda guardar las hojas
+            self.finish_queue()
+            return
+
+        item = self.queue[self.current_index]
+        sheet = self.sheets_to_review[item['sheet']]
+
+        self.title_label.configure(
+            text=f"Pregunta dudosa {self.current_index + 1} de {len(self.queue)}"
+        )
+        self.info_label.configure(
+            text=f"{sheet['result'].get('filename', '')} · Pregunta {item['pregunta']} · "
+                 f"Detectado: {self.format_answer(item['detected'])}"
+        )
+
+        decision = self.decisions.get(self.current_index)
+        status = f"Ambigüedad: {item['ambiguity']:.2f}"
+        if decision is not None:
+            status += f" · Decisión: {self.format_answer(decision)}"
+        self.confidence_label.configure(text=status)
+
+        # Recorte de la fila (precargado en segundo plano si ya se preparó)
+        try:
+            display = self.prefetcher.get(self.current_index)
+            self.prefetcher.prefetch(self.current_index, len(self.queue))
+        except Exception as e:
+            messagebox.showerror("Error", f"Error al cargar imagen: {e}")
+            display = None
+
+        self.canvas.delete("all")
+        self.image_id = None
+        if display is not None:
+            if display.get('photo_image') is None:
+                display['photo_image'] = ImageTk.PhotoImage(display['pil_image'])
+            self.photo_image = display['photo_image']
+            self.image_id = self.canvas.create_image(0, 0, anchor="nw", image=self.photo_image)
+
+        self.prev_btn.configure(state="normal" if self.current_index > 0 else "disabled")
+        self.progress_label.configure(text=f"Decididas: {len(self.decisions)}/{len(self.queue)}")
+
+    def prepare_display_image(self, index: int) -> Optional[Dict]:
+        """
+        Prepara el recorte ampliado de una pregunta de la cola
+
+        Se ejecuta en el hilo de precarga: no debe usar widgets de tkinter.
+
+        Args:
+            index: Posición en la cola
+
+        Returns:
+            Diccionario con 'pil_image', o None si la imagen de la hoja no está disponible
+        """
+        item = self.queue[index]
+        warped_image = self.get_warped_image(self.sheets_to_review[item['sheet']])
+        if warped_image is None:
+            return None
+
+        circles = self.omr_detector.circles
+        radius = int(circles.radius.max())
+        x0, y0, x1, y1 = circles.question_bounds(item['pregunta'],
+                                                 int(radius * self.CROP_PADDING_RATIO))
+        x0 -= radius * self.CROP_LABEL_RATIO
+
+        height, width = warped_image.shape[:2]
+        x0, y0 = max(0, x0), max(0, y0)
+        x1, y1 = min(width, x1), min(height, y1)
+
+        crop = warped_image[y0:y1, x0:x1]
+        if crop.ndim == 2:
+            crop = cv2.cvtColor(crop, cv2.COLOR_GRAY2BGR)
+        else:
+            crop = crop.copy()
+
+        # Marcar en verde las alternativas detectadas
+        for alternativa in item['detected']:
+            circle_index = circles.respuesta_circle(item['pregunta'], alternativa)
+            if circle_index is not None:
+                x, y, circle_radius = circles.circle(circle_index)
+                cv2.circle(crop, (x - x0, y - y0), circle_radius + 3, (0, 255, 0), 2)
+
+        # Ampliar para que las marcas tenues se distingan
+        scale = self.CROP_DISPLAY_WIDTH / crop.shape[1]
+        crop = cv2.resize(crop, (self.CROP_DISPLAY_WIDTH, int(crop.shape[0] * scale)),
+                          interpolation=cv2.INTER_CUBIC)
+
+        return {'pil_image': Image.fromarray(cv2.cvtColor(crop, cv2.COLOR_BGR2RGB))}
+
+    @staticmethod
+    def format_answer(alternatives: Set[str]) -> str:
+        """Texto de una respuesta: alternativas separadas por coma o 'sin respuesta'"""
+        return ", ".join(sorted(alternatives)) if alternatives else "sin respuesta"
+
+    def choose(self, alternatives: Set[str]):
+        """
+        Registra la respuesta de la pregunta actual y pasa a la siguiente
+
+        Args:
+            alternatives: Alternativas elegidas (vacío = sin respuesta)
+        """
+        if self.finished or self.current_index >= len(self.queue):
+            return
+
+        self.decisions[self.current_index] = set(alternatives)
+        self.current_index += 1
+        self.load_current_sheet()
+
+    def accept_detection(self):
+        """Acepta lo detectado en la pregunta actual"""
+        if self.current_index < len(self.queue):
+            self.choose(self.queue[self.current_index]['detected'])
+
+    def finish_queue(self):
+        """Guarda las hojas cuyas preguntas dudosas quedaron todas decididas y cierra"""
+        if self.finished:
+            return
+
+        # Preguntas de la cola pendientes por hoja
+        pending = {}
+        for position, item in enumerate(self.queue):
+            if position not in self.decisions:
+                pending[item['sheet']] = pending.get(item['sheet'], 0) + 1
+
+        ready = [index for index in self.queue_sheets if index not in pending]
+        if not ready:
+            messagebox.showinfo("Revisión por preguntas",
+                                "No hay hojas con todas sus preguntas dudosas decididas")
+            if self.current_index >= len(self.queue):
+                self.close_window()
+            return
+
+        # Hojas sin ninguna fila en la cola: se guardan tal como se detectaron
+        unseen = len(set(ready) - {item['sheet'] for item in self.queue})
+
+        msg = f"Se guardarán {len(ready)} hoja(s) con las respuestas decididas."
+        if unseen:
+            msg += (f"\n{unseen} de ellas no tenían preguntas dudosas, múltiples ni en blanco "
+                    "dentro de la prueba y se guardarán tal como se detectaron, sin mostrarse.")
+        if pending:
+            msg += (f"\n{len(pending)} hoja(s) con preguntas sin decidir quedarán "
+                    "para la revisión hoja por hoja.")
+        if not messagebox.askyesno("Terminar revisión", msg + "\n\n¿Guardar ahora?"):
+            if not self.queue:
+                self.close_window()
+            elif self.current_index >= len(self.queue):
+                # Volver a la última pregunta para poder seguir editando
+                self.current_index = len(self.queue) - 1
+                self.load_current_sheet()
+            return
+
+        self.finished = True
+
+        # Respuestas elegidas por hoja
+        decided = {}
+        for position, alternatives in self.decisions.items():
+            item = self.queue[position]
+            decided.setdefault(item['sheet'], {})[item['pregunta']] = alternatives
+
+        saved = 0
+        for number, sheet_index in enumerate(ready, start=1):
+            sheet = self.sheets_to_review[sheet_index]
+            self.progress_label.configure(text=f"Guardando hoja {number} de {len(ready)}...")
+            self.update_idletasks()
+
+            self.edited_matricula = sheet['result']['matricula']
+            self.edited_respuestas = detected_answers(sheet)
+            self.edited_respuestas.update(decided.get(sheet_index, {}))
+
+            if self.save_sheet(sheet, self.edited_matricula):
+                saved += 1
+
+        messagebox.showinfo("Completado",
+                            f"Hojas guardadas: {saved}/{len(ready)}")
+
+        self.prefetcher.close()
+        self.grab_release()
+        self.destroy()
+
+    def close_window(self):
+        """Cierra la ventana (las decisiones que no se guardaron se pierden)"""
+        if self.decisions and not self.finished:
+            if not messagebox.askyesno("Cerrar",
+                                      f"Hay {len(self.decisions)} pregunta(s) decidida(s) sin guardar.\n"
+                                      "¿Cerrar de todos modos?"):
+                return
+
+        self.prefetcher.close()
+        self.grab_release()
+        self.destroy()
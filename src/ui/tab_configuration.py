@@ -5,8 +5,10 @@ Pestaña de configuración de la prueba
 import customtkinter as ctk
 from tkinter import filedialog, messagebox
 from src.utils.constants import (MAX_QUESTIONS, DEFAULT_MIN_GRADE, DEFAULT_MAX_GRADE,
-                                DEFAULT_PASSING_GRADE, DEFAULT_PASSING_PERCENTAGE)
-from src.core.excel_handler import ExcelHandler
+                                DEFAULT_PASSING_GRADE, DEFAULT_PASSING_PERCENTAGE,
+                                DEFAULT_NUM_WORKERS, DEFAULT_REVIEW_CACHE_MB,
+                                IMAGE_FORMATS, DEFAULT_IMAGE_FORMAT, DEFAULT_IMAGE_QUALITY,
+                                FILL_STRATEGIES, DEFAULT_FILL_STRATEGY)
 
 
 class ConfigurationTab:
@@ -149,6 +151,82 @@ class ConfigurationTab:
                                            placeholder_text="Ej: Test 1, Examen Final, etc.")
         self.test_name_entry.pack(side="left", padx=10)
         
+        # Frame para configuración de procesamiento
+        processing_frame = ctk.CTkFrame(self.main_frame)
+        processing_frame.pack(fill="x", pady=10)
+        
+        ctk.CTkLabel(processing_frame, 
+                    text="Procesamiento",
+                    font=ctk.CTkFont(size=16, weight="bold")).pack(pady=10)
+        
+        workers_frame = ctk.CTkFrame(processing_frame)
+        workers_frame.pack(fill="x", padx=20, pady=5)
+        
+        ctk.CTkLabel(workers_frame, text="Procesos en paralelo:", 
+                    width=200, anchor="w").pack(side="left", padx=10)
+        
+        self.workers_entry = ctk.CTkEntry(workers_frame, width=100)
+        self.workers_entry.pack(side="left", padx=10)
+        self.workers_entry.insert(0, str(DEFAULT_NUM_WORKERS))
+        
+        ctk.CTkLabel(workers_frame, text="(0 = automático según núcleos del equipo)",
+                    text_color="gray").pack(side="left", padx=10)
+        
+        cache_frame = ctk.CTkFrame(processing_frame)
+        cache_frame.pack(fill="x", padx=20, pady=5)
+        
+        ctk.CTkLabel(cache_frame, text="Memoria para revisión (MB):", 
+                    width=200, anchor="w").pack(side="left", padx=10)
+        
+        self.review_cache_entry = ctk.CTkEntry(cache_frame, width=100)
+        self.review_cache_entry.pack(side="left", padx=10)
+        self.review_cache_entry.insert(0, str(DEFAULT_REVIEW_CACHE_MB))
+        
+        ctk.CTkLabel(cache_frame, text="(el resto de las hojas a revisar se guarda en disco)",
+                    text_color="gray").pack(side="left", padx=10)
+        
+        image_frame = ctk.CTkFrame(processing_frame)
+        image_frame.pack(fill="x", padx=20, pady=5)
+        
+        ctk.CTkLabel(image_frame, text="Imágenes de resultado:", 
+                    width=200, anchor="w").pack(side="left", padx=10)
+        
+        self.image_format_menu = ctk.CTkOptionMenu(image_frame, values=IMAGE_FORMATS, width=100)
+        self.image_format_menu.pack(side="left", padx=10)
+        self.image_format_menu.set(DEFAULT_IMAGE_FORMAT)
+        
+        ctk.CTkLabel(image_frame, text="Calidad:").pack(side="left", padx=(10, 0))
+        
+        self.image_quality_entry = ctk.CTkEntry(image_frame, width=60)
+        self.image_quality_entry.pack(side="left", padx=10)
+        self.image_quality_entry.insert(0, str(DEFAULT_IMAGE_QUALITY))
+        
+        ctk.CTkLabel(image_frame, text="(1-100, para jpg y webp)",
+                    text_color="gray").pack(side="left", padx=10)
+        
+        rewrite_frame = ctk.CTkFrame(processing_frame)
+        rewrite_frame.pack(fill="x", padx=20, pady=5)
+        
+        self.rewrite_overlays_check = ctk.CTkCheckBox(
+            rewrite_frame, text="Regenerar imágenes de resultado existentes")
+        self.rewrite_overlays_check.pack(side="left", padx=10)
+        
+        ctk.CTkLabel(rewrite_frame, text="(al recalificar hojas ya detectadas, p. ej. con una pauta corregida)",
+                    text_color="gray").pack(side="left", padx=10)
+        
+        fill_frame = ctk.CTkFrame(processing_frame)
+        fill_frame.pack(fill="x", padx=20, pady=5)
+        
+        ctk.CTkLabel(fill_frame, text="Medición del relleno:", 
+                    width=200, anchor="w").pack(side="left", padx=10)
+        
+        self.fill_strategy_menu = ctk.CTkOptionMenu(fill_frame, values=FILL_STRATEGIES, width=100)
+        self.fill_strategy_menu.pack(side="left", padx=10)
+        self.fill_strategy_menu.set(DEFAULT_FILL_STRATEGY)
+        
+        ctk.CTkLabel(fill_frame, text="(mismo resultado; integral puede ser más rápida según la plantilla)",
+                    text_color="gray").pack(side="left", padx=10)
+        
         # Botón para guardar configuración
         save_button = ctk.CTkButton(self.main_frame, 
                                    text="💾 Guardar Configuración",
@@ -165,9 +243,15 @@ class ConfigurationTab:
         )
         
         if filename:
+            from src.core.excel_handler import ExcelHandler
+
             try:
-                # Intentar cargar el archivo
-                excel_handler = ExcelHandler(filename)
+                # Intentar cargar el archivo (las notas se guardan en lotes)
+                excel_handler = ExcelHandler(filename, write_behind=True)
+
+                # Guardar notas pendientes del archivo anterior
+                if self.app_data.get('excel_handler'):
+                    self.app_data['excel_handler'].close()
                 
                 # Si se cargó correctamente, actualizar la interfaz
                 self.app_data['excel_file'] = filename
@@ -219,6 +303,21 @@ class ConfigurationTab:
             if not test_name:
                 raise ValueError("Debe ingresar un nombre para la prueba")
             
+            # Validar cantidad de procesos en paralelo
+            num_workers = int(self.workers_entry.get())
+            if num_workers < 0:
+                raise ValueError("La cantidad de procesos en paralelo no puede ser negativa")
+            
+            # Validar memoria para imágenes de revisión
+            review_cache_mb = int(self.review_cache_entry.get())
+            if review_cache_mb < 0:
+                raise ValueError("La memoria para revisión no puede ser negativa")
+            
+            # Validar calidad de las imágenes de resultado
+            image_quality = int(self.image_quality_entry.get())
+            if image_quality < 1 or image_quality > 100:
+                raise ValueError("La calidad de imagen debe estar entre 1 y 100")
+            
             # Validar que se haya cargado el Excel
             if not self.app_data.get('excel_file'):
                 raise ValueError("Debe cargar un archivo Excel antes de continuar")
@@ -230,6 +329,12 @@ class ConfigurationTab:
             self.app_data['max_grade'] = max_grade
             self.app_data['passing_grade'] = passing_grade
             self.app_data['test_name'] = test_name
+            self.app_data['num_workers'] = num_workers
+            self.app_data['review_cache_mb'] = review_cache_mb
+            self.app_data['image_format'] = self.image_format_menu.get()
+            self.app_data['image_quality'] = image_quality
+            self.app_data['fill_strategy'] = self.fill_strategy_menu.get()
+            self.app_data['rewrite_overlays'] = bool(self.rewrite_overlays_check.get())
             
             messagebox.showinfo("Éxito", 
                                "Configuración guardada correctamente\n\n" +
@@ -4,21 +4,19 @@ Pestaña de calificación con procesamiento por lotes de PDFs escaneados
 
 import customtkinter as ctk
 from tkinter import messagebox, filedialog
-import cv2
-from PIL import Image, ImageTk
 import threading
+import time
 from pathlib import Path
-import os
 from typing import List, Dict
 
 from src.utils.constants import (MSG_INVALID_CONFIG, MSG_NO_ANSWER_KEY,
                                 MSG_NO_EXCEL_LOADED, MSG_GRADE_SAVED,
-                                MSG_DUPLICATE_GRADE, MSG_STUDENT_NOT_FOUND)
-from src.core.grade_calculator import GradeCalculator
-from src.core.pdf_processor import PDFProcessor
-from src.core.image_processor import ImageProcessor
-from src.core.omr_detector import OMRDetector
-from src.ui.manual_review_window import ManualReviewWindow
+                                MSG_DUPLICATE_GRADE, MSG_STUDENT_NOT_FOUND,
+                                DEFAULT_NUM_WORKERS, DEFAULT_REVIEW_CACHE_MB)
+
+# Los módulos de procesamiento (OpenCV, PyMuPDF) se importan al primer uso o
+# durante el precalentamiento en segundo plano (ver ensure_processors), para
+# que la ventana aparezca sin esperar a cargarlos.
 
 
 class GradingTab:
@@ -33,17 +31,26 @@ class GradingTab:
         # Estado de procesamiento
         self.pdf_queue = []  # Lista de PDFs a procesar
         self.processing = False
-        self.current_results = []  # Resultados de procesamiento
-
-        # Procesadores
-        try:
-            self.pdf_processor = PDFProcessor(dpi=300)
-            self.image_processor = ImageProcessor()
-            self.omr_detector = OMRDetector()
-            self.processors_ready = True
-        except FileNotFoundError as e:
-            self.processors_ready = False
-            self.calibration_error = str(e)
+        self.current_results = []  # Resultados de procesamiento (sin imágenes)
+        self.review_cache = None  # Imágenes de hojas a revisar (ReviewImageCache)
+
+        # Registro de páginas ya calificadas para reanudar lotes (JobLedger)
+        self.job_ledger = None
+        self.ledger_context = None  # Hash del contexto de calificación del lote
+        self.pdf_hashes = {}  # {ruta_pdf: hash del contenido}
+
+        # Tiempos por etapa de la última ejecución (PipelineStats)
+        self.run_stats = None
+        self.run_stats_path = None
+
+        # Procesadores (se cargan con ensure_processors)
+        # Las páginas se procesan en procesos de trabajo (ver grading_pipeline);
+        # aquí solo se necesitan para contar páginas y para la revisión manual
+        self.pdf_processor = None
+        self.omr_detector = None
+        self.processors_ready = None  # None = aún no cargados
+        self.calibration_error = None
+        self._processors_lock = threading.Lock()
 
         # Crear frame principal
         self.main_frame = ctk.CTkFrame(parent)
@@ -51,8 +58,34 @@ class GradingTab:
 
         self.create_widgets()
 
-        # Mostrar error de calibración si corresponde
-        if not self.processors_ready:
+    def ensure_processors(self) -> bool:
+        """
+        Carga los procesadores y la calibración si aún no se han cargado
+
+        Se llama desde el hilo de precalentamiento de la ventana principal y,
+        por si este no ha terminado, antes de cada uso.
+
+        Returns:
+            bool: True si el sistema está listo (calibración cargada)
+        """
+        with self._processors_lock:
+            if self.processors_ready is None:
+                from src.core.pdf_processor import PDFProcessor
+                from src.core.omr_detector import OMRDetector
+
+                self.pdf_processor = PDFProcessor(dpi=300)
+                try:
+                    self.omr_detector = OMRDetector()
+                    self.processors_ready = True
+                except FileNotFoundError as e:
+                    self.processors_ready = False
+                    self.calibration_error = str(e)
+
+        return self.processors_ready
+
+    def show_calibration_warning(self):
+        """Muestra el error de calibración si no se pudo cargar"""
+        if self.processors_ready is False:
             messagebox.showwarning(
                 "Calibración Requerida",
                 f"No se pudo inicializar el sistema:\n\n{self.calibration_error}\n\n" +
@@ -206,6 +239,7 @@ class GradingTab:
             return
 
         # Agregar a la cola
+        self.ensure_processors()
         total_pages = 0
         for pdf_path in new_pdfs:
             # Detectar número de páginas
@@ -299,7 +333,7 @@ class GradingTab:
     def start_processing(self):
         """Inicia el procesamiento por lotes de PDFs"""
         # Verificar que haya calibración
-        if not self.processors_ready:
+        if not self.ensure_processors():
             messagebox.showerror("Error",
                                "Sistema no calibrado. Ejecute:\n" +
                                "python calibrate_from_pdf.py <hoja_blanca.pdf>")
@@ -323,6 +357,18 @@ class GradingTab:
             messagebox.showinfo("Info", "No hay PDFs pendientes para procesar")
             return
 
+        # Notas que ya existen en Excel para esta prueba (no se sobrescriben)
+        excel_handler = self.app_data.get('excel_handler')
+        if excel_handler and self.app_data.get('answer_key'):
+            test_name = self.app_data.get('test_name', 'Prueba')
+            existing = excel_handler.check_existing_grades(list(excel_handler.students), test_name)
+            if existing and not messagebox.askyesno(
+                    "Notas existentes",
+                    f"{len(existing)} estudiante(s) ya tienen nota en '{test_name}'.\n"
+                    "Esas notas no se sobrescriben: sus hojas no se volverán a guardar.\n\n"
+                    "¿Continuar?"):
+                return
+
         # Deshabilitar controles
         self.processing = True
         self.process_btn.configure(state="disabled")
@@ -333,244 +379,203 @@ class GradingTab:
         # Limpiar resultados anteriores
         self.results_text.delete("1.0", "end")
         self.current_results = []
+        from src.core.review_image_cache import ReviewImageCache
+        if self.review_cache is not None:
+            self.review_cache.clear()
+        self.review_cache = ReviewImageCache(
+            max_memory_mb=self.app_data.get('review_cache_mb', DEFAULT_REVIEW_CACHE_MB))
 
         # Iniciar procesamiento en thread separado
         thread = threading.Thread(target=self.process_all_pdfs, daemon=True)
         thread.start()
 
+    def get_job_ledger(self):
+        """Abre el registro de páginas calificadas (una sola vez)
+
+        Returns:
+            JobLedger o None si no se pudo abrir (se procesa sin reanudar)
+        """
+        if self.job_ledger is None:
+            from src.core.job_ledger import JobLedger
+            try:
+                self.job_ledger = JobLedger()
+            except Exception as e:
+                print(f"⚠️ No se pudo abrir el registro de páginas calificadas: {e}")
+        return self.job_ledger
+
     def process_all_pdfs(self):
-        """Procesa todos los PDFs de la cola, incluyendo multi-página (ejecuta en thread separado)"""
-        pending = [item for item in self.pdf_queue if item['status'] == 'pending']
+        """Procesa todos los PDFs de la cola, incluyendo multi-página (ejecuta en thread separado)
 
-        # Calcular total de páginas a procesar
-        total_pages = sum(item['page_count'] for item in pending)
-        processed_pages = 0
+        Las páginas se reparten entre varios procesos de trabajo. El progreso se
+        actualiza en orden de finalización, mientras que las notas se guardan en
+        Excel (y se muestran) en el orden de la cola, desde este único hilo.
+
+        Las páginas ya calificadas en una ejecución anterior (mismo contenido de
+        PDF y mismo contexto de calificación) se recuperan del registro sin
+        volver a procesarlas.
+        """
+        from src.core.grading_pipeline import build_pipeline_settings, iter_page_results
+        from src.core.pipeline_stats import PipelineStats
+
+        self.run_stats = PipelineStats()
+        self.run_stats_path = None
+
+        pending = [item for item in self.pdf_queue if item['status'] == 'pending']
 
-        for pdf_idx, item in enumerate(pending, 1):
-            # Actualizar estado del PDF
+        # Construir la lista de páginas a procesar, en orden de cola
+        tasks = []
+        task_items = []
+        for item in pending:
             item['status'] = 'processing'
-            self.parent.after(0, self.update_pdf_list)
+            item['result'] = []
+            for page_num in range(item['page_count']):
+                tasks.append((item['path'], page_num, item['page_count']))
+                task_items.append(item)
+
+        self.parent.after(0, self.update_pdf_list)
+
+        total_pages = len(tasks)
+        settings = build_pipeline_settings(self.app_data)
+        num_workers = self.app_data.get('num_workers', DEFAULT_NUM_WORKERS)
+
+        # Páginas terminadas en ejecuciones anteriores
+        restored = {}
+        self.ledger_context = None
+        self.pdf_hashes = {}
+        ledger = self.get_job_ledger()
+        if ledger is not None:
+            excel_handler = self.app_data.get('excel_handler')
+            self.ledger_context = ledger.context_hash(
+                settings, excel_handler.filepath if excel_handler else None)
+            try:
+                self.pdf_hashes, restored = ledger.find_completed(tasks, self.ledger_context)
+            except Exception as e:
+                print(f"⚠️ No se pudo consultar el registro de páginas calificadas: {e}")
 
-            page_count = item['page_count']
-            pdf_results = []
+        processed_pages = 0
+        completed = {}  # Resultados terminados que esperan su turno {índice: resultado}
+        next_index = 0
 
-            # Procesar cada página del PDF
-            for page_num in range(page_count):
+        try:
+            for index, result in iter_page_results(tasks, settings, num_workers,
+                                                   completed=restored):
                 processed_pages += 1
 
-                # Actualizar status
-                if page_count > 1:
-                    status_text = f"Procesando {item['filename']} - Página {page_num + 1}/{page_count} (Total: {processed_pages}/{total_pages})"
+                # Sumar los tiempos de la página (medidos en su proceso de trabajo)
+                page_stats = result.pop('stats', None)
+                if result.get('from_ledger'):
+                    self.run_stats.count('pages_restored')
                 else:
-                    status_text = f"Procesando {item['filename']} ({processed_pages}/{total_pages})"
+                    self.run_stats.merge(page_stats)
 
+                # Actualizar status y progreso (orden de finalización)
+                status_text = f"Procesado {result['filename']} (Total: {processed_pages}/{total_pages})"
                 self.parent.after(0, lambda t=status_text: self.status_label.configure(text=t))
 
-                # Procesar página individual
-                result = self.process_single_pdf(item['path'], page_num, page_count)
-                pdf_results.append(result)
-
-                # Actualizar progreso
                 progress = processed_pages / total_pages
                 self.parent.after(0, lambda p=progress: self.progress_bar.set(p))
 
-                # Agregar resultado
-                self.current_results.append(result)
-                self.parent.after(0, lambda r=result: self.append_result(r))
-
-            # Actualizar estado del PDF (success solo si todas las páginas fueron exitosas)
-            all_success = all(r['success'] for r in pdf_results)
-            item['result'] = pdf_results  # Guardar todos los resultados
-            item['status'] = 'success' if all_success else 'error'
-            self.parent.after(0, self.update_pdf_list)
-
-        # Finalizar
-        self.parent.after(0, self.finish_processing)
+                # Confirmar resultados en orden de cola (Excel con un único escritor)
+                completed[index] = result
+                while next_index in completed:
+                    self.commit_result(completed.pop(next_index), task_items[next_index])
+                    next_index += 1
 
-    def process_single_pdf(self, pdf_path: str, page_number: int = 0, total_pages: int = 1) -> Dict:
-        """Procesa una página específica de un PDF y retorna los resultados
+        except Exception as e:
+            print(f"❌ Error durante el procesamiento: {e}")
+            self.parent.after(0, lambda m=str(e): messagebox.showerror(
+                "Error", f"Error durante el procesamiento:\n{m}"))
 
-        Args:
-            pdf_path: Ruta al archivo PDF
-            page_number: Número de página a procesar (0-indexed)
-            total_pages: Total de páginas en el PDF
-        """
-        # Nombre de archivo para display
-        filename = Path(pdf_path).name
-        if total_pages > 1:
-            filename = f"{filename} - Página {page_number + 1}/{total_pages}"
-
-        result = {
-            'pdf_path': pdf_path,
-            'filename': filename,
-            'page_number': page_number,
-            'total_pages': total_pages,
-            'success': False,
-            'matricula': None,
-            'respuestas': {},
-            'correctas': 0,
-            'incorrectas': 0,
-            'nota': 0.0,
-            'confidence': 0.0,
-            'message': '',
-            'saved_to_excel': False,
-            'image_saved': False,
-            'image_path': None,
-            'needs_review': False,
-            'warped_image': None,
-            'detection_result': None,
-            'overlay_image': None
-        }
+        # Guardar en disco las notas acumuladas del lote
+        self.flush_excel()
 
+        # Guardar las mediciones para compararlas entre ejecuciones
+        self.run_stats.finish()
         try:
-            # Paso 1: Convertir PDF a imagen (página específica)
-            image = self.pdf_processor.pdf_to_image(pdf_path, page_number)
-            if image is None:
-                result['message'] = f"Error al convertir página {page_number + 1} a imagen"
-                return result
-
-            # Paso 2: Detectar ArUco y corregir perspectiva
-            process_result = self.image_processor.process_answer_sheet(image)
-            if not process_result['success']:
-                result['message'] = process_result['message']
-                return result
-
-            # Paso 3: Detección OMR
-            detection_result = self.omr_detector.detect_answer_sheet(
-                process_result['preprocessed']
+            self.run_stats_path = self.run_stats.dump_json(
+                PipelineStats.DEFAULT_DIR / f"{time.strftime('%Y%m%d_%H%M%S')}.json",
+                extra={'test_name': self.app_data.get('test_name', 'Prueba'),
+                       'num_workers': num_workers}
             )
+        except OSError as e:
+            print(f"⚠️ No se pudieron guardar las estadísticas: {e}")
 
-            # Guardar datos necesarios para revisión manual
-            result['warped_image'] = process_result['warped_image']
-            result['detection_result'] = detection_result
+        # PDFs que quedaron incompletos por un error
+        for item in pending:
+            if item['status'] == 'processing':
+                item['status'] = 'error'
+        self.parent.after(0, self.update_pdf_list)
 
-            # Extraer matrícula
-            result['matricula'] = detection_result['matricula'].get('matricula', 'N/A')
-            result['respuestas'] = detection_result['respuestas'].get('respuestas', {})
-            result['confidence'] = detection_result.get('overall_confidence', 0.0)
-
-            # Verificar si necesita revisión manual (confianza < 99%)
-            CONFIDENCE_THRESHOLD = 99.0
-            result['needs_review'] = result['confidence'] < CONFIDENCE_THRESHOLD
-
-            # Paso 4: Generar y guardar imagen con overlay visual
-            try:
-                # Generar overlay visual
-                overlay = self.omr_detector.create_visual_overlay(
-                    process_result['warped_image'],
-                    detection_result,
-                    answer_key=self.app_data.get('answer_key')
-                )
-
-                # Guardar overlay en result (necesario para revisión manual)
-                result['overlay_image'] = overlay
+        # Finalizar
+        self.parent.after(0, self.finish_processing)
 
-                # Determinar dónde guardar la imagen
-                if self.app_data.get('excel_handler'):
-                    # Guardar en una carpeta con el nombre de la prueba dentro del directorio del Excel
-                    excel_path = self.app_data['excel_handler'].filepath
-                    base_dir = Path(excel_path).parent
-                else:
-                    # Guardar en la carpeta del PDF si no hay Excel configurado
-                    base_dir = Path(pdf_path).parent
-
-                # Crear nombre de archivo: {matricula}_{nombre_prueba}.jpg
-                # Para PDFs multi-página, agregar sufijo de página
-                test_name = self.app_data.get('test_name', 'Prueba')
-                # Limpiar nombre de prueba para que sea válido en sistema de archivos
-                safe_test_name = "".join(c for c in test_name if c.isalnum() or c in (' ', '_', '-')).strip()
-
-                # Crear carpeta con el nombre de la prueba para organizar los overlays
-                output_dir = base_dir / safe_test_name
-                output_dir.mkdir(parents=True, exist_ok=True)
-
-                # Si es multi-página, agregar sufijo "_pX" para evitar sobrescritura
-                if total_pages > 1:
-                    image_filename = f"{result['matricula']}_{safe_test_name}_p{page_number + 1}.jpg"
-                else:
-                    image_filename = f"{result['matricula']}_{safe_test_name}.jpg"
+    def flush_excel(self):
+        """Guarda en disco las notas pendientes del Excel (modo write-behind)"""
+        excel_handler = self.app_data.get('excel_handler')
+        if not excel_handler:
+            return
 
-                image_path = output_dir / image_filename
+        if self.run_stats is not None:
+            with self.run_stats.stage('excel_flush'):
+                flush_result = excel_handler.flush()
+        else:
+            flush_result = excel_handler.flush()
+        if not flush_result['success']:
+            print(f"❌ {flush_result['message']}")
+            self.parent.after(0, lambda m=flush_result['message']: messagebox.showerror(
+                "Error al guardar", f"{m}\n\nLas notas se recuperarán al volver a cargar el Excel."))
 
-                # Guardar la ruta para usar después
-                result['image_path'] = str(image_path)
+    def commit_result(self, result: Dict, item: Dict):
+        """Guarda en Excel y registra el resultado de una página (en orden de cola)
 
-                # IMPORTANTE: Solo guardar imagen si NO necesita revisión manual
-                # Si necesita revisión, la imagen se guardará DESPUÉS de las correcciones
-                if not result['needs_review']:
-                    cv2.imwrite(str(image_path), overlay)
-                    result['image_saved'] = True
-                else:
-                    # No guardar todavía, se guardará después de la revisión manual
-                    result['image_saved'] = False
+        Args:
+            result: Resultado de la página
+            item: Elemento de la cola al que pertenece la página
+        """
+        from src.core.grading_pipeline import save_result_to_excel
+
+        # Las páginas recuperadas del registro ya se guardaron en Excel
+        if not result.get('from_ledger'):
+            # Guardar en Excel si está configurado
+            # NO guardar si necesita revisión manual (confianza < 99%)
+            if self.app_data.get('answer_key') and self.app_data.get('excel_handler'):
+                save_result_to_excel(result,
+                                     self.app_data['excel_handler'],
+                                     self.app_data.get('test_name', 'Prueba'),
+                                     self.run_stats)
+
+            self.record_in_ledger(result)
+
+        # La imagen para revisión manual pasa al caché (memoria acotada / disco)
+        warped_image = result.pop('warped_image', None)
+        if warped_image is not None:
+            result['review_image_key'] = self.review_cache.put(warped_image)
+
+        # Agregar resultado
+        self.current_results.append(result)
+        self.parent.after(0, lambda r=result: self.append_result(r))
+
+        # Actualizar estado del PDF (success solo si todas las páginas fueron exitosas)
+        item['result'].append(result)
+        if len(item['result']) == item['page_count']:
+            all_success = all(r['success'] for r in item['result'])
+            item['status'] = 'success' if all_success else 'error'
+            self.parent.after(0, self.update_pdf_list)
 
-            except Exception as e:
-                # Si falla el guardado de imagen, continuar con el procesamiento
-                result['image_saved'] = False
-                result['image_path'] = None
-                print(f"⚠️ Error al guardar imagen overlay: {e}")
-
-            # Paso 5: Calificar si hay pauta
-            if self.app_data.get('answer_key'):
-                # Comparar respuestas con la pauta
-                answer_key = self.app_data['answer_key']
-                correctas = 0
-                incorrectas = 0
-
-                for pregunta, respuesta in result['respuestas'].items():
-                    if respuesta is None:
-                        continue  # Pregunta sin responder
-
-                    if pregunta in answer_key:
-                        if respuesta == answer_key[pregunta]:
-                            correctas += 1
-                        else:
-                            incorrectas += 1
-
-                result['correctas'] = correctas
-                result['incorrectas'] = incorrectas
-
-                # Calcular nota usando GradeCalculator
-                num_questions = self.app_data.get('num_questions', 100)
-                grade_calc = GradeCalculator(
-                    max_score=num_questions,
-                    passing_percentage=self.app_data.get('passing_percentage', 60.0),
-                    min_grade=self.app_data.get('min_grade', 1.0),
-                    max_grade=self.app_data.get('max_grade', 7.0),
-                    passing_grade=self.app_data.get('passing_grade', 4.0)
-                )
+    def record_in_ledger(self, result: Dict):
+        """Registra el estado de una página para poder reanudar el lote
 
-                result['nota'] = grade_calc.calculate_grade(correctas)
-
-                # Paso 6: Guardar en Excel si está configurado
-                # NO guardar si necesita revisión manual (confianza < 99%)
-                if self.app_data.get('excel_handler') and result['matricula'] != 'N/A':
-                    if not result['needs_review']:
-                        # Solo guardar si la confianza es >= 99%
-                        excel_handler = self.app_data['excel_handler']
-                        save_result = excel_handler.save_grade(
-                            matricula=result['matricula'],
-                            grade=result['nota'],
-                            test_name=self.app_data.get('test_name', 'Prueba')
-                        )
-                        result['saved_to_excel'] = save_result['success']
-                        if not save_result['success']:
-                            result['message'] = save_result['message']
-                    else:
-                        # Marcar que no se guardó porque necesita revisión
-                        result['saved_to_excel'] = False
-                        result['message'] = 'Requiere revisión manual (confianza < 99%)'
-
-            result['success'] = True
-            if result['needs_review']:
-                result['message'] = "Procesado - Requiere revisión manual"
-            else:
-                result['message'] = "Procesado exitosamente"
+        Args:
+            result: Resultado de la página
+        """
+        pdf_hash = self.pdf_hashes.get(result['pdf_path'])
+        if self.job_ledger is None or self.ledger_context is None or pdf_hash is None:
+            return
 
+        try:
+            self.job_ledger.record(pdf_hash, self.ledger_context, result)
         except Exception as e:
-            result['message'] = f"Error: {str(e)}"
-
-        return result
+            print(f"⚠️ No se pudo registrar {result['filename']}: {e}")
 
     def append_result(self, result: Dict):
         """Agrega un resultado al área de texto"""
@@ -586,6 +591,9 @@ class GradingTab:
         text += f"{status} {result['filename']}\n"
         text += f"{'='*80}\n"
 
+        if result.get('from_ledger'):
+            text += "♻️ Recuperado de una ejecución anterior\n"
+
         if result['success']:
             text += f"Matrícula: {result['matricula']}\n"
             text += f"Confianza: {result['confidence']:.1f}%\n"
@@ -596,7 +604,8 @@ class GradingTab:
 
             if result['nota'] > 0:
                 text += f"Correctas: {result['correctas']} | " \
-                       f"Incorrectas: {result['incorrectas']}\n"
+                       f"Incorrectas: {result['incorrectas']} | " \
+                       f"En blanco: {result.get('en_blanco', 0)}\n"
                 text += f"Nota: {result['nota']:.1f}\n"
 
                 if result['saved_to_excel']:
@@ -651,18 +660,34 @@ class GradingTab:
             saved = sum(1 for r in self.current_results if r.get('saved_to_excel'))
             summary += f"Guardados en Excel: {saved}\n"
 
+        # Páginas recuperadas del registro (calificadas en una ejecución anterior)
+        restored = sum(1 for r in self.current_results if r.get('from_ledger'))
+        if restored > 0:
+            summary += f"Recuperados de ejecuciones anteriores: {restored}\n"
+
         # Información de imágenes guardadas
         images_saved = sum(1 for r in self.current_results if r.get('image_saved'))
         if images_saved > 0:
             summary += f"Imágenes con overlay guardadas: {images_saved}\n"
 
+        # Páginas obtenidas directamente de la imagen del escáner (sin rasterizar)
+        rendered = [r for r in self.current_results if r.get('render_path')]
+        if rendered:
+            embedded = sum(1 for r in rendered if r['render_path'] == 'embedded')
+            summary += f"Páginas leídas desde la imagen escaneada: {embedded}/{len(rendered)}\n"
+
+        # Páginas recalificadas sin volver a detectar (caché de detecciones)
+        from_cache = sum(1 for r in self.current_results
+                         if r.get('from_detection_cache') and not r.get('from_ledger'))
+        if from_cache > 0:
+            summary += f"Detecciones recuperadas del caché: {from_cache}\n"
+
         # Verificar si hay hojas que necesitan revisión manual
         sheets_needing_review = [
             {
                 'result': r,
-                'warped_image': r.get('warped_image'),
-                'detection_result': r.get('detection_result'),
-                'overlay_image': r.get('overlay_image')
+                'image_key': r.get('review_image_key'),
+                'detection_result': r.get('detection_result')
             }
             for r in self.current_results
             if r.get('success') and r.get('needs_review')
@@ -671,6 +696,15 @@ class GradingTab:
         if sheets_needing_review:
             summary += f"\n⚠️ Hojas que requieren revisión manual: {len(sheets_needing_review)}\n"
 
+        # Tiempos por etapa de esta ejecución
+        if self.run_stats is not None and self.run_stats.stages:
+            summary += f"\n{'='*80}\n"
+            summary += "RENDIMIENTO\n"
+            summary += f"{'='*80}\n"
+            summary += "\n".join(self.run_stats.summary_lines()) + "\n"
+            if self.run_stats_path:
+                summary += f"Estadísticas guardadas en: {self.run_stats_path}\n"
+
         self.results_text.insert("end", summary)
         self.status_label.configure(text="✅ Procesamiento completado")
 
@@ -687,12 +721,67 @@ class GradingTab:
             )
 
             if result:  # Si presiona "Sí"
-                self.open_manual_review(sheets_needing_review)
+                self.start_review(sheets_needing_review)
         else:
             messagebox.showinfo("Completado", msg)
 
+    def start_review(self, sheets_to_review: List[Dict]):
+        """Ofrece revisar primero por preguntas y luego hoja por hoja las hojas restantes"""
+        from src.core.review_queue import is_queue_eligible
+        from src.utils.constants import REVIEW_QUEUE_MIN_AMBIGUITY
+
+        eligible = sum(1 for sheet in sheets_to_review
+                       if is_queue_eligible(sheet, REVIEW_QUEUE_MIN_AMBIGUITY))
+        if eligible and messagebox.askyesno(
+                "Modo de revisión",
+                f"{eligible} de {len(sheets_to_review)} hoja(s) tienen la matrícula completa y sin dudas, y se pueden "
+                "revisar por preguntas: solo se muestran las preguntas dudosas de todas las hojas, "
+                "de la más a la menos ambigua.\n\n"
+                "¿Revisar por preguntas? (No = revisar hoja por hoja)"):
+            self.open_question_review(sheets_to_review)
+
+            # Las hojas que quedaron pendientes se revisan completas
+            sheets_to_review = [sheet for sheet in sheets_to_review
+                                if not sheet.get('reviewed') and not sheet.get('skipped')]
+            if not sheets_to_review or not messagebox.askyesno(
+                    "Revisión manual",
+                    f"Quedan {len(sheets_to_review)} hoja(s) por revisar "
+                    "(matrícula incompleta o dudosa, o preguntas sin decidir).\n\n"
+                    "¿Revisarlas hoja por hoja ahora?"):
+                return
+
+        self.open_manual_review(sheets_to_review)
+
+    def open_question_review(self, sheets_to_review: List[Dict]):
+        """Abre la ventana de revisión por preguntas"""
+        from src.ui.question_review_window import QuestionReviewWindow
+
+        try:
+            review_window = QuestionReviewWindow(
+                parent=self.parent,
+                sheets_to_review=sheets_to_review,
+                omr_detector=self.omr_detector,
+                app_data=self.app_data,
+                on_save_callback=self.save_reviewed_sheet,
+                image_cache=self.review_cache
+            )
+
+            # Esperar a que se cierre la ventana
+            self.parent.wait_window(review_window)
+
+            # Guardar en disco las notas corregidas
+            self.flush_excel()
+
+            # Actualizar resultados después de la revisión
+            self.update_results_after_review()
+
+        except Exception as e:
+            messagebox.showerror("Error", f"Error al abrir ventana de revisión: {e}")
+
     def open_manual_review(self, sheets_to_review: List[Dict]):
         """Abre la ventana de revisión manual"""
+        from src.ui.manual_review_window import ManualReviewWindow
+
         try:
             # Crear ventana de revisión manual
             review_window = ManualReviewWindow(
@@ -700,12 +789,16 @@ class GradingTab:
                 sheets_to_review=sheets_to_review,
                 omr_detector=self.omr_detector,
                 app_data=self.app_data,
-                on_save_callback=self.save_reviewed_sheet
+                on_save_callback=self.save_reviewed_sheet,
+                image_cache=self.review_cache
             )
 
             # Esperar a que se cierre la ventana
             self.parent.wait_window(review_window)
 
+            # Guardar en disco las notas corregidas
+            self.flush_excel()
+
             # Actualizar resultados después de la revisión
             self.update_results_after_review()
 
@@ -739,6 +832,7 @@ class GradingTab:
                     result['saved_to_excel'] = True
                     result['needs_review'] = False
                     result['message'] = 'Guardado después de revisión manual'
+                    self.record_in_ledger(result)
                     return True
                 else:
                     messagebox.showerror("Error al guardar",
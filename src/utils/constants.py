@@ -21,6 +21,27 @@ PAPER_HEIGHT_MM = 279.4
 # NOTA: Los círculos tienen texto impreso (~20-30% oscuro), solo círculos MARCADOS con bolígrafo deben superar este umbral
 MIN_FILL_PERCENTAGE = 65  # Porcentaje mínimo de relleno para considerar marcado (debe superar el texto impreso)
 MAX_FILL_PERCENTAGE = 98  # Porcentaje máximo (para detectar sobre-marcado)
+# Estrategia para medir el relleno: 'exact' (conteo de píxeles por círculo)
+# o 'integral' (hoja binarizada una vez + tabla de áreas acumuladas)
+FILL_STRATEGIES = ["exact", "integral"]  # Estrategias disponibles (mismos porcentajes)
+DEFAULT_FILL_STRATEGY = "exact"
+
+# Procesamiento por lotes
+DEFAULT_NUM_WORKERS = 0  # Procesos en paralelo para calificar (0 = automático: núcleos - 1)
+DEFAULT_REVIEW_CACHE_MB = 1024  # Memoria máxima para imágenes de hojas en revisión
+REVIEW_PREFETCH_SHEETS = 2  # Hojas siguientes que la revisión manual prepara en segundo plano
+REVIEW_HISTORY_SHEETS = 3  # Hojas ya mostradas que se conservan para volver atrás
+REVIEW_ZOOM_LEVELS = [1.0, 1.5, 2.0, 3.0, 4.0]  # Niveles de zoom de la revisión (1.0 = ajustada al ancho)
+REVIEW_TILE_SIZE = 256  # Lado de los mosaicos de la vista ampliada (píxeles)
+REVIEW_TILE_CACHE = 128  # Mosaicos que se conservan en memoria como máximo (~25 MB)
+REVIEW_QUEUE_MIN_AMBIGUITY = 0.0  # Revisión por preguntas: solo preguntas con ambigüedad (0-1) mayor a este valor
+
+# Imágenes de resultado (overlay)
+IMAGE_FORMATS = ["jpg", "png", "webp"]  # Formatos disponibles
+DEFAULT_IMAGE_FORMAT = "jpg"
+DEFAULT_IMAGE_QUALITY = 95  # Calidad JPEG/WebP (1-100); PNG no tiene pérdida
+DEFAULT_IMAGE_WRITER_THREADS = 2  # Hilos que dibujan y guardan las imágenes en segundo plano
+DEFAULT_IMAGE_WRITER_PENDING = 4  # Imágenes en cola como máximo (limita la memoria)
 
 # Colores para overlay visual (BGR para OpenCV)
 COLOR_CORRECT = (0, 255, 0)      # Verde